@@ -1,18 +1,29 @@
 import Binance from 'binance-api-node';
 import { CurrencyPair } from '../types';
 
+// exchangeInfo змінюється рідко - не запитуємо його на кожен прогноз
+const EXCHANGE_INFO_TTL_MS = 10 * 60 * 1000;
+
 export class BinanceService {
   private client: ReturnType<typeof Binance>;
+  private exchangeInfo: { data: any; fetchedAt: number } | null = null;
 
   constructor() {
     // Initialize Binance client without authentication for public endpoints
     this.client = Binance();
   }
 
+  private async getExchangeInfo(): Promise<any> {
+    if (!this.exchangeInfo || Date.now() - this.exchangeInfo.fetchedAt > EXCHANGE_INFO_TTL_MS) {
+      this.exchangeInfo = { data: await this.client.exchangeInfo(), fetchedAt: Date.now() };
+    }
+    return this.exchangeInfo.data;
+  }
+
   async getCurrencyPairs(): Promise<CurrencyPair[]> {
     try {
       // Get exchange info which contains all trading pairs
-      const exchangeInfo = await this.client.exchangeInfo();
+      const exchangeInfo = await this.getExchangeInfo();
       
       // Filter for USDT pairs and map to our format
       const currencyPairs: CurrencyPair[] = exchangeInfo.symbols
@@ -40,7 +51,7 @@ export class BinanceService {
   async getCurrencyPairInfo(symbol: string): Promise<CurrencyPair> {
     try {
       // Get exchange info which contains all trading pairs
-      const exchangeInfo = await this.client.exchangeInfo();
+      const exchangeInfo = await this.getExchangeInfo();
       
       // Find the specific symbol
       const symbolInfo = exchangeInfo.symbols.find((s: any) => s.symbol === symbol);
@@ -22,6 +22,18 @@ interface PythonPrediction {
     }
 }
 
+// PYTHON_CANDLE_SOURCE=1: Python API сам тримає свічки (CANDLE_SOURCE=binance),
+// прогноз і ціни для графіка беруться з його буфера через GET /predict?symbol=
+// без запиту свічок до Binance
+const useServerCandles = process.env.PYTHON_CANDLE_SOURCE === '1';
+// Скільки свічок показувати на графіку (як у BinanceService.getHistoricalData)
+const CHART_CANDLES = 30;
+
+interface WindowPrediction {
+    prediction: PythonPrediction;
+    history: HistoricalDataPoint[];
+}
+
 export class PredictionService {
   private binanceService: BinanceService;
 
@@ -34,17 +46,24 @@ export class PredictionService {
   }
 
   async getPrediction(currencyPairId: string): Promise<PredictionData> {
-    // Отримуємо історичні дані з Binance
-    const historicalData = await this.binanceService.getHistoricalData(currencyPairId);
-
     // Викликаємо Python FastAPI для справжнього prediction
-    const pythonPrediction = await this.getPredictionFromPython(historicalData);
+    const windowed = useServerCandles ? await this.getWindowPredictionFromPython(currencyPairId) : null;
+    let pythonPrediction: PythonPrediction;
+    let chartData: HistoricalDataPoint[];
+    if (windowed) {
+      pythonPrediction = windowed.prediction;
+      chartData = windowed.history;
+    } else {
+      // Отримуємо історичні дані з Binance і надсилаємо їх у Python API
+      const historicalData = await this.binanceService.getHistoricalData(currencyPairId);
+      pythonPrediction = await this.getPredictionFromPython(historicalData);
 
-    // Формуємо історичні дані для графіка
-    const chartData: HistoricalDataPoint[] = historicalData.map(data => ({
-      timestamp: data.timestamp,
-      price: data.close
-    }));
+      // Формуємо історичні дані для графіка
+      chartData = historicalData.map(data => ({
+        timestamp: data.timestamp,
+        price: data.close
+      }));
+    }
 
     // Отримуємо інформацію про валютну пару
     const currencyPair = await this.binanceService.getCurrencyPairInfo(currencyPairId);
@@ -57,36 +76,66 @@ export class PredictionService {
         confidence: pythonPrediction.confidence,
         predictedPrice: pythonPrediction.predictedPrice,
         priceChangePercent: 0, // Це значення буде розраховано в Python API
-        lastPrice: historicalData[historicalData.length - 1].close
+        lastPrice: chartData[chartData.length - 1].price
       }
     };
   }
 
+  private async getWindowPredictionFromPython(symbol: string): Promise<WindowPrediction | null> {
+    const pythonApiUrl = process.env.PYTHON_API_URL || 'http://python-api:8000';
+    const response = await fetch(
+      `${pythonApiUrl}/predict?symbol=${encodeURIComponent(symbol)}&history=${CHART_CANDLES}`
+    );
+
+    if (response.status === 503) {
+      // Вікно символу ще заповнюється на сервері - цього разу надсилаємо свічки самі
+      console.log(`Python API window for ${symbol} is not ready, sending candles`);
+      return null;
+    }
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.prediction?.error || 'Failed to get prediction');
+    }
+
+    const result = await response.json();
+    console.log('Received prediction:', result.prediction);
+    const history: HistoricalDataPoint[] = (result.history || []).map((point: { timestamp: number; close: number }) => ({
+      // Python API повертає час у секундах, графік - у мілісекундах, як openTime Binance
+      timestamp: point.timestamp * 1000,
+      price: point.close
+    }));
+    if (history.length === 0) {
+      // Ознаки моделі без close - ціни для графіка беремо з Binance
+      return null;
+    }
+    return { prediction: result.prediction, history };
+  }
+
   private async getPredictionFromPython(data: HistoricalData[]): Promise<PythonPrediction> {
     try {
-      // Форматуємо дані для Python API
-      const formattedData = {
-        symbol: data[0].symbol,
-        prices: data.map(price => ({
-          timestamp: price.timestamp,
-          open: parseFloat(price.open.toString()),
-          high: parseFloat(price.high.toString()),
-          low: parseFloat(price.low.toString()),
-          close: parseFloat(price.close.toString()),
-          volume: parseFloat(price.volume.toString()),
-          trades: parseFloat(price.trades.toString())
-        }))
-      };
-
-      console.log('Sending data to Python API:', formattedData);
+      // Форматуємо дані для Python API у компактному форматі:
+      // float32 little-endian, по рядках open, high, low, close, volume
+      const columns = 5;
+      const values = new Float32Array(data.length * columns);
+      data.forEach((price, i) => {
+        const offset = i * columns;
+        values[offset] = Number(price.open);
+        values[offset + 1] = Number(price.high);
+        values[offset + 2] = Number(price.low);
+        values[offset + 3] = Number(price.close);
+        values[offset + 4] = Number(price.volume);
+      });
+      const symbol = data[0].symbol;
+
+      console.log(`Sending ${data.length} candles for ${symbol} to Python API`);
 
       const pythonApiUrl = process.env.PYTHON_API_URL || 'http://python-api:8000';
-      const response = await fetch(`${pythonApiUrl}/predict`, {
+      const response = await fetch(`${pythonApiUrl}/predict?symbol=${encodeURIComponent(symbol)}`, {
         method: 'POST',
         headers: {
-          'Content-Type': 'application/json',
+          'Content-Type': 'application/x-ohlcv-f32',
         },
-        body: JSON.stringify(formattedData)
+        body: Buffer.from(values.buffer, values.byteOffset, values.byteLength)
       });
 
       if (!response.ok) {
@@ -0,0 +1,87 @@
+"""
+Вибір розміру батчу за бюджетом пам'яті.
+
+Пам'ять навчання LSTM оцінюється як постійна частина (ваги, градієнти і
+два моменти Adam - чотири копії параметрів) плюс частина на семпл: вікно
+ознак у конвеєрі tf.data і активації LSTM на кожному кроці вікна (чотири
+гейти, стан комірки і вихід), що зберігаються для backprop разом з їх
+градієнтами. Оцінка груба, тому зверху множиться на запас SAFETY_FACTOR;
+якщо вона все одно не влазить, train_model зменшує батч після OOM.
+"""
+import numpy as np
+import tensorflow as tf
+
+FLOAT_BYTES = 4
+SAFETY_FACTOR = 1.5
+MIN_BATCH_SIZE = 8
+MAX_BATCH_SIZE = 1024
+
+
+def lstm_param_count(n_features: int, lstm_units: int) -> int:
+    """Кількість параметрів моделі LSTM -> Dense(1) з model_trainer."""
+    return 4 * lstm_units * (n_features + lstm_units + 1) + lstm_units + 1
+
+
+def estimate_sample_bytes(window_size: int, n_features: int, lstm_units: int) -> int:
+    """
+    Оцінка пам'яті на один семпл батчу під час кроку навчання.
+
+    Args:
+        window_size (int): Розмір вікна
+        n_features (int): Кількість ознак
+        lstm_units (int): Кількість нейронів LSTM
+
+    Returns:
+        int: Байти на семпл (із запасом SAFETY_FACTOR)
+    """
+    # Вікно: батч у prefetch-буфері, у кроці і його gather-копія
+    window = 3 * window_size * n_features
+    # Активації на крок вікна: 4 гейти + c + h, і стільки ж градієнтів
+    activations = 2 * window_size * 6 * lstm_units
+    return int((window + activations) * FLOAT_BYTES * SAFETY_FACTOR)
+
+
+def pick_batch_size(
+    memory_budget_mb: float,
+    window_size: int,
+    n_features: int,
+    lstm_units: int,
+    n_params: int = None,
+    max_batch_size: int = MAX_BATCH_SIZE
+) -> int:
+    """
+    Найбільший степінь двійки, для якого оцінка пам'яті кроку вміщується в бюджет.
+
+    Args:
+        memory_budget_mb (float): Бюджет пам'яті на навчання в МБ
+        window_size (int): Розмір вікна
+        n_features (int): Кількість ознак
+        lstm_units (int): Кількість нейронів LSTM
+        n_params (int): Кількість параметрів моделі (None - оцінка з lstm_param_count)
+        max_batch_size (int): Верхня межа батчу
+
+    Returns:
+        int: Розмір батчу в [MIN_BATCH_SIZE, max_batch_size]; якщо навіть
+            MIN_BATCH_SIZE не вміщується - MIN_BATCH_SIZE з попередженням
+    """
+    if n_params is None:
+        n_params = lstm_param_count(n_features, lstm_units)
+    # Ваги, градієнти і два моменти Adam
+    fixed = 4 * n_params * FLOAT_BYTES
+    per_sample = estimate_sample_bytes(window_size, n_features, lstm_units)
+    available = memory_budget_mb * 1024 * 1024 - fixed
+
+    fits = int(available // per_sample) if available > 0 else 0
+    if fits < MIN_BATCH_SIZE:
+        print(f"[!] Бюджет {memory_budget_mb:.0f} МБ замалий навіть для батчу {MIN_BATCH_SIZE} "
+              f"(~{per_sample / 1024:.0f} КБ на семпл)")
+        return MIN_BATCH_SIZE
+    batch_size = 1 << int(np.log2(min(fits, max_batch_size)))
+    print(f"[>] Бюджет пам'яті {memory_budget_mb:.0f} МБ: ~{per_sample / 1024:.0f} КБ на семпл, "
+          f"batch_size={batch_size} (~{(fixed + batch_size * per_sample) / 1024 / 1024:.0f} МБ)")
+    return batch_size
+
+
+def is_out_of_memory(error: Exception) -> bool:
+    """Чи є помилка нестачею пам'яті (TF ResourceExhausted або MemoryError)."""
+    return isinstance(error, (tf.errors.ResourceExhaustedError, MemoryError))
@@ -0,0 +1,303 @@
+"""
+Відтворюваний бенчмарк підготовки даних, навчання та інференсу.
+
+Генерує синтетичні OHLCV-дані кількох розмірів і вимірює:
+  - generate_and_save_sequences: рядків/с;
+  - load_sequences: час завантаження кешу послідовностей;
+  - train_model: семплів/с на епоху (tf.data; з --compare-numpy також на готових масивах);
+  - CryptoPredictor (python-api): перцентилі затримки predict_rows / predict_array;
+  - /predict: пропускну здатність під конкурентним навантаженням (якщо задано --api-url).
+
+Результати пишуться в JSON; з --baseline порівнюються зі збереженим
+прогоном, і регресії понад --tolerance повертають код виходу 1.
+
+Приклад:
+    python benchmark.py --sizes small medium --output bench.json --baseline bench_baseline.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from labels import build_labels, target_column
+
+# Кількість рядків синтетичних даних для кожного розміру
+SIZES = {
+    'small': 2_000,
+    'medium': 20_000,
+    'large': 200_000,
+}
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python-api')
+
+
+def generate_ohlcv(n_rows: int, seed: int = 42, horizon: int = 60) -> pd.DataFrame:
+    """
+    Генерує синтетичні хвилинні свічки (геометричне випадкове блукання) з колонкою мітки.
+
+    Args:
+        n_rows (int): Кількість рядків
+        seed (int): Зерно генератора
+        horizon (int): Горизонт мітки, як у prepare_data.py
+
+    Returns:
+        pd.DataFrame: timestamp, open, high, low, close, volume, trades, target_<horizon>
+    """
+    rng = np.random.default_rng(seed)
+    close = 30_000 * np.exp(np.cumsum(rng.normal(0, 0.001, n_rows)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.0005, (2, n_rows)))
+    high = np.maximum(open_, close) * (1 + spread[0])
+    low = np.minimum(open_, close) * (1 - spread[1])
+
+    return pd.DataFrame({
+        'timestamp': 1_600_000_000 + 60 * np.arange(n_rows),
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': rng.lognormal(3, 1, n_rows),
+        'trades': rng.poisson(100, n_rows),
+        target_column(horizon): build_labels(close, (horizon,))[:, 0],
+    })
+
+
+def percentiles(samples: list, scale: float = 1000.0) -> dict:
+    values = np.asarray(samples) * scale
+    return {f'p{p}': float(np.percentile(values, p)) for p in (50, 90, 99)}
+
+
+def metric(value: float, unit: str, better: str) -> dict:
+    return {'value': float(value), 'unit': unit, 'better': better}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Приглушує print-прогрес досліджуваних функцій, щоб не міряти вивід у термінал."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_sequences(csv_path: str, n_rows: int, window_size: int) -> dict:
+    from sequence_processor import generate_and_save_sequences, load_sequences
+
+    start = time.perf_counter()
+    with quiet():
+        generate_and_save_sequences(csv_path, window_size)
+    generate_seconds = time.perf_counter() - start
+
+    load_times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        with quiet():
+            load_sequences(csv_path, window_size)
+        load_times.append(time.perf_counter() - start)
+
+    return {
+        'generate_rows_per_sec': metric(n_rows / generate_seconds, 'rows/s', 'higher'),
+        'load_seconds': metric(min(load_times), 's', 'lower'),
+    }
+
+
+def bench_training(csv_path: str, n_rows: int, window_size: int, epochs: int, batch_size: int,
+                   model_dir: str, use_tf_data: bool = True) -> dict:
+    from tensorflow.keras.callbacks import Callback
+    from model_trainer import save_trained_model, split_sample_ranges, train_model
+
+    class EpochTimer(Callback):
+        def __init__(self):
+            super().__init__()
+            self.durations = []
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self._start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.durations.append(time.perf_counter() - self._start)
+
+    timer = EpochTimer()
+    with quiet():
+        model, history, accuracy = train_model(
+            data_path=csv_path,
+            epochs=epochs,
+            window_size=window_size,
+            batch_size=batch_size,
+            show_plot=False,
+            save_model=False,
+            callbacks=[timer],
+            use_tf_data=use_tf_data,
+        )
+        save_trained_model(model, model_dir)
+
+    train_range, _ = split_sample_ranges(n_rows, window_size, 0.2)
+    n_train = train_range[1] - train_range[0]
+    # Перша епоха включає трасування/компіляцію - рахуємо окремо
+    steady = timer.durations[1:] or timer.durations
+    return {
+        'first_epoch_seconds': metric(timer.durations[0], 's', 'lower'),
+        'samples_per_sec': metric(n_train / float(np.median(steady)), 'samples/s', 'higher'),
+    }
+
+
+def bench_predictor(model_path: str, window_size: int, n_calls: int) -> dict:
+    sys.path.insert(0, API_DIR)
+    from predictor import CryptoPredictor
+
+    predictor = CryptoPredictor(model_path)
+    predictor.window_size = window_size
+    candles = generate_ohlcv(window_size)
+    columns = ['open', 'high', 'low', 'close', 'volume']
+    rows = candles[columns].to_dict('records')
+    values = candles[columns].to_numpy(np.float32)
+
+    results = {}
+    for name, call in (('predict_rows', lambda: predictor.predict_rows(rows)),
+                       ('predict_array', lambda: predictor.predict_array(values))):
+        call()  # прогрів
+        latencies = []
+        for _ in range(n_calls):
+            start = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - start)
+        for key, value in percentiles(latencies).items():
+            results[f'{name}_{key}_ms'] = metric(value, 'ms', 'lower')
+    return results
+
+
+def bench_api(api_url: str, window_size: int, concurrency: int, duration: float) -> dict:
+    sys.path.insert(0, API_DIR)
+    from benchmark_workers import load_test
+
+    body = generate_ohlcv(window_size)[['open', 'high', 'low', 'close', 'volume']].to_numpy('<f4').tobytes()
+    load_test(api_url, body, concurrency, min(3.0, duration))  # прогрів
+    result = load_test(api_url, body, concurrency, duration)
+    return {
+        'rps': metric(result['rps'], 'req/s', 'higher'),
+        'p50_ms': metric(result['p50_ms'], 'ms', 'lower'),
+        'p99_ms': metric(result['p99_ms'], 'ms', 'lower'),
+        'errors': metric(result['errors'], 'count', 'lower'),
+    }
+
+
+def environment_info() -> dict:
+    info = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+    try:
+        import tensorflow as tf
+        info['tensorflow'] = tf.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Порівнює поточні метрики з базовими.
+
+    Returns:
+        list: Рядки з описом регресій (порожній список - регресій немає)
+    """
+    regressions = []
+    print(f"\n{'метрика':55s} {'база':>12s} {'зараз':>12s} {'зміна':>8s}")
+    for name, current in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None or base['value'] == 0:
+            continue
+        change = (current['value'] - base['value']) / abs(base['value'])
+        worse = -change if current['better'] == 'higher' else change
+        flag = ' <-- регресія' if worse > tolerance else ''
+        print(f"{name:55s} {base['value']:12.4g} {current['value']:12.4g} {change * 100:+7.1f}%{flag}")
+        if flag:
+            regressions.append(f"{name}: {base['value']:.4g} -> {current['value']:.4g} ({change * 100:+.1f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['small', 'medium'])
+    parser.add_argument('--window-size', type=int, default=30)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--predict-calls', type=int, default=200)
+    parser.add_argument('--skip-training', action='store_true', help='Лише підготовка даних')
+    parser.add_argument('--compare-numpy', action='store_true',
+                        help='Також виміряти навчання на готових масивах X замість tf.data')
+    parser.add_argument('--api-url', help='URL запущеного API для навантажувального тесту /predict')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    parser.add_argument('--baseline', help='JSON попереднього прогону для порівняння')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Допустиме погіршення (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bench_') as work_dir:
+        for size in args.sizes:
+            n_rows = SIZES[size]
+            print(f"[>] Розмір {size}: {n_rows} рядків")
+            csv_path = os.path.join(work_dir, f'SYNTH{size.upper()}_1.csv')
+            generate_ohlcv(n_rows, seed=args.seed).to_csv(csv_path, index=False)
+
+            for name, value in bench_sequences(csv_path, n_rows, args.window_size).items():
+                results[f'sequences/{size}/{name}'] = value
+
+            if args.skip_training:
+                continue
+            model_dir = os.path.join(work_dir, f'model_{size}')
+            for name, value in bench_training(csv_path, n_rows, args.window_size, args.epochs,
+                                              args.batch_size, model_dir).items():
+                results[f'train/{size}/{name}'] = value
+            if args.compare_numpy:
+                # Попередній шлях: готові масиви X з кешу послідовностей
+                for name, value in bench_training(csv_path, n_rows, args.window_size, args.epochs,
+                                                  args.batch_size, model_dir + '_numpy', use_tf_data=False).items():
+                    results[f'train_numpy/{size}/{name}'] = value
+
+        if not args.skip_training:
+            model_path = os.path.join(work_dir, f'model_{args.sizes[0]}', 'model.keras')
+            print("[>] Затримка CryptoPredictor")
+            for name, value in bench_predictor(model_path, args.window_size, args.predict_calls).items():
+                results[f'predictor/{name}'] = value
+
+    if args.api_url:
+        print(f"[>] Навантаження {args.api_url}/predict")
+        for name, value in bench_api(args.api_url, args.window_size, args.concurrency, args.duration).items():
+            results[f'api/{name}'] = value
+
+    report = {'environment': environment_info(), 'params': vars(args), 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[✓] Результати збережено в {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\n[!] Виявлено регресії:")
+            for line in regressions:
+                print(f"    {line}")
+            sys.exit(1)
+        print("\n[✓] Регресій не виявлено")
+    else:
+        for name, value in sorted(results.items()):
+            print(f"{name:55s} {value['value']:12.4g} {value['unit']}")
+
+
+if __name__ == '__main__':
+    main()
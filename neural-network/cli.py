@@ -0,0 +1,162 @@
+"""
+Єдина точка входу для задач з даними, навчання і прогнозу.
+
+Важкі бібліотеки (TensorFlow, sklearn, matplotlib, python-binance) імпортуються
+лише всередині підкоманди, якій вони потрібні, тож `fetch` і `prepare` не
+чекають на ініціалізацію TF, а `--help` відповідає одразу. З --timing
+друкується час імпортів підкоманди і загальний час виконання.
+
+Приклади:
+    python cli.py fetch BTCUSDT --interval 1h --base-interval 1m --start 2025-05-01
+    python cli.py prepare --data-dir ./data
+    python cli.py sequences --window-sizes 30 60
+    python cli.py train --epochs 20 --window-size 1000
+    python cli.py search data/BTCUSDT_1.csv --cv-folds 3
+    python cli.py predict data/BTCUSDT_1h.csv --model models/model.keras
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+_imported_at = None
+
+
+def _mark_imported() -> None:
+    """Позначає кінець імпортів підкоманди (для --timing)."""
+    global _imported_at
+    _imported_at = time.perf_counter()
+
+
+def _use_data_fetcher() -> None:
+    # Модулі data_fetcher імпортують один одного без пакета
+    path = os.path.join(HERE, 'data_fetcher')
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def run_fetch(args) -> None:
+    _use_data_fetcher()
+    from crypto_data_fetcher import CryptoDataFetcher
+    _mark_imported()
+
+    fetcher = CryptoDataFetcher(os.environ.get('BINANCE_API_KEY'), os.environ.get('BINANCE_API_SECRET'))
+    if args.base_interval:
+        df = fetcher.get_resampled_klines(args.symbol, args.interval, args.base_interval, args.start, args.end)
+    else:
+        df = fetcher.get_historical_klines(args.symbol, args.interval, args.start, args.end)
+    fetcher.save_data(df, args.symbol, args.interval, args.output_dir)
+    print(f"[✓] {args.symbol} {args.interval}: {len(df)} свічок")
+
+
+def run_prepare(args) -> None:
+    from prepare_data import prepare_data
+    _mark_imported()
+
+    kwargs = {'data_dir': args.data_dir, 'file_prefix': args.file_prefix}
+    if args.indicators is not None:
+        kwargs['indicators'] = args.indicators
+    prepare_data(**kwargs)
+
+
+def run_sequences(args) -> None:
+    from sequence_processor import process_all_sequence_files
+    _mark_imported()
+
+    process_all_sequence_files(args.data_dir, args.window_sizes)
+
+
+def run_train(args) -> None:
+    import index
+    _mark_imported()
+
+    index.main(
+        data_dir=args.data_dir,
+        file_prefix=args.file_prefix,
+        model_path=args.model_path,
+        epochs=args.epochs,
+        window_size=args.window_size,
+        batch_size=args.batch_size
+    )
+
+
+def run_search(args) -> None:
+    from find_optimal_params import experiment_with_parameters
+    _mark_imported()
+
+    experiment_with_parameters(
+        args.data_path, cv_folds=args.cv_folds, results_dir=args.results_dir, horizon=args.horizon
+    )
+
+
+def run_predict(args) -> None:
+    _use_data_fetcher()
+    from predict import main as predict_main
+    _mark_imported()
+
+    predict_main(args.data_file, args.model)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # Значення за замовчуванням дублюють константи модулів, щоб не імпортувати їх заради --help
+    parser = argparse.ArgumentParser(description='Дані, навчання і прогноз LSTM-моделі')
+    parser.add_argument('--timing', action='store_true', help='Час імпортів підкоманди і загальний час')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fetch = commands.add_parser('fetch', help='Завантаження свічок з Binance')
+    fetch.add_argument('symbol')
+    fetch.add_argument('--interval', default='1h')
+    fetch.add_argument('--base-interval', default=None, help='Завантажити цей інтервал і агрегувати локально')
+    fetch.add_argument('--start', default=None, help='YYYY-MM-DD (за замовчуванням - 30 днів тому)')
+    fetch.add_argument('--end', default=None)
+    fetch.add_argument('--output-dir', default='data')
+    fetch.set_defaults(run=run_fetch)
+
+    prepare = commands.add_parser('prepare', help='Заголовки, мітки та індикатори в CSV (prepare_data.py)')
+    prepare.add_argument('--data-dir', default='./data')
+    prepare.add_argument('--file-prefix', default='')
+    prepare.add_argument('--indicators', nargs='*', default=None)
+    prepare.set_defaults(run=run_prepare)
+
+    sequences = commands.add_parser('sequences', help='Генерація послідовностей для всіх CSV')
+    sequences.add_argument('--data-dir', default='./data')
+    sequences.add_argument('--window-sizes', type=int, nargs='+', default=[30])
+    sequences.set_defaults(run=run_sequences)
+
+    train = commands.add_parser('train', help='Навчання/донавчання на всіх файлах (index.py)')
+    train.add_argument('--data-dir', default='./data')
+    train.add_argument('--file-prefix', default='_1.csv')
+    train.add_argument('--model-path', default='./models')
+    train.add_argument('--epochs', type=int, default=20)
+    train.add_argument('--window-size', type=int, default=1000)
+    train.add_argument('--batch-size', type=int, default=32)
+    train.set_defaults(run=run_train)
+
+    search = commands.add_parser('search', help='Пошук гіперпараметрів (find_optimal_params.py)')
+    search.add_argument('data_path')
+    search.add_argument('--cv-folds', type=int, default=3)
+    search.add_argument('--results-dir', default=None)
+    search.add_argument('--horizon', type=int, default=60, help='Горизонт міток у свічках (і відступ walk-forward)')
+    search.set_defaults(run=run_search)
+
+    predict = commands.add_parser('predict', help='Прогноз для CSV збереженою моделлю')
+    predict.add_argument('data_file')
+    predict.add_argument('--model', default='models/model.keras')
+    predict.set_defaults(run=run_predict)
+    return parser
+
+
+def main(argv=None) -> None:
+    start = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    try:
+        args.run(args)
+    finally:
+        if args.timing:
+            imports = f"{_imported_at - start:.2f} с" if _imported_at is not None else "-"
+            print(f"[>] {args.command}: імпорти {imports}, усього {time.perf_counter() - start:.2f} с")
+
+
+if __name__ == '__main__':
+    main()
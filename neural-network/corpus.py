@@ -0,0 +1,187 @@
+"""
+Мультисимвольний корпус для навчання однієї моделі на всіх підготовлених файлах.
+
+Замість послідовного донавчання файл за файлом (модель "дрейфує" до
+останнього файлу) семпли всіх символів індексуються одним компактним
+масивом int64: (номер символу << 32) | зсув рядка. Матриці ознак кожного
+символу відкриваються через memmap (load_base_matrix(mmap=True)), а вікна
+вирізаються лише для поточного батчу, тож пам'ять обмежена розміром батчу.
+"""
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from features import DEFAULT_FEATURES
+from labels import DEFAULT_HORIZON
+from sequence_processor import load_base_matrix
+
+_OFFSET_BITS = 32
+_OFFSET_MASK = (1 << _OFFSET_BITS) - 1
+
+
+def symbol_from_path(data_path: str) -> str:
+    """Символ з імені файлу до першого '_' (BTCUSDT_1.csv -> BTCUSDT)."""
+    return os.path.basename(data_path).split('_')[0]
+
+
+def encode_samples(symbol: int, offsets: np.ndarray) -> np.ndarray:
+    return (np.int64(symbol) << _OFFSET_BITS) | offsets.astype(np.int64)
+
+
+def decode_samples(keys: np.ndarray) -> tuple:
+    """
+    Returns:
+        tuple: (symbols, offsets) - номери символів і індекси цільових рядків
+    """
+    return keys >> _OFFSET_BITS, keys & _OFFSET_MASK
+
+
+class SymbolCorpus:
+    """
+    Індекс семплів (символ, зсув) по всіх файлах і збалансовані батчі з них.
+
+    Семпл (s, i) - вікно рядків [i - window_size, i) матриці символу s і ціль
+    у рядку i. Для кожного символу останні test_size семплів ідуть у тест,
+    як у split_sample_ranges.
+    """
+
+    def __init__(
+        self,
+        data_paths: list,
+        window_size: int,
+        feature_names: tuple = DEFAULT_FEATURES,
+        test_size: float = 0.2,
+        seed: int = None,
+        horizon: int = DEFAULT_HORIZON
+    ):
+        """
+        Args:
+            data_paths (list): Шляхи до підготовлених CSV файлів
+            window_size (int): Розмір вікна
+            feature_names (tuple): Набір ознак
+            test_size (float): Частка тестових семплів кожного символу
+            seed (int): Зерно для перемішування
+            horizon (int): Горизонт міток (labels.py)
+        """
+        self.data_paths = list(data_paths)
+        self.window_size = window_size
+        self.feature_names = tuple(feature_names)
+        self.n_features = len(self.feature_names)
+        self.horizon = horizon
+        self.rng = np.random.default_rng(seed)
+        self._window_offsets = np.arange(-window_size, 0, dtype=np.int64)
+
+        self.symbols = []
+        self.features = []
+        self.targets = []
+        train_keys, test_keys = [], []
+        for data_path in self.data_paths:
+            features, targets, _ = load_base_matrix(data_path, self.feature_names, mmap=True, horizon=horizon)
+            n_samples = len(features) - window_size
+            if n_samples < 2:
+                print(f"[!] Пропускаємо {data_path}: {len(features)} рядків для вікна {window_size}")
+                continue
+            if len(features) > _OFFSET_MASK:
+                raise ValueError(f"Забагато рядків у {data_path}: {len(features)}")
+
+            symbol = len(self.symbols)
+            self.symbols.append(symbol_from_path(data_path))
+            self.features.append(features)
+            self.targets.append(targets)
+
+            n_train = n_samples - int(np.ceil(test_size * n_samples))
+            train_keys.append(encode_samples(symbol, np.arange(window_size, window_size + n_train)))
+            test_keys.append(encode_samples(symbol, np.arange(window_size + n_train, len(features))))
+
+        if not self.symbols:
+            raise ValueError("Корпус порожній: немає файлів з достатньою кількістю даних")
+
+        # Ключі кожного символу - суцільний відрізок; train_bounds[s]:train_bounds[s + 1]
+        self.train_index = np.concatenate(train_keys)
+        self.test_index = np.concatenate(test_keys)
+        self.train_bounds = np.cumsum([0] + [len(k) for k in train_keys])
+        print(f"[✓] Корпус: {len(self.symbols)} символів, {len(self.train_index)} навчальних, "
+              f"{len(self.test_index)} тестових семплів")
+
+    def balanced_epoch(self, samples_per_symbol: int = None) -> np.ndarray:
+        """
+        Перемішані ключі на одну епоху: однакова кількість семплів від кожного символу.
+
+        Символи з меншою кількістю семплів повторюються, з більшою - підвибираються.
+
+        Args:
+            samples_per_symbol (int): Семплів на символ (за замовчуванням медіана по символах)
+
+        Returns:
+            np.ndarray: Ключі семплів int64
+        """
+        counts = np.diff(self.train_bounds)
+        samples_per_symbol = samples_per_symbol or self.default_samples_per_symbol()
+        picks = [
+            start + self.rng.choice(count, samples_per_symbol, replace=count < samples_per_symbol)
+            for start, count in zip(self.train_bounds[:-1], counts)
+        ]
+        keys = self.train_index[np.concatenate(picks)]
+        self.rng.shuffle(keys)
+        return keys
+
+    def default_samples_per_symbol(self) -> int:
+        """Медіана кількості навчальних семплів по символах."""
+        return int(np.median(np.diff(self.train_bounds)))
+
+    def gather(self, keys: np.ndarray) -> tuple:
+        """
+        Вирізає вікна і цілі для набору ключів з memmap-матриць символів.
+
+        Args:
+            keys (np.ndarray): Ключі семплів
+
+        Returns:
+            tuple: (X, y) - X форми (len(keys), window_size, n_features) float32
+        """
+        symbols, offsets = decode_samples(keys)
+        X = np.empty((len(keys), self.window_size, self.n_features), dtype=np.float32)
+        y = np.empty(len(keys), dtype=np.int8)
+        for symbol in np.unique(symbols):
+            mask = symbols == symbol
+            ends = offsets[mask]
+            X[mask] = self.features[symbol][ends[:, np.newaxis] + self._window_offsets]
+            y[mask] = self.targets[symbol][ends]
+        return X, y
+
+    def dataset(self, split: str = 'train', batch_size: int = 32, samples_per_symbol: int = None) -> tf.data.Dataset:
+        """
+        tf.data конвеєр батчів корпусу.
+
+        Навчальний конвеєр на кожну епоху бере нову збалансовану вибірку;
+        тестовий проходить усі тестові семпли по порядку.
+
+        Args:
+            split (str): 'train' або 'test'
+            batch_size (int): Розмір батчу
+            samples_per_symbol (int): Семплів на символ за епоху (лише для train)
+
+        Returns:
+            tf.data.Dataset: Батчі (X, y)
+        """
+        if split not in ('train', 'test'):
+            raise ValueError(f"Невідома частина корпусу: {split}")
+
+        def batches():
+            keys = self.balanced_epoch(samples_per_symbol) if split == 'train' else self.test_index
+            for start in range(0, len(keys), batch_size):
+                yield self.gather(keys[start:start + batch_size])
+
+        if split == 'train':
+            n_samples = (samples_per_symbol or self.default_samples_per_symbol()) * len(self.symbols)
+        else:
+            n_samples = len(self.test_index)
+        signature = (
+            tf.TensorSpec(shape=(None, self.window_size, self.n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.int8),
+        )
+        dataset = tf.data.Dataset.from_generator(batches, output_signature=signature)
+        # Відома кількість батчів: Keras показує прогрес епохи і не чекає кінця генератора
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(-(-n_samples // batch_size)))
+        return dataset.prefetch(tf.data.AUTOTUNE)
@@ -5,6 +5,11 @@ from datetime import datetime, timedelta
 import os
 from typing import Optional, Tuple
 import time
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dtype_policy import CSV_DTYPES, PRICE_COLUMNS, SOURCE_PRICE_DTYPE, TIMESTAMP_DTYPE
+from resampler import resample
 
 class CryptoDataFetcher:
     def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None):
@@ -53,27 +58,46 @@ class CryptoDataFetcher:
             limit=limit
         )
         
-        # Створення DataFrame
-        df = pd.DataFrame(klines, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'number_of_trades',
-            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-        ])
-        
-        # Конвертація timestamp з мілісекунд в секунди
-        df['timestamp'] = df['timestamp'].astype(int) // 1000
-        
-        # Конвертація типів даних
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = df[col].astype(float)
-            
+        # Створення DataFrame лише з потрібних полів свічки, одразу в типах dtype_policy
+        # (ціни - з повною точністю, SOURCE_PRICE_DTYPE):
+        # [0] час відкриття (мс), [1..5] OHLCV рядками, [8] кількість угод
+        columns = {
+            # Конвертація timestamp з мілісекунд в секунди
+            'timestamp': np.fromiter((k[0] for k in klines), dtype=TIMESTAMP_DTYPE, count=len(klines)) // 1000,
+        }
+        for index, col in enumerate(PRICE_COLUMNS, start=1):
+            columns[col] = np.array([k[index] for k in klines], dtype=SOURCE_PRICE_DTYPE)
         # Додавання колонки trades (використовуємо number_of_trades)
-        df['trades'] = df['number_of_trades'].astype(int)
-        
-        # Вибір потрібних колонок у правильному порядку
-        df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume', 'trades']]
+        columns['trades'] = np.fromiter((k[8] for k in klines), dtype=CSV_DTYPES['trades'], count=len(klines))
         
-        return df
+        return pd.DataFrame(columns)
+    
+    def get_resampled_klines(
+        self,
+        symbol: str,
+        interval: str = '1h',
+        base_interval: str = '1m',
+        start_str: Optional[str] = None,
+        end_str: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Свічки старшого інтервалу, агреговані локально з базового (див. resampler.py).
+
+        Дозволяє завантажувати лише один інтервал і отримувати з нього решту
+        узгодженими між собою.
+
+        Args:
+            symbol (str): Символ криптовалюти (наприклад, 'BTCUSDT')
+            interval (str): Цільовий інтервал ('1h', '4h', '1d', тощо)
+            base_interval (str): Інтервал, який завантажується з біржі
+            start_str (str, optional): Початкова дата у форматі 'YYYY-MM-DD'
+            end_str (str, optional): Кінцева дата у форматі 'YYYY-MM-DD'
+
+        Returns:
+            pd.DataFrame: DataFrame у тому самому форматі, що й get_historical_klines
+        """
+        df = self.get_historical_klines(symbol, base_interval, start_str, end_str)
+        return resample(df, base_interval, interval)
     
     def save_data(self, df: pd.DataFrame, symbol: str, interval: str, output_dir: str = 'data') -> str:
         """
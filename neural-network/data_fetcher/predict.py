@@ -2,7 +2,13 @@ import pandas as pd
 import numpy as np
 from tensorflow import keras
 from sklearn.preprocessing import MinMaxScaler
+from numpy.lib.stride_tricks import sliding_window_view
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from features import BASE_FEATURES, compute_features, feature_warmup, load_feature_names
+from stateful import StatefulLSTM
 
 class CryptoPredictor:
     def __init__(self, model_path: str = 'models/model.keras'):
@@ -18,6 +24,8 @@ class CryptoPredictor:
         self.model = keras.models.load_model(model_path)
         self.scaler = MinMaxScaler()
         self.window_size = 120  # Розмір вікна для прогнозування
+        self.feature_names = load_feature_names(os.path.dirname(model_path))
+        self.warmup = feature_warmup(self.feature_names)
         
     def prepare_data(self, df: pd.DataFrame) -> np.ndarray:
         """
@@ -29,37 +37,44 @@ class CryptoPredictor:
         Returns:
             np.ndarray: Підготовлені дані для моделі
         """
-        # Вибір потрібних колонок
-        feature_cols = ['open', 'high', 'low', 'close', 'volume']
+        # Ознаки моделі (рядки прогріву індикаторів відкидаються)
+        features = compute_features(df[list(BASE_FEATURES)].to_numpy(dtype=np.float64), self.feature_names)
         
         # Нормалізація даних
-        scaled_data = self.scaler.fit_transform(df[feature_cols])
+        scaled_data = self.scaler.fit_transform(features[self.warmup:])
         
-        # Створення послідовностей
-        X = []
-        for i in range(self.window_size, len(scaled_data)):
-            X.append(scaled_data[i - self.window_size:i])
-            
-        return np.array(X)
+        # Створення послідовностей: вікно [i - window_size, i) для кожного i >= window_size
+        windows = sliding_window_view(scaled_data, self.window_size, axis=0)[:-1]
+        return np.ascontiguousarray(windows.transpose(0, 2, 1))
     
-    def predict(self, df: pd.DataFrame) -> tuple:
+    def predict(self, df: pd.DataFrame, stateful: bool = False, reseed_every: int = None) -> tuple:
         """
         Прогнозування на основі даних.
         
         Args:
             df (pd.DataFrame): DataFrame з даними
+            stateful (bool): Один крок LSTM на свічку зі збереженим станом
+                замість прокручування кожного вікна (див. stateful.py)
+            reseed_every (int): Кроків між перебудовами стану по вікну (stateful)
             
         Returns:
             tuple: (прогнози, ймовірності)
         """
-        # Підготовка даних
-        X = self.prepare_data(df)
-        
-        # Прогнозування
-        predictions = self.model.predict(X)
+        if stateful:
+            features = compute_features(df[list(BASE_FEATURES)].to_numpy(dtype=np.float64), self.feature_names)
+            scaled_data = self.scaler.fit_transform(features[self.warmup:])
+            lstm = StatefulLSTM.from_keras(self.model)
+            # Останнє вікно (до кінця даних) не має дати прогнозу, як і в prepare_data
+            predictions = lstm.predict_series(scaled_data, self.window_size, reseed_every)[:-1, np.newaxis]
+        else:
+            # Підготовка даних
+            X = self.prepare_data(df)
+            
+            # Прогнозування
+            predictions = self.model.predict(X)
         
         # Отримання останніх дат
-        dates = df['timestamp'].iloc[self.window_size:].values
+        dates = df['timestamp'].iloc[self.warmup + self.window_size:].values
         
         return dates, predictions
     
@@ -92,13 +107,12 @@ class CryptoPredictor:
         
         return results
 
-def main():
+def main(data_file: str = 'data/BTCUSDT_1h_20250531_220101.csv', model_path: str = 'models/model.keras'):
     try:
         # Створення предиктора
-        predictor = CryptoPredictor()
+        predictor = CryptoPredictor(model_path)
         
         # Завантаження даних
-        data_file = 'data/BTCUSDT_1h_20250531_220101.csv'  # Оновлений шлях до файлу
         if not os.path.exists(data_file):
             print(f"Файл {data_file} не знайдено!")
             return
@@ -0,0 +1,197 @@
+"""
+Локальне перетворення свічок базового інтервалу в старші інтервали.
+
+Замість окремого завантаження кожного інтервалу ('1m', '1h', ...) старші
+свічки агрегуються з уже наявних хвилинних векторизовано (np.*.reduceat по
+відсортованих групах). Пропущені свічки базового інтервалу заповнюються
+пласкими свічками з нульовим обсягом, тож групи завжди повні і інтервали
+узгоджені між собою. Результат пишеться в той самий формат CSV, що й у
+CryptoDataFetcher, і дописується інкрементно.
+
+Приклад:
+    python resampler.py data/BTCUSDT_1m.csv 1h 4h
+"""
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dtype_policy import CSV_DTYPES, PRICE_COLUMNS, SOURCE_CSV_DTYPES, SOURCE_PRICE_DTYPE, TIMESTAMP_DTYPE
+
+CANDLE_COLUMNS = ['timestamp', *PRICE_COLUMNS, 'trades']
+
+_INTERVAL_PATTERN = re.compile(r'^(\d+)([mhdw])$')
+_UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+# Тижневі свічки Binance починаються в понеділок; 1970-01-01 - четвер
+_WEEK_ORIGIN = 4 * 86400
+
+
+def interval_seconds(interval: str) -> int:
+    """
+    Тривалість інтервалу в секундах ('1m', '15m', '1h', '4h', '1d', '1w').
+
+    Raises:
+        ValueError: Невідомий формат (місячні інтервали не підтримуються)
+    """
+    match = _INTERVAL_PATTERN.match(interval)
+    if not match:
+        raise ValueError(f"Непідтримуваний інтервал: {interval}")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+def _bucket_starts(timestamps: np.ndarray, interval: str) -> np.ndarray:
+    step = interval_seconds(interval)
+    origin = _WEEK_ORIGIN if interval.endswith('w') else 0
+    return (timestamps - origin) // step * step + origin
+
+
+def fill_gaps(df: pd.DataFrame, interval: str) -> tuple:
+    """
+    Заповнює пропущені свічки на сітці інтервалу.
+
+    Пропущена свічка - пласка (open = high = low = close = попередній close)
+    з нульовими volume і trades. Дублікати timestamp прибираються (лишається
+    останній запис).
+
+    Args:
+        df (pd.DataFrame): Свічки з колонками CANDLE_COLUMNS
+        interval (str): Інтервал свічок
+
+    Returns:
+        tuple: (df, n_filled) - свічки на суцільній сітці та кількість доданих
+    """
+    step = interval_seconds(interval)
+    df = df.drop_duplicates('timestamp', keep='last').sort_values('timestamp', kind='stable')
+    timestamps = df['timestamp'].to_numpy(dtype=TIMESTAMP_DTYPE)
+    if len(timestamps) == 0:
+        return df.reset_index(drop=True), 0
+    if np.any((timestamps - timestamps[0]) % step):
+        raise ValueError(f"Часові мітки не лежать на сітці інтервалу {interval}")
+
+    grid_size = int((timestamps[-1] - timestamps[0]) // step) + 1
+    n_filled = grid_size - len(timestamps)
+    if n_filled == 0:
+        return df.reset_index(drop=True), 0
+
+    positions = (timestamps - timestamps[0]) // step
+    present = np.zeros(grid_size, dtype=bool)
+    present[positions] = True
+    # Для кожної позиції сітки - індекс останньої наявної свічки не пізніше неї
+    source = np.cumsum(present) - 1
+
+    close = df['close'].to_numpy(dtype=SOURCE_PRICE_DTYPE)
+    columns = {'timestamp': timestamps[0] + step * np.arange(grid_size, dtype=TIMESTAMP_DTYPE)}
+    for column in ('open', 'high', 'low', 'close'):
+        filled = close[source]
+        filled[positions] = df[column].to_numpy(dtype=SOURCE_PRICE_DTYPE)
+        columns[column] = filled
+    for column, dtype in (('volume', SOURCE_PRICE_DTYPE), ('trades', CSV_DTYPES['trades'])):
+        if column in df.columns:
+            filled = np.zeros(grid_size, dtype=dtype)
+            filled[positions] = df[column].to_numpy(dtype=dtype)
+            columns[column] = filled
+    return pd.DataFrame(columns), n_filled
+
+
+def resample(df: pd.DataFrame, base_interval: str, interval: str, complete_only: bool = True) -> pd.DataFrame:
+    """
+    Агрегує свічки базового інтервалу в старший інтервал.
+
+    Args:
+        df (pd.DataFrame): Свічки базового інтервалу (CANDLE_COLUMNS)
+        base_interval (str): Базовий інтервал, наприклад '1m'
+        interval (str): Цільовий інтервал, кратний базовому, наприклад '1h'
+        complete_only (bool): Відкидати неповні крайові свічки (дані почались
+            посеред інтервалу або інтервал ще не закрився)
+
+    Returns:
+        pd.DataFrame: Свічки цільового інтервалу в тому самому форматі
+    """
+    base_step, step = interval_seconds(base_interval), interval_seconds(interval)
+    if step % base_step or step < base_step:
+        raise ValueError(f"Інтервал {interval} не кратний базовому {base_interval}")
+
+    df, n_filled = fill_gaps(df, base_interval)
+    if n_filled:
+        print(f"[!] Заповнено {n_filled} пропущених свічок {base_interval}")
+    if df.empty:
+        return df
+
+    buckets = _bucket_starts(df['timestamp'].to_numpy(dtype=TIMESTAMP_DTYPE), interval)
+    # Дані відсортовані, тож група - суцільний відрізок; starts - її перші рядки
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)]
+
+    columns = {
+        'timestamp': buckets[starts],
+        'open': df['open'].to_numpy(dtype=SOURCE_PRICE_DTYPE)[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=SOURCE_PRICE_DTYPE), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=SOURCE_PRICE_DTYPE), starts),
+        'close': df['close'].to_numpy(dtype=SOURCE_PRICE_DTYPE)[ends - 1],
+        'volume': np.add.reduceat(df['volume'].to_numpy(dtype=SOURCE_PRICE_DTYPE), starts),
+    }
+    if 'trades' in df.columns:
+        columns['trades'] = np.add.reduceat(df['trades'].to_numpy(dtype=CSV_DTYPES['trades']), starts)
+    result = pd.DataFrame(columns)
+
+    if complete_only:
+        result = result[(ends - starts) == step // base_step].reset_index(drop=True)
+    return result
+
+
+def resampled_path(base_path: str, interval: str) -> str:
+    """Шлях до файлу старшого інтервалу поруч з базовим: SYMBOL_<interval>.csv."""
+    symbol = os.path.basename(base_path).split('_')[0]
+    return os.path.join(os.path.dirname(base_path), f"{symbol}_{interval}.csv")
+
+
+def resample_file(base_path: str, interval: str, base_interval: str = '1m', output_path: str = None) -> str:
+    """
+    Оновлює CSV старшого інтервалу з CSV базового інтервалу.
+
+    Якщо вихідний файл уже є, агрегуються лише базові свічки після останньої
+    записаної і нові повні свічки дописуються в кінець файлу.
+
+    Args:
+        base_path (str): CSV базового інтервалу
+        interval (str): Цільовий інтервал
+        base_interval (str): Базовий інтервал
+        output_path (str): Вихідний CSV (за замовчуванням resampled_path)
+
+    Returns:
+        str: Шлях до вихідного файлу
+    """
+    output_path = output_path or resampled_path(base_path, interval)
+    base = pd.read_csv(base_path, dtype=SOURCE_CSV_DTYPES, usecols=lambda column: column in CANDLE_COLUMNS)
+
+    append = os.path.exists(output_path) and os.path.getsize(output_path) > 0
+    if append:
+        written = pd.read_csv(output_path, usecols=['timestamp'], dtype={'timestamp': TIMESTAMP_DTYPE})['timestamp']
+        if len(written):
+            # Остання записана свічка повна - агрегуємо лише наступні інтервали.
+            # Плюс одна попередня базова свічка: від неї заповнюється пропуск на межі
+            # (її власна група неповна і відкидається)
+            next_start = int(written.iloc[-1]) + interval_seconds(interval)
+            base = base[base['timestamp'] >= next_start - interval_seconds(base_interval)]
+
+    result = resample(base, base_interval, interval)
+    if result.empty:
+        print(f"[✓] {output_path}: нових повних свічок {interval} немає")
+        return output_path
+    result.to_csv(output_path, mode='a' if append else 'w', header=not append, index=False)
+    print(f"[✓] {output_path}: {'дописано' if append else 'записано'} {len(result)} свічок {interval}")
+    return output_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Агрегація свічок у старші інтервали')
+    parser.add_argument('base_path', help='CSV базового інтервалу')
+    parser.add_argument('intervals', nargs='+', help='Цільові інтервали, наприклад 1h 4h 1d')
+    parser.add_argument('--base-interval', default='1m')
+    args = parser.parse_args()
+    for target in args.intervals:
+        resample_file(args.base_path, target, args.base_interval)
@@ -0,0 +1,222 @@
+"""
+Дистиляція навченої LSTM-моделі (вчитель) у компактну модель-учня для сервінгу.
+
+Учень навчається на ймовірностях вчителя, змішаних зі справжніми мітками
+(alpha * p_teacher + (1 - alpha) * y), над тими самими кешами базової
+матриці, що й train_model. Доступні учні:
+
+    tcn - причинні розширені Conv1D (рецептивне поле покриває вікно),
+          усі кроки вікна обробляються паралельно
+    gru - вузький GRU
+
+Після навчання друкується зміна точності на тестовій частині та прискорення
+інференсу одного вікна на CPU. Учень зберігається як model.keras +
+features.json, тож CryptoPredictor завантажує його так само, як вчителя
+(MODEL_PATH=.../student/model.keras); stateful-режим для нього вимикається.
+
+Приклад:
+    python distill.py data/BTCUSDT_1.csv --kind tcn --output ./models/student
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.layers import GRU, Conv1D, Cropping1D, Dense, Flatten, Input
+from tensorflow.keras.models import Sequential
+
+from features import load_feature_names, save_feature_names
+from labels import DEFAULT_HORIZON
+from model_trainer import build_window_dataset, configure_tensorflow, load_saved_model, split_sample_ranges
+from sequence_processor import load_base_matrix
+from training_budget import TrainingBudget
+
+STUDENT_KINDS = ('tcn', 'gru')
+REPORT_FILE = 'distill_report.json'
+
+
+def build_student(input_shape: tuple, kind: str = 'tcn', width: int = 32):
+    """
+    Створює модель-учня.
+
+    Args:
+        input_shape (tuple): (window_size, n_features)
+        kind (str): 'tcn' або 'gru'
+        width (int): Кількість фільтрів Conv1D / нейронів GRU
+
+    Returns:
+        Скомпільована Keras-модель з виходом sigmoid
+    """
+    window_size = input_shape[0]
+    if kind == 'tcn':
+        # Розширення 1, 2, 4, ... поки рецептивне поле не покриє вікно
+        layers = [Input(shape=input_shape)]
+        dilation, receptive_field = 1, 1
+        while receptive_field < window_size:
+            layers.append(Conv1D(width, 3, padding='causal', dilation_rate=dilation, activation='relu'))
+            receptive_field += 2 * dilation
+            dilation *= 2
+        # Останній крок уже "бачить" усе вікно
+        layers += [Cropping1D((window_size - 1, 0)), Flatten(), Dense(1, activation='sigmoid')]
+    elif kind == 'gru':
+        layers = [Input(shape=input_shape), GRU(width), Dense(1, activation='sigmoid')]
+    else:
+        raise ValueError(f"Невідомий тип учня: {kind}; доступні: {', '.join(STUDENT_KINDS)}")
+
+    model = Sequential(layers)
+    # Мітки м'які, тож accuracy під час навчання не має сенсу - точність рахується окремо
+    model.compile(optimizer='adam', loss='binary_crossentropy')
+    return model
+
+
+def _inputs(dataset: tf.data.Dataset) -> tf.data.Dataset:
+    return dataset.map(lambda X, y: X)
+
+
+def binary_accuracy(model, dataset: tf.data.Dataset, targets: np.ndarray) -> float:
+    """Точність за порогом 0.5 на батчах dataset (без перемішування) проти міток targets."""
+    probs = model.predict(_inputs(dataset), verbose=0)[:, 0]
+    return float(np.mean((probs > 0.5) == (targets > 0.5)))
+
+
+def soft_targets(teacher, features, targets, window_size, train_range, batch_size, alpha) -> np.ndarray:
+    """
+    Цілі для учня: суміш ймовірностей вчителя і міток на навчальних семплах.
+
+    Returns:
+        np.ndarray: Масив float32 довжини targets (поза train_range - справжні мітки)
+    """
+    dataset = build_window_dataset(features, targets, window_size, train_range, batch_size)
+    probs = teacher.predict(_inputs(dataset), verbose=0)[:, 0]
+    mixed = targets.astype(np.float32)
+    start, stop = train_range
+    mixed[start:stop] = alpha * probs + (1 - alpha) * mixed[start:stop]
+    return mixed
+
+
+def measure_latency(model, input_shape: tuple, repeats: int = 200, warmup: int = 20) -> float:
+    """
+    Медіанна затримка прямого проходу одного вікна на CPU, мс (як у CryptoPredictor).
+    """
+    X = np.random.default_rng(0).random((1, *input_shape), dtype=np.float32)
+    # configure_tensorflow примусово вмикає eager для tf.function; сервіс працює без цього
+    run_eagerly = tf.config.functions_run_eagerly()
+    tf.config.run_functions_eagerly(False)
+    try:
+        with tf.device('/CPU:0'):
+            for _ in range(warmup):
+                model(X, training=False)
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                model(X, training=False)
+                times.append(time.perf_counter() - start)
+    finally:
+        tf.config.run_functions_eagerly(run_eagerly)
+    return float(np.median(times) * 1000)
+
+
+def distill(
+    data_path: str,
+    teacher_path: str = './models/model.keras',
+    output_path: str = './models/student',
+    kind: str = 'tcn',
+    width: int = 32,
+    epochs: int = 20,
+    batch_size: int = 256,
+    alpha: float = 0.7,
+    test_size: float = 0.2,
+    horizon: int = DEFAULT_HORIZON,
+    budget: TrainingBudget = None
+) -> dict:
+    """
+    Навчає учня на ймовірностях вчителя, порівнює їх і експортує учня.
+
+    Args:
+        data_path (str): Шлях до CSV файлу з даними (використовується кеш базової матриці)
+        teacher_path (str): Шлях до model.keras вчителя
+        output_path (str): Директорія для model.keras і features.json учня
+        kind (str): Тип учня: 'tcn' або 'gru'
+        width (int): Ширина учня (фільтри/нейрони)
+        epochs (int): Максимальна кількість епох
+        batch_size (int): Розмір батчу
+        alpha (float): Вага ймовірностей вчителя в цілях (0 - лише мітки)
+        test_size (float): Частка тестових семплів (той самий спліт, що в train_model)
+        horizon (int): Горизонт міток
+        budget (TrainingBudget): Бюджет навчання (за замовчуванням - зупинка за val_loss)
+
+    Returns:
+        dict: Звіт: точність вчителя й учня, різниця, затримки, прискорення, параметри
+    """
+    configure_tensorflow()
+    teacher = load_saved_model(teacher_path)
+    feature_names = load_feature_names(os.path.dirname(teacher_path))
+    input_shape = tuple(teacher.input_shape[1:])
+    window_size = input_shape[0]
+
+    features, targets, _ = load_base_matrix(data_path, feature_names, horizon=horizon)
+    train_range, test_range = split_sample_ranges(len(features), window_size, test_size)
+    test_targets = targets[test_range[0]:test_range[1]]
+    test_dataset = build_window_dataset(features, targets, window_size, test_range, batch_size)
+
+    print(f"[>] Ймовірності вчителя для {train_range[1] - train_range[0]} навчальних семплів...")
+    mixed = soft_targets(teacher, features, targets, window_size, train_range, batch_size, alpha)
+    train_dataset = build_window_dataset(features, mixed, window_size, train_range, batch_size, shuffle_buffer=10000)
+
+    student = build_student(input_shape, kind, width)
+    print(f"[>] Учень {kind}: {student.count_params()} параметрів (вчитель: {teacher.count_params()})")
+    budget = budget or TrainingBudget(monitor='val_loss', patience=3, min_delta=1e-4)
+    student.fit(train_dataset, epochs=epochs, validation_data=test_dataset, callbacks=[budget], shuffle=False, verbose=1)
+
+    report = {
+        'kind': kind,
+        'teacher_params': int(teacher.count_params()),
+        'student_params': int(student.count_params()),
+        'teacher_accuracy': binary_accuracy(teacher, test_dataset, test_targets),
+        'student_accuracy': binary_accuracy(student, test_dataset, test_targets),
+        'teacher_latency_ms': measure_latency(teacher, input_shape),
+        'student_latency_ms': measure_latency(student, input_shape),
+        'epochs_run': budget.epochs_run,
+    }
+    report['accuracy_delta'] = report['student_accuracy'] - report['teacher_accuracy']
+    report['speedup'] = report['teacher_latency_ms'] / report['student_latency_ms']
+
+    os.makedirs(output_path, exist_ok=True)
+    student.save(os.path.join(output_path, 'model.keras'))
+    save_feature_names(output_path, feature_names)
+    with open(os.path.join(output_path, REPORT_FILE), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"[✓] Точність: вчитель {report['teacher_accuracy']:.4f}, учень {report['student_accuracy']:.4f} "
+          f"({report['accuracy_delta']:+.4f})")
+    print(f"[✓] Затримка CPU: вчитель {report['teacher_latency_ms']:.2f} мс, учень {report['student_latency_ms']:.2f} мс "
+          f"(x{report['speedup']:.1f})")
+    print(f"[✓] Учня збережено в {output_path}")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Дистиляція LSTM-моделі в компактного учня')
+    parser.add_argument('data_path')
+    parser.add_argument('--teacher', default='./models/model.keras')
+    parser.add_argument('--output', default='./models/student')
+    parser.add_argument('--kind', choices=STUDENT_KINDS, default='tcn')
+    parser.add_argument('--width', type=int, default=32)
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--alpha', type=float, default=0.7)
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON)
+    args = parser.parse_args()
+    distill(
+        args.data_path,
+        teacher_path=args.teacher,
+        output_path=args.output,
+        kind=args.kind,
+        width=args.width,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        alpha=args.alpha,
+        horizon=args.horizon
+    )
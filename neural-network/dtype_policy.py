@@ -0,0 +1,125 @@
+"""
+Політика типів даних для всього конвеєра: від завантаження свічок до інференсу.
+
+    ознаки та ціни  - float32 (FEATURE_DTYPE)
+    цілі            - int8 (TARGET_DTYPE)
+    часові мітки    - int64 секунди (TIMESTAMP_DTYPE), одна колонка timestamp
+
+Вихідні CSV (завантажені, агреговані, підготовлені) зберігають ціни й
+обсяги з повною точністю (SOURCE_PRICE_DTYPE, float64) - з них рахуються
+мітки та індикатори, а перезапис файлу не втрачає знаків. float32 з'являється
+лише там, де дані потрапляють у кеші .npy/.npz і Keras: масиви на цих межах
+приводяться функціями as_features / as_targets / coerce_frame. У режимі
+перевірки (DTYPE_CHECK=1 або enable_validation()) кожна конверсія, що
+копіює дані з ширшого типу, друкується і потрапляє у звіт upcast_report():
+так видно, де конвеєр досі створює float64/int64 копії.
+"""
+import os
+
+import numpy as np
+
+FEATURE_DTYPE = np.dtype(np.float32)
+TARGET_DTYPE = np.dtype(np.int8)
+TIMESTAMP_DTYPE = np.dtype(np.int64)
+SOURCE_PRICE_DTYPE = np.dtype(np.float64)
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Типи колонок у пам'яті перед кешем/Keras; ознаки-індикатори - float32
+CSV_DTYPES = {
+    'timestamp': TIMESTAMP_DTYPE,
+    **{column: FEATURE_DTYPE for column in PRICE_COLUMNS},
+    'trades': np.dtype(np.int32),
+    'target': TARGET_DTYPE,
+}
+
+# Типи колонок вихідних CSV (для pd.read_csv(dtype=...) і запису): ціни з повною точністю
+SOURCE_CSV_DTYPES = dict(CSV_DTYPES, **{column: SOURCE_PRICE_DTYPE for column in PRICE_COLUMNS})
+
+_validation = os.environ.get('DTYPE_CHECK', '0') == '1'
+_upcasts = []
+
+
+def enable_validation(enabled: bool = True) -> None:
+    """Вмикає звіт про конверсії типів (те саме, що DTYPE_CHECK=1)."""
+    global _validation
+    _validation = enabled
+
+
+def _record(where: str, source: np.dtype, target: np.dtype, nbytes: int) -> None:
+    _upcasts.append((where, str(source), str(target), nbytes))
+    print(f"[!] dtype: {where}: {source} -> {target}, копія {nbytes / 1024 / 1024:.2f} МБ")
+
+
+def _coerce(array, dtype: np.dtype, where: str) -> np.ndarray:
+    # memmap та інші підкласи ndarray повертаються як є
+    if not isinstance(array, np.ndarray):
+        array = np.asarray(array)
+    if array.dtype == dtype:
+        return array
+    if _validation:
+        _record(where, array.dtype, dtype, array.nbytes)
+    return array.astype(dtype)
+
+
+def as_features(array, where: str = 'features') -> np.ndarray:
+    """
+    Приводить матрицю ознак до FEATURE_DTYPE (без копії, якщо тип уже правильний).
+
+    Args:
+        array: Масив або те, що приводиться до масиву
+        where (str): Місце в конвеєрі для звіту
+
+    Returns:
+        np.ndarray: Масив float32
+    """
+    return _coerce(array, FEATURE_DTYPE, where)
+
+
+def as_targets(array, where: str = 'targets') -> np.ndarray:
+    """Приводить цілі до TARGET_DTYPE (без копії, якщо тип уже правильний)."""
+    return _coerce(array, TARGET_DTYPE, where)
+
+
+def coerce_frame(df, where: str = 'frame', feature_columns=(), source: bool = False):
+    """
+    Приводить відомі колонки DataFrame (CSV_DTYPES) до типів політики на місці.
+
+    Args:
+        df (pd.DataFrame): Дані
+        where (str): Місце в конвеєрі для звіту
+        feature_columns: Додаткові колонки ознак (індикатори), що мають бути float32
+        source (bool): Дані вихідного CSV - ціни й індикатори лишаються float64 (SOURCE_CSV_DTYPES)
+
+    Returns:
+        pd.DataFrame: Той самий DataFrame
+    """
+    if source:
+        dtypes = dict(SOURCE_CSV_DTYPES, **{column: SOURCE_PRICE_DTYPE for column in feature_columns})
+    else:
+        dtypes = dict(CSV_DTYPES, **{column: FEATURE_DTYPE for column in feature_columns})
+    for column, dtype in dtypes.items():
+        if column in df.columns and df[column].dtype != dtype:
+            if _validation:
+                _record(f"{where}[{column}]", df[column].dtype, dtype, df[column].nbytes)
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def upcast_report(reset: bool = False) -> list:
+    """
+    Зведення конверсій, записаних у режимі перевірки.
+
+    Args:
+        reset (bool): Очистити записи після звіту
+
+    Returns:
+        list: [(where, from_dtype, to_dtype, nbytes), ...]
+    """
+    report = list(_upcasts)
+    if _validation:
+        total = sum(nbytes for *_, nbytes in report)
+        print(f"[>] dtype: конверсій {len(report)}, скопійовано {total / 1024 / 1024:.2f} МБ")
+    if reset:
+        _upcasts.clear()
+    return report
@@ -0,0 +1,246 @@
+"""
+Сховище результатів пошуку гіперпараметрів і генерація звіту.
+
+Результати пишуться в results.jsonl по одному рядку на завершене випробування,
+тож перерваний пошук можна продовжити (find_optimal_params пропускає вже
+пораховані комбінації), а часткові результати - переглядати одразу.
+
+Звіт будується окремо, на вимогу, і кожен графік рендериться в окремому
+процесі:
+    python experiment_results.py experiment_results_20250601_120000 --trial-plots
+"""
+import argparse
+import json
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+
+RESULTS_FILE = 'results.jsonl'
+PARAM_NAMES = ('epochs', 'window_size', 'batch_size', 'lstm_units')
+
+
+def _to_builtin(value):
+    """numpy-скаляри і масиви -> типи, які серіалізує json."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Неможливо серіалізувати {type(value).__name__}")
+
+
+def param_key(record: dict) -> tuple:
+    return tuple(int(record[name]) for name in PARAM_NAMES)
+
+
+class ResultsStore:
+    """
+    Append-only JSONL сховище результатів випробувань.
+
+    Пише лише один процес (головний), тож рядки не перемішуються; кожен
+    рядок скидається на диск одразу після запису.
+    """
+
+    def __init__(self, results_dir: str):
+        self.results_dir = results_dir
+        self.path = os.path.join(results_dir, RESULTS_FILE)
+        os.makedirs(results_dir, exist_ok=True)
+
+    def load(self) -> list:
+        """Усі записи; обірваний останній рядок (аварійне завершення) пропускається."""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"[!] Пропущено пошкоджений рядок у {self.path}")
+        return records
+
+    def completed(self) -> set:
+        """Ключі (epochs, window_size, batch_size, lstm_units) уже порахованих комбінацій."""
+        return {param_key(record) for record in self.load()}
+
+    def append(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=_to_builtin) + '\n'
+        with open(self.path, 'ab') as f:
+            # Обірваний попереднім аварійним завершенням рядок не повинен склеїтися з новим
+            if f.tell() > 0:
+                with open(self.path, 'rb') as tail:
+                    tail.seek(-1, os.SEEK_END)
+                    if tail.read(1) != b'\n':
+                        line = '\n' + line
+            f.write(line.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def to_frame(self, records: list = None) -> pd.DataFrame:
+        """Результати без історій навчання, відсортовані за best_val_accuracy."""
+        df = pd.DataFrame(self.load() if records is None else records)
+        if df.empty:
+            return df
+        df = df.drop(columns=['history'], errors='ignore')
+        return df.sort_values('best_val_accuracy', ascending=False).reset_index(drop=True)
+
+
+# === Звіт ===
+
+def _figure_surface(df, path, dpi):
+    import matplotlib.pyplot as plt
+
+    grouped = df.groupby(['window_size', 'lstm_units'])['best_val_accuracy'].mean().unstack()
+    X, Y = np.meshgrid(grouped.index.to_numpy(), grouped.columns.to_numpy())
+    fig = plt.figure(figsize=(12, 8))
+    ax = fig.add_subplot(111, projection='3d')
+    surf = ax.plot_surface(X, Y, grouped.to_numpy().T, cmap='viridis', edgecolor='none', alpha=0.8)
+    ax.set_xlabel('Window Size')
+    ax.set_ylabel('LSTM Units')
+    ax.set_zlabel('Validation Accuracy')
+    ax.set_title('3D Surface Plot of Validation Accuracy')
+    fig.colorbar(surf, ax=ax, shrink=0.5, aspect=5)
+    fig.savefig(path, bbox_inches='tight', dpi=dpi)
+    plt.close(fig)
+
+
+def _figure_heatmap(df, path, dpi):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    pivot_table = df.pivot_table(values='best_val_accuracy', index='batch_size', columns='epochs', aggfunc='mean')
+    fig, ax = plt.subplots(figsize=(12, 8))
+    sns.heatmap(pivot_table, annot=True, cmap='YlOrRd', fmt='.3f', ax=ax)
+    ax.set_title('Heatmap of Validation Accuracy by Batch Size and Epochs')
+    fig.savefig(path, bbox_inches='tight', dpi=dpi)
+    plt.close(fig)
+
+
+def _figure_boxplots(df, path, dpi):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    fig.suptitle('Distribution of Validation Accuracy by Parameter')
+    titles = {'window_size': 'Window Size', 'lstm_units': 'LSTM Units', 'batch_size': 'Batch Size', 'epochs': 'Epochs'}
+    for ax, (param, title) in zip(axes.flat, titles.items()):
+        sns.boxplot(x=param, y='best_val_accuracy', data=df, ax=ax)
+        ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(path, bbox_inches='tight', dpi=dpi)
+    plt.close(fig)
+
+
+def _figure_trends(df, path, dpi):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(15, 10))
+    for param in ['window_size', 'lstm_units', 'batch_size', 'epochs']:
+        grouped = df.groupby(param)['best_val_accuracy'].mean()
+        ax.plot(grouped.index, grouped.values, marker='o', label=param)
+    ax.set_xlabel('Parameter Value')
+    ax.set_ylabel('Mean Validation Accuracy')
+    ax.set_title('Trend of Validation Accuracy Across Parameters')
+    ax.legend()
+    ax.grid(True)
+    fig.savefig(path, bbox_inches='tight', dpi=dpi)
+    plt.close(fig)
+
+
+def _figure_trial(record, path, dpi):
+    import matplotlib.pyplot as plt
+
+    history = record['history']
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(history['accuracy'], label='Train Accuracy')
+    ax.plot(history['val_accuracy'], label='Validation Accuracy')
+    ax.set_title(f"Model Accuracy (epochs={record['epochs']}, window={record['window_size']}, "
+                 f"batch={record['batch_size']}, units={record['lstm_units']})")
+    ax.set_xlabel('Epoch')
+    ax.set_ylabel('Accuracy')
+    ax.legend()
+    ax.grid(True)
+    fig.savefig(path, dpi=dpi)
+    plt.close(fig)
+
+
+_FIGURES = {
+    '3d_surface.png': _figure_surface,
+    'heatmap.png': _figure_heatmap,
+    'boxplots.png': _figure_boxplots,
+    'trends.png': _figure_trends,
+}
+
+
+def _init_renderer() -> None:
+    import matplotlib
+    matplotlib.use('Agg')
+    import seaborn as sns
+    # plt.style.use('seaborn') видалено з matplotlib 3.6 - тема задається через seaborn
+    sns.set_theme(style='darkgrid', palette='husl')
+
+
+def _render(task) -> str:
+    function, data, path, dpi = task
+    function(data, path, dpi)
+    return path
+
+
+def render_report(
+    results_dir: str,
+    trial_plots: bool = False,
+    processes: int = None,
+    dpi: int = 150
+) -> list:
+    """
+    Будує графіки звіту з results.jsonl.
+
+    Args:
+        results_dir (str): Директорія експерименту
+        trial_plots (bool): Також графік навчання для кожного випробування
+        processes (int): Кількість процесів рендерингу (за замовчуванням - ядра CPU)
+        dpi (int): Роздільна здатність графіків
+
+    Returns:
+        list: Шляхи до створених файлів
+    """
+    store = ResultsStore(results_dir)
+    records = store.load()
+    if not records:
+        print(f"[!] Немає результатів у {store.path}")
+        return []
+
+    df = store.to_frame(records)
+    df.to_csv(os.path.join(results_dir, 'results.csv'), index=False)
+    tasks = [(function, df, os.path.join(results_dir, name), dpi) for name, function in _FIGURES.items()]
+    if trial_plots:
+        plots_dir = os.path.join(results_dir, 'trials')
+        os.makedirs(plots_dir, exist_ok=True)
+        for record in records:
+            if record.get('history'):
+                name = 'plot_e{}_w{}_b{}_u{}.png'.format(*param_key(record))
+                tasks.append((_figure_trial, record, os.path.join(plots_dir, name), dpi))
+
+    processes = min(len(tasks), processes or os.cpu_count() or 1)
+    print(f"[>] Рендеринг {len(tasks)} графіків, процесів: {processes}")
+    if processes == 1:
+        _init_renderer()
+        paths = [_render(task) for task in tasks]
+    else:
+        # spawn: воркерам не потрібен TF-рантайм батьківського процесу
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(processes, initializer=_init_renderer) as pool:
+            paths = list(pool.imap_unordered(_render, tasks, chunksize=max(1, len(tasks) // (4 * processes))))
+    print(f"[✓] Звіт збережено в {results_dir}")
+    return paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Звіт за результатами пошуку гіперпараметрів')
+    parser.add_argument('results_dir')
+    parser.add_argument('--trial-plots', action='store_true', help='Графік навчання для кожного випробування')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--dpi', type=int, default=150)
+    args = parser.parse_args()
+    render_report(args.results_dir, args.trial_plots, args.processes, args.dpi)
@@ -0,0 +1,363 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Базові ознаки - саме їх бачить поточна модель
+BASE_FEATURES = ('open', 'high', 'low', 'close', 'volume')
+DEFAULT_FEATURES = BASE_FEATURES
+
+# Індикатори: return, log_volume, sma_<n>, std_<n>, rsi_<n>, atr_<n>
+_SIMPLE_INDICATORS = ('return', 'log_volume')
+_WINDOW_INDICATORS = ('sma', 'std', 'rsi', 'atr')
+
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+# Файл зі списком ознак поруч із model.keras
+FEATURES_FILE = 'features.json'
+
+
+def parse_feature(name: str) -> tuple:
+    """
+    Розбирає назву ознаки на тип і період.
+
+    Args:
+        name (str): Наприклад 'close', 'return', 'rsi_14'
+
+    Returns:
+        tuple: (kind, period) - period дорівнює 0 для ознак без вікна
+    """
+    if name in BASE_FEATURES or name in _SIMPLE_INDICATORS:
+        return name, 0
+    kind, _, period = name.rpartition('_')
+    if kind in _WINDOW_INDICATORS and period.isdigit() and int(period) > 0:
+        return kind, int(period)
+    raise ValueError(f"Невідома ознака: {name}")
+
+
+def feature_warmup(feature_names) -> int:
+    """
+    Кількість перших рядків, для яких хоча б одна ознака ще не визначена (NaN).
+
+    Args:
+        feature_names: Список назв ознак
+
+    Returns:
+        int: Кількість рядків прогріву
+    """
+    warmup = 0
+    for name in feature_names:
+        kind, period = parse_feature(name)
+        if kind == 'return':
+            warmup = max(warmup, 1)
+        elif kind in ('sma', 'std', 'atr'):
+            warmup = max(warmup, period - 1)
+        elif kind == 'rsi':
+            warmup = max(warmup, period)
+    return warmup
+
+
+def rolling_sum(x: np.ndarray, n: int) -> np.ndarray:
+    """Ковзна сума за n елементів через кумулятивну суму, O(len(x)). Перші n-1 значень - NaN."""
+    out = np.full(len(x), np.nan)
+    if len(x) < n:
+        return out
+    cumsum = np.cumsum(x, dtype=np.float64)
+    out[n - 1] = cumsum[n - 1]
+    out[n:] = cumsum[n:] - cumsum[:-n]
+    return out
+
+
+def rolling_mean(x: np.ndarray, n: int) -> np.ndarray:
+    return rolling_sum(x, n) / n
+
+
+def rolling_std(x: np.ndarray, n: int) -> np.ndarray:
+    """Ковзне стандартне відхилення (ddof=0) через суми x та x², O(len(x))."""
+    # Зсув на середнє не змінює std, але зменшує втрату точності в сумі x²
+    x = np.asarray(x, dtype=np.float64)
+    x = x - np.nanmean(x) if len(x) else x
+    mean = rolling_mean(x, n)
+    variance = rolling_mean(x * x, n) - mean * mean
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def simple_returns(close: np.ndarray) -> np.ndarray:
+    out = np.full(len(close), np.nan)
+    out[1:] = close[1:] / close[:-1] - 1.0
+    return out
+
+
+def log_volume(volume: np.ndarray) -> np.ndarray:
+    return np.log1p(volume)
+
+
+def _rsi_from_means(avg_gain, avg_loss):
+    """RSI з середніх приростів/втрат; без втрат - 100, без руху взагалі - 50."""
+    total = avg_gain + avg_loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(total > 0, 100.0 * avg_gain / total, 50.0)
+    return np.where(np.isnan(avg_gain), np.nan, rsi)
+
+
+def rsi(close: np.ndarray, n: int) -> np.ndarray:
+    """
+    RSI з простим ковзним середнім приростів і втрат (варіант Катлера), O(len(close)).
+
+    100 * gain / (gain + loss) тотожне класичному 100 - 100 / (1 + RS).
+    """
+    delta = np.diff(np.asarray(close, dtype=np.float64), prepend=np.nan)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    avg_gain = np.full(len(close), np.nan)
+    avg_loss = np.full(len(close), np.nan)
+    # Перша різниця не визначена, тому вікно починається з другого рядка
+    avg_gain[1:] = rolling_mean(gains[1:], n)
+    avg_loss[1:] = rolling_mean(losses[1:], n)
+    return _rsi_from_means(avg_gain, avg_loss)
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range; для першого рядка (без попереднього close) - high - low."""
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    ranges = np.stack([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    return np.nanmax(ranges, axis=0)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, n: int) -> np.ndarray:
+    return rolling_mean(true_range(high, low, close), n)
+
+
+def compute_features(ohlcv: np.ndarray, feature_names=DEFAULT_FEATURES) -> np.ndarray:
+    """
+    Обчислює матрицю ознак з OHLCV векторизовано, O(n) на ознаку.
+
+    Args:
+        ohlcv (np.ndarray): Матриця (n, 5): open, high, low, close, volume
+        feature_names: Список назв ознак (див. parse_feature)
+
+    Returns:
+        np.ndarray: Матриця (n, len(feature_names)) float32; перші feature_warmup(...) рядків можуть містити NaN
+    """
+    if tuple(feature_names) == BASE_FEATURES:
+        return np.asarray(ohlcv, dtype=np.float32)
+
+    data = np.asarray(ohlcv, dtype=np.float64)
+    high, low, close, volume = data[:, HIGH], data[:, LOW], data[:, CLOSE], data[:, VOLUME]
+    out = np.empty((len(data), len(feature_names)), dtype=np.float32)
+
+    for j, name in enumerate(feature_names):
+        kind, period = parse_feature(name)
+        if kind in BASE_FEATURES:
+            out[:, j] = data[:, BASE_FEATURES.index(kind)]
+        elif kind == 'return':
+            out[:, j] = simple_returns(close)
+        elif kind == 'log_volume':
+            out[:, j] = log_volume(volume)
+        elif kind == 'sma':
+            out[:, j] = rolling_mean(close, period)
+        elif kind == 'std':
+            out[:, j] = rolling_std(close, period)
+        elif kind == 'rsi':
+            out[:, j] = rsi(close, period)
+        elif kind == 'atr':
+            out[:, j] = atr(high, low, close, period)
+    return out
+
+
+def add_feature_columns(df, feature_names=DEFAULT_FEATURES):
+    """
+    Додає в DataFrame колонки ознак, яких у ньому ще немає.
+
+    Колонки, вже пораховані раніше (наприклад, prepare_data.py), не перераховуються.
+
+    Args:
+        df (pd.DataFrame): Дані з колонками open, high, low, close, volume, відсортовані за часом
+        feature_names: Список назв ознак
+
+    Returns:
+        pd.DataFrame: Той самий DataFrame з доданими колонками
+    """
+    missing = [name for name in feature_names if name not in df.columns]
+    if missing:
+        values = compute_features(df[list(BASE_FEATURES)].to_numpy(dtype=np.float64), missing)
+        for j, name in enumerate(missing):
+            df[name] = values[:, j]
+    return df
+
+
+def feature_set_tag(feature_names) -> str:
+    """
+    Суфікс для імен кеш-файлів: порожній для базового набору, інакше короткий хеш списку ознак.
+    """
+    if tuple(feature_names) == BASE_FEATURES:
+        return ''
+    return '_f' + hashlib.md5(','.join(feature_names).encode()).hexdigest()[:8]
+
+
+def save_feature_names(model_dir: str, feature_names) -> None:
+    """Зберігає список ознак моделі поруч із model.keras."""
+    with open(os.path.join(model_dir, FEATURES_FILE), 'w') as f:
+        json.dump(list(feature_names), f)
+
+
+def load_feature_names(model_dir: str) -> tuple:
+    """
+    Список ознак, на яких навчено модель; якщо файлу немає - базові OHLCV.
+
+    Args:
+        model_dir (str): Директорія з model.keras
+
+    Returns:
+        tuple: Назви ознак
+    """
+    path = os.path.join(model_dir, FEATURES_FILE)
+    if not os.path.exists(path):
+        return BASE_FEATURES
+    with open(path) as f:
+        feature_names = tuple(json.load(f))
+    for name in feature_names:
+        parse_feature(name)
+    return feature_names
+
+
+class _RunningWindow:
+    """Ковзна сума останніх n значень з оновленням за O(1)."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.values = np.zeros(n)
+        self.sum = 0.0
+        self.count = 0
+
+    def push(self, value: float) -> None:
+        slot = self.count % self.n
+        self.sum += value - self.values[slot]
+        self.values[slot] = value
+        self.count += 1
+        # Періодично перераховуємо суму, щоб не накопичувалась похибка округлення
+        if self.count % (1024 * self.n) == 0:
+            self.sum = float(self.values.sum())
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.n
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.n
+
+
+class _RunningVariance:
+    """
+    Ковзні середнє і дисперсія (ddof=0) останніх n значень за O(1): оновлення
+    Велфорда з заміною найстарішого значення. На відміну від суми x² не втрачає
+    точність на великих рівнях цін (close² ~ 1e10 для BTC).
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.values = np.zeros(n)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.count = 0
+
+    def push(self, value: float) -> None:
+        slot = self.count % self.n
+        if self.count < self.n:
+            delta = value - self.mean
+            self.mean += delta / (self.count + 1)
+            self.m2 += delta * (value - self.mean)
+        else:
+            old = self.values[slot]
+            mean = self.mean + (value - old) / self.n
+            self.m2 += (value - old) * (value - mean + old - self.mean)
+            self.mean = mean
+        self.values[slot] = value
+        self.count += 1
+        # Періодично перераховуємо з вікна, щоб не накопичувалась похибка округлення
+        if self.count % (1024 * self.n) == 0:
+            self.mean = float(self.values.mean())
+            self.m2 = float(np.square(self.values - self.mean).sum())
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.n
+
+    @property
+    def variance(self) -> float:
+        return max(self.m2 / self.n, 0.0)
+
+
+class StreamingFeatures:
+    """
+    Інкрементна форма compute_features для стрімінгового інференсу.
+
+    update() приймає одну свічку і за O(кількість ознак) повертає рядок ознак,
+    що збігається з відповідним рядком compute_features по всій історії.
+    """
+
+    def __init__(self, feature_names=DEFAULT_FEATURES):
+        self.feature_names = tuple(feature_names)
+        self.specs = [parse_feature(name) for name in self.feature_names]
+        self.warmup = feature_warmup(self.feature_names)
+        self.prev_close = None
+        self.rows_seen = 0
+        self._windows = {}
+        for kind, period in self.specs:
+            if kind in ('sma', 'atr'):
+                self._windows[(kind, period)] = _RunningWindow(period)
+            elif kind == 'std':
+                self._windows[('std', period)] = _RunningVariance(period)
+            elif kind == 'rsi':
+                self._windows[('gain', period)] = _RunningWindow(period)
+                self._windows[('loss', period)] = _RunningWindow(period)
+
+    def update(self, candle) -> np.ndarray:
+        """
+        Args:
+            candle: open, high, low, close, volume
+
+        Returns:
+            np.ndarray: Рядок ознак float32 (NaN для ознак, що ще прогріваються)
+        """
+        open_, high, low, close, volume = (float(v) for v in candle)
+        prev_close = self.prev_close
+        tr = high - low if prev_close is None else max(high - low, abs(high - prev_close), abs(low - prev_close))
+        delta = None if prev_close is None else close - prev_close
+
+        for (kind, period), window in self._windows.items():
+            if kind in ('sma', 'std'):
+                window.push(close)
+            elif kind == 'atr':
+                window.push(tr)
+            elif kind == 'gain' and delta is not None:
+                window.push(max(delta, 0.0))
+            elif kind == 'loss' and delta is not None:
+                window.push(max(-delta, 0.0))
+
+        row = np.empty(len(self.specs), dtype=np.float32)
+        for j, (kind, period) in enumerate(self.specs):
+            if kind in BASE_FEATURES:
+                row[j] = (open_, high, low, close, volume)[BASE_FEATURES.index(kind)]
+            elif kind == 'return':
+                row[j] = np.nan if prev_close is None else close / prev_close - 1.0
+            elif kind == 'log_volume':
+                row[j] = np.log1p(volume)
+            elif kind in ('sma', 'atr'):
+                window = self._windows[(kind, period)]
+                row[j] = window.mean if window.full else np.nan
+            elif kind == 'std':
+                window = self._windows[('std', period)]
+                row[j] = np.sqrt(window.variance) if window.full else np.nan
+            elif kind == 'rsi':
+                gain, loss = self._windows[('gain', period)], self._windows[('loss', period)]
+                if gain.full:
+                    row[j] = _rsi_from_means(np.float64(gain.mean), np.float64(loss.mean))
+                else:
+                    row[j] = np.nan
+
+        self.prev_close = close
+        self.rows_seen += 1
+        return row
@@ -0,0 +1,263 @@
+"""
+Інкрементне донавчання моделі на нових свічках замість повного перенавчання.
+
+Для кожного символу в models/training_state.json зберігається час останньої
+свічки, на якій модель уже навчена (train_model записує його після повного
+навчання) разом зі скалером навчання і байтовим зсувом рядка, з якого
+починається потрібний контекст. Донавчання читає файл лише з цього зсуву,
+бере нові позначені рядки і window_size рядків перед ними, масштабує їх
+збереженим скалером (нові максимуми й мінімуми не змінюють масштаб уже
+вивчених входів), робить обмежену кількість кроків оптимізатора над
+поточною моделлю і публікує нову версію:
+
+    models/versions/v0007/model.keras   - незмінна копія версії
+    models/model.keras                  - поточна версія (атомарна заміна)
+
+Тож час донавчання залежить від обсягу нових даних, а не всієї історії.
+
+Приклад:
+    python incremental.py data/BTCUSDT_1.csv data/ETHUSDT_1.csv --max-steps 200
+"""
+import argparse
+import math
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import tensorflow as tf
+
+from corpus import symbol_from_path
+from dtype_policy import as_features, as_targets, coerce_frame
+from features import add_feature_columns, feature_warmup, load_feature_names, save_feature_names
+from labels import add_label_columns, labeled_rows, target_column
+from model_trainer import (
+    build_window_dataset,
+    configure_tensorflow,
+    load_saved_model,
+    load_training_state,
+    save_processed_file,
+    save_training_state,
+    scaler_state,
+)
+from sequence_processor import csv_row_offset, read_csv_tail, read_scaled_features
+
+VERSIONS_DIR = 'versions'
+
+
+def read_tail_features(data_path: str, offset: int, scaler: dict, feature_names, horizon: int):
+    """
+    Ознаки й мітки рядків файлу від байтового зсуву offset, масштабовані збереженим скалером.
+
+    Returns:
+        pd.DataFrame: timestamp, ознаки і мітка; індекс - номери рядків від offset
+    """
+    feature_cols = list(feature_names)
+    label = target_column(horizon)
+    df = read_csv_tail(data_path, offset).sort_values('timestamp', kind='stable')
+    if label not in df.columns:
+        add_label_columns(df, [horizon])
+    df = add_feature_columns(df, feature_cols).dropna(subset=feature_cols)
+    coerce_frame(df, data_path, feature_cols)
+    scaled = df[feature_cols].to_numpy() * np.asarray(scaler['scale']) + np.asarray(scaler['min'])
+    df[feature_cols] = as_features(scaled, f"{data_path}: ознаки")
+    return df[['timestamp'] + feature_cols + [label]]
+
+
+def new_samples(data_path: str, symbol_state: dict, window_size: int, feature_names, horizon: int) -> tuple:
+    """
+    Вирізає з файлу рядки для семплів, новіших за останню навчену свічку символу.
+
+    Семпл i - вікно рядків [i - window_size, i) і ціль у рядку i, тож
+    повертається хвіст матриці з window_size рядками контексту перед першим
+    новим семплом. Файл читається від збереженого зсуву (O(нових рядків));
+    стан без скалера (збережений до цього формату) один раз читає всю історію
+    і фіксує скалер, з яким далі масштабуються всі донавчання.
+
+    Args:
+        data_path (str): Шлях до CSV файлу з даними
+        symbol_state (dict): Стан символу з training_state.json
+        window_size (int): Розмір вікна
+        feature_names: Ознаки моделі
+        horizon (int): Горизонт міток
+
+    Returns:
+        tuple: (features, targets, sample_range, update) - sample_range індексує семпли
+            у повернутому хвості, update - нові last_timestamp, offset і scaler символу;
+            (None, None, (0, 0), update), якщо нових позначених свічок немає
+    """
+    last_timestamp = symbol_state['last_timestamp']
+    scaler = symbol_state.get('scaler')
+    offset = symbol_state.get('offset', 0) if scaler is not None else 0
+    if scaler is None:
+        print(f"[!] {data_path}: у стані навчання немає скалера - масштаб береться по всій історії")
+        df, fitted = read_scaled_features(data_path, feature_names, (horizon,), keep_timestamp=True)
+        scaler = scaler_state(fitted)
+    else:
+        df = read_tail_features(data_path, offset, scaler, feature_names, horizon)
+
+    targets = as_targets(df[target_column(horizon)].to_numpy(), f"{data_path}: мітки")
+    n_rows = labeled_rows(targets)
+    timestamps = df['timestamp'].to_numpy()[:n_rows]
+
+    update = {'last_timestamp': last_timestamp, 'offset': offset, 'scaler': scaler}
+    first_new = max(int(np.searchsorted(timestamps, last_timestamp, side='right')), window_size)
+    if first_new >= n_rows:
+        return None, None, (0, 0), update
+
+    # Наступне донавчання почнеться з контексту перед першою ще не позначеною свічкою;
+    # індекс - номери рядків від offset, тож для невпорядкованого файлу зсув лишається
+    if df.index.is_monotonic_increasing:
+        context = window_size + feature_warmup(feature_names)
+        update['offset'] = csv_row_offset(data_path, max(int(df.index[n_rows - 1]) + 1 - context, 0), offset)
+    update['last_timestamp'] = int(timestamps[-1])
+
+    start = first_new - window_size
+    features = as_features(df[list(feature_names)].to_numpy()[start:n_rows], f"{data_path}: ознаки")
+    return features, targets[start:n_rows], (window_size, n_rows - start), update
+
+
+def publish_model_version(model, model_path: str, feature_names, version: int) -> str:
+    """
+    Зберігає версію моделі і робить її поточною.
+
+    model.keras замінюється через os.replace, тож сервіс, що перечитує файл,
+    ніколи не бачить його частково записаним.
+
+    Args:
+        model: Модель
+        model_path (str): Директорія моделі
+        feature_names: Ознаки моделі
+        version (int): Номер версії
+
+    Returns:
+        str: Директорія версії
+    """
+    version_dir = os.path.join(model_path, VERSIONS_DIR, f"v{version:04d}")
+    os.makedirs(version_dir, exist_ok=True)
+    model.save(os.path.join(version_dir, 'model.keras'))
+    save_feature_names(version_dir, feature_names)
+
+    current = os.path.join(model_path, 'model.keras')
+    shutil.copyfile(os.path.join(version_dir, 'model.keras'), current + '.tmp')
+    os.replace(current + '.tmp', current)
+    save_feature_names(model_path, feature_names)
+    print(f"[✓] Опубліковано версію моделі {version}: {version_dir}")
+    return version_dir
+
+
+def fine_tune_model(
+    data_paths,
+    model_path: str = './models',
+    window_size: int = None,
+    batch_size: int = 32,
+    max_steps: int = 200,
+    epochs: int = 1,
+    learning_rate: float = None,
+    min_new_samples: int = 1,
+    shuffle_buffer: int = 10000
+) -> tuple:
+    """
+    Донавчає поточну модель на свічках, що з'явились після останнього навчання.
+
+    Батчі з нових семплів різних символів перемішуються пропорційно їх
+    кількості. Кроків оптимізатора - не більше max_steps (і не більше epochs
+    проходів по нових семплах).
+
+    Args:
+        data_paths: Шлях або список шляхів до CSV файлів символів
+        model_path (str): Директорія з model.keras і training_state.json
+        window_size (int): Розмір вікна (None - з вхідної форми моделі)
+        batch_size (int): Розмір батчу
+        max_steps (int): Максимальна кількість кроків оптимізатора
+        epochs (int): Максимальна кількість проходів по нових семплах
+        learning_rate (float): Швидкість навчання для донавчання (None - як в оптимізатора моделі)
+        min_new_samples (int): Мінімум нових семплів, інакше донавчання пропускається
+        shuffle_buffer (int): Розмір буфера перемішування семплів кожного символу
+
+    Returns:
+        tuple: (model, version, stats) або (None, None, stats), якщо донавчання пропущено;
+            stats - нові семпли по символах, кроки, точність на нових даних до донавчання
+    """
+    configure_tensorflow()
+    if isinstance(data_paths, str):
+        data_paths = [data_paths]
+    state = load_training_state(model_path)
+    model = load_saved_model(os.path.join(model_path, 'model.keras'))
+    feature_names = load_feature_names(model_path)
+    window_size = window_size or model.input_shape[1]
+
+    datasets, counts, updates = [], {}, {}
+    for data_path in data_paths:
+        symbol = symbol_from_path(data_path)
+        symbol_state = state['symbols'].get(symbol)
+        if symbol_state is None:
+            print(f"[!] {symbol}: немає стану навчання - спершу потрібне повне навчання (train_model)")
+            continue
+        features, targets, sample_range, update = new_samples(
+            data_path, symbol_state, window_size, feature_names, symbol_state['horizon']
+        )
+        n_samples = sample_range[1] - sample_range[0]
+        if n_samples == 0:
+            print(f"[>] {symbol}: нових позначених свічок немає")
+            continue
+        counts[symbol] = n_samples
+        updates[symbol] = dict(symbol_state, data_path=data_path, **update)
+        datasets.append(build_window_dataset(
+            features, targets, window_size, sample_range, batch_size, shuffle_buffer=shuffle_buffer
+        ))
+
+    total = sum(counts.values())
+    stats = {'new_samples': counts, 'steps': 0}
+    if total < max(min_new_samples, 1):
+        print(f"[>] Нових семплів {total} < {max(min_new_samples, 1)}: донавчання пропущено")
+        return None, None, stats
+
+    steps = min(max_steps, epochs * sum(math.ceil(n / batch_size) for n in counts.values()))
+    weights = [n / total for n in counts.values()]
+    dataset = tf.data.Dataset.sample_from_datasets([d.repeat() for d in datasets], weights=weights)
+
+    # Точність поточної моделі на ще не баченому - оцінка дрейфу до донавчання
+    _, stats['accuracy_before'] = model.evaluate(dataset, steps=min(steps, 50), verbose=0)
+    if learning_rate is not None:
+        model.optimizer.learning_rate.assign(learning_rate)
+
+    print(f"[>] Донавчання: {total} нових семплів ({len(counts)} символів), {steps} кроків")
+    history = model.fit(dataset, epochs=1, steps_per_epoch=steps, shuffle=False, verbose=1)
+    stats['steps'] = steps
+    stats['loss'] = float(history.history['loss'][-1])
+    stats['accuracy'] = float(history.history['accuracy'][-1])
+
+    version = state.get('version', 0) + 1
+    publish_model_version(model, model_path, feature_names, version)
+    state['version'] = version
+    state['symbols'].update(updates)
+    state['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    save_training_state(state, model_path)
+    for update in updates.values():
+        save_processed_file(update['data_path'])
+
+    print(f"[✓] Точність на нових даних до донавчання: {stats['accuracy_before']:.4f}, "
+          f"після {steps} кроків (train): {stats['accuracy']:.4f}")
+    return model, version, stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Донавчання моделі на нових свічках')
+    parser.add_argument('data_paths', nargs='+', help='CSV файли символів')
+    parser.add_argument('--model-path', default='./models')
+    parser.add_argument('--window-size', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--max-steps', type=int, default=200)
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--learning-rate', type=float, default=None)
+    args = parser.parse_args()
+    fine_tune_model(
+        args.data_paths,
+        model_path=args.model_path,
+        window_size=args.window_size,
+        batch_size=args.batch_size,
+        max_steps=args.max_steps,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate
+    )
@@ -1,95 +1,177 @@
 import sys
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from progress_bar import VisualProgressBar
-from model_trainer import train_model, load_saved_model
+from model_trainer import configure_tensorflow, train_model, load_training_state
+from incremental import fine_tune_model
+from training_profiler import TrainingProfiler
+from training_budget import TrainingBudget
+from features import BASE_FEATURES
+from corpus import SymbolCorpus, symbol_from_path
+from dtype_policy import upcast_report
+from labels import DEFAULT_HORIZON
 from gpu_utils import check_gpu_availability
 import os
 import time
-from datetime import datetime, timedelta
-
-# Check GPU availability
-print("[>] Checking GPU availability...")
-gpu_available = check_gpu_availability()
 
 # Налаштування параметрів навчання
 DATA_DIR = './data'           # Директорія з даними
-FILE_PREFIX = 'BTCUSD_1.csv'           # Префікс файлів для обробки
+FILE_PREFIX = '_1.csv'           # Префікс файлів для обробки
 N_DAYS = 30                 # Кількість днів для прогнозування
-EPOCHS = 20                   # Кількість епох навчання
+EPOCHS = 20                   # Максимальна кількість епох навчання (бюджет зупиняє раніше на плато)
+EARLY_STOPPING_PATIENCE = 5  # Епох без покращення val_accuracy до зупинки (None - завжди EPOCHS)
+TIME_LIMIT_SECONDS = None    # Обмеження часу навчання одного файлу/корпусу в секундах
 WINDOW_SIZE = 1000             # Розмір вікна для послідовностей
 BATCH_SIZE = 32             # Розмір батчу
+MEMORY_BUDGET_MB = None      # Бюджет пам'яті навчання в МБ: батч вибирається автоматично замість BATCH_SIZE
 TEST_SIZE = 0.2              # Частка тестових даних
 MODEL_PATH = './models'      # Шлях для збереження моделі
+FEATURES = BASE_FEATURES     # Ознаки моделі, наприклад BASE_FEATURES + ('return', 'log_volume', 'rsi_14', 'atr_14')
+PROFILE_TRAINING = False     # Профілювання кроків навчання (очікування даних vs обчислення)
+PROFILE_TRACE_STEPS = None   # Діапазон кроків для TensorBoard-трейсу, наприклад (100, 120)
+USE_CORPUS = True            # Одна модель на всіх символах (corpus.py) замість донавчання файл за файлом
+HORIZON = DEFAULT_HORIZON    # Горизонт прогнозу у свічках: колонка target_<HORIZON> (prepare_data.py, labels.py)
+INCREMENTAL = True           # Вже навчені символи лише донавчаються на нових свічках (incremental.py)
+FINE_TUNE_MAX_STEPS = 200    # Максимум кроків оптимізатора на одне донавчання
+
+def format_duration(execution_time: float) -> str:
+    if execution_time < 60:
+        return f"{execution_time:.1f} секунд"
+    minutes = int(execution_time // 60)
+    seconds = execution_time % 60
+    return f"{minutes} хвилин {seconds:.1f} секунд"
+
+def make_profiler(model_path: str = MODEL_PATH):
+    if not PROFILE_TRAINING:
+        return None
+    return TrainingProfiler(
+        trace_dir=os.path.join(model_path, 'profile') if PROFILE_TRACE_STEPS else None,
+        trace_steps=PROFILE_TRACE_STEPS
+    )
+
+def make_budget():
+    return TrainingBudget(patience=EARLY_STOPPING_PATIENCE, time_limit=TIME_LIMIT_SECONDS)
+
+def main(
+    data_dir: str = DATA_DIR,
+    file_prefix: str = FILE_PREFIX,
+    model_path: str = MODEL_PATH,
+    epochs: int = EPOCHS,
+    window_size: int = WINDOW_SIZE,
+    batch_size: int = BATCH_SIZE
+):
+    """
+    Навчання на всіх файлах data_dir: донавчання відомих символів, повне навчання нових.
+
+    Параметри за замовчуванням - константи на початку модуля (cli.py train передає свої).
+    """
+    configure_tensorflow()
+
+    # Check GPU availability
+    print("[>] Checking GPU availability...")
+    check_gpu_availability()
+
+    # Отримуємо список всіх відповідних файлів
+    matching_files = [
+        os.path.join(data_dir, f) for f in os.listdir(data_dir)
+        if f.endswith(file_prefix)
+    ]
+
+    if not matching_files:
+        print(f"[!] Не знайдено файлів з префіксом '{file_prefix}' в директорії {data_dir}")
+        sys.exit(1)
+
+    print(f"[>] Знайдено {len(matching_files)} файлів для обробки")
+
+    # Перевіряємо чи існує модель: нові символи донавчають поточну (у т.ч. щойно донавчену) модель,
+    # а не перезаписують її моделлю з нуля
+    model_exists = os.path.exists(os.path.join(model_path, 'model.keras'))
+    if model_exists:
+        print("[>] Знайдено існуючу модель, продовжуємо навчання")
+    else:
+        print("[>] Створюємо нову модель")
 
-# Отримуємо список всіх відповідних файлів
-matching_files = [
-    os.path.join(DATA_DIR, f) for f in os.listdir(DATA_DIR)
-    if f.endswith(FILE_PREFIX)
-]
-
-if not matching_files:
-    print(f"[!] Не знайдено файлів з префіксом '{FILE_PREFIX}' в директорії {DATA_DIR}")
-    sys.exit(1)
-
-print(f"[>] Знайдено {len(matching_files)} файлів для обробки")
-
-# Перевіряємо чи існує модель
-model_exists = os.path.exists(os.path.join(MODEL_PATH, 'model.h5'))
-if model_exists:
-    print("[>] Знайдено існуючу модель, продовжуємо навчання")
-else:
-    print("[>] Створюємо нову модель")
-
-# Обробляємо кожен файл
-for i, file_path in enumerate(matching_files, 1):
-    print(f"\n[>] Обробка файлу {i}/{len(matching_files)}: {file_path}")
-    
-    # Запам'ятовуємо час початку обробки
-    start_time = time.time()
-    
-    try:
-        # Навчання моделі
+    if INCREMENTAL and os.path.exists(os.path.join(model_path, 'model.keras')):
+        # Символи зі стану навчання донавчаються лише на нових свічках, решта - повне навчання
+        trained_symbols = load_training_state(model_path)['symbols']
+        known_files = [f for f in matching_files if symbol_from_path(f) in trained_symbols]
+        if known_files:
+            start_time = time.time()
+            fine_tune_model(known_files, model_path, window_size, batch_size, max_steps=FINE_TUNE_MAX_STEPS)
+            print(f"[✓] Донавчання {len(known_files)} символів за {format_duration(time.time() - start_time)}")
+            matching_files = [f for f in matching_files if f not in known_files]
+
+    if not matching_files:
+        print("[>] Нових символів для повного навчання немає")
+    elif USE_CORPUS:
+        # Один прохід по всіх символах зі збалансованими батчами
+        start_time = time.time()
+        profiler = make_profiler(model_path)
+        corpus = SymbolCorpus(matching_files, window_size, FEATURES, test_size=TEST_SIZE, horizon=HORIZON)
         model, history, accuracy = train_model(
-            data_path=file_path,
+            data_path=None,
             n_days=N_DAYS,
-            epochs=EPOCHS,
-            window_size=WINDOW_SIZE,
-            batch_size=BATCH_SIZE,
-            test_size=TEST_SIZE,
+            epochs=epochs,
+            window_size=window_size,
+            batch_size=batch_size,
             show_plot=True,
             save_model=True,
-            model_path=MODEL_PATH,
-            continue_training=model_exists  # Продовжуємо навчання, якщо модель існує
+            model_path=model_path,
+            continue_training=model_exists,
+            profiler=profiler,
+            budget=make_budget(),
+            memory_budget_mb=MEMORY_BUDGET_MB,
+            corpus=corpus
         )
-        
-        # Після першого файлу модель вже існує
-        model_exists = True
-        
-        # Розраховуємо час виконання
-        end_time = time.time()
-        execution_time = end_time - start_time
-        
-        # Форматуємо час виконання
-        if execution_time < 60:
-            time_str = f"{execution_time:.1f} секунд"
-        else:
-            minutes = int(execution_time // 60)
-            seconds = execution_time % 60
-            time_str = f"{minutes} хвилин {seconds:.1f} секунд"
-            
-        print(f"[✓] Файл оброблено за {time_str}")
-        
-    except (FileNotFoundError, ValueError) as e:
-        print(f"[!] Помилка при обробці файлу {file_path}: {str(e)}")
-        continue
-    except Exception as e:
-        print(f"[!] Неочікувана помилка при обробці файлу {file_path}: {str(e)}")
-        continue
-
-print("\n[✓] Навчання завершено для всіх файлів")
\ No newline at end of file
+        if profiler is not None:
+            profiler.save(os.path.join(model_path, 'profile_corpus.json'))
+        print(f"[✓] Корпус ({len(corpus.symbols)} символів) оброблено за {format_duration(time.time() - start_time)}")
+    else:
+        # Обробляємо кожен файл
+        for i, file_path in enumerate(matching_files, 1):
+            print(f"\n[>] Обробка файлу {i}/{len(matching_files)}: {file_path}")
+
+            # Запам'ятовуємо час початку обробки
+            start_time = time.time()
+
+            profiler = make_profiler(model_path)
+
+            try:
+                # Навчання моделі
+                model, history, accuracy = train_model(
+                    data_path=file_path,
+                    n_days=N_DAYS,
+                    epochs=epochs,
+                    window_size=window_size,
+                    batch_size=batch_size,
+                    test_size=TEST_SIZE,
+                    show_plot=True,
+                    save_model=True,
+                    model_path=model_path,
+                    continue_training=model_exists,  # Продовжуємо навчання, якщо модель існує
+                    profiler=profiler,
+                    budget=make_budget(),
+                    memory_budget_mb=MEMORY_BUDGET_MB,
+                    feature_names=FEATURES,
+                    horizon=HORIZON
+                )
+                if profiler is not None and history is not None:
+                    profile_name = f"profile_{os.path.splitext(os.path.basename(file_path))[0]}.json"
+                    profiler.save(os.path.join(model_path, profile_name))
+
+                # Після першого файлу модель вже існує
+                model_exists = True
+
+                print(f"[✓] Файл оброблено за {format_duration(time.time() - start_time)}")
+
+            except (FileNotFoundError, ValueError) as e:
+                print(f"[!] Помилка при обробці файлу {file_path}: {str(e)}")
+                continue
+            except Exception as e:
+                print(f"[!] Неочікувана помилка при обробці файлу {file_path}: {str(e)}")
+                continue
+
+    print("\n[✓] Навчання завершено для всіх файлів")
+
+    # DTYPE_CHECK=1: зведення конверсій типів, що копіювали дані (див. dtype_policy.py)
+    upcast_report()
+
+if __name__ == '__main__':
+    main()
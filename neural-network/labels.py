@@ -0,0 +1,80 @@
+"""
+Цільові мітки для кількох горизонтів прогнозу за один прохід.
+
+Мітка горизонту h у рядку i: 1, якщо close через h свічок вища за поточний
+close, інакше 0. Останні h рядків майбутнього не мають - для них мітка
+MISSING_LABEL (-1), а рядок лишається у файлі, бо для коротших горизонтів
+мітка в ньому є.
+
+Мітки зберігаються колонками target_<h> (prepare_data.py), а
+sequence_processor і train_model вибирають горизонт параметром horizon.
+"""
+import re
+
+import numpy as np
+
+from dtype_policy import TARGET_DTYPE
+
+DEFAULT_HORIZONS = (5, 15, 60, 240)
+DEFAULT_HORIZON = 60
+MISSING_LABEL = -1
+
+_COLUMN_PATTERN = re.compile(r'^target_(\d+)$')
+
+
+def target_column(horizon: int) -> str:
+    return f'target_{int(horizon)}'
+
+
+def label_horizons(columns) -> list:
+    """Горизонти, для яких у даних уже є колонки target_<h>."""
+    return sorted(int(m.group(1)) for m in map(_COLUMN_PATTERN.match, columns) if m)
+
+
+def build_labels(close: np.ndarray, horizons=DEFAULT_HORIZONS) -> np.ndarray:
+    """
+    Матриця міток для всіх горизонтів.
+
+    Args:
+        close (np.ndarray): Ціни закриття, відсортовані за часом
+        horizons: Горизонти у свічках
+
+    Returns:
+        np.ndarray: Матриця (n, len(horizons)) int8; MISSING_LABEL там, де майбутнього немає
+    """
+    close = np.asarray(close)
+    labels = np.full((len(close), len(horizons)), MISSING_LABEL, dtype=TARGET_DTYPE)
+    for j, horizon in enumerate(horizons):
+        if horizon < 1:
+            raise ValueError(f"Горизонт має бути додатним: {horizon}")
+        if horizon < len(close):
+            np.greater(close[horizon:], close[:-horizon], out=labels[:-horizon, j], casting='unsafe')
+    return labels
+
+
+def add_label_columns(df, horizons=DEFAULT_HORIZONS):
+    """
+    Додає в DataFrame колонки target_<h> (наявні перераховуються з close).
+
+    Args:
+        df (pd.DataFrame): Дані з колонкою close, відсортовані за часом
+        horizons: Горизонти у свічках
+
+    Returns:
+        pd.DataFrame: Той самий DataFrame
+    """
+    labels = build_labels(df['close'].to_numpy(), horizons)
+    for j, horizon in enumerate(horizons):
+        df[target_column(horizon)] = labels[:, j]
+    return df
+
+
+def labeled_rows(labels: np.ndarray) -> int:
+    """
+    Кількість рядків з початку, що мають мітку.
+
+    Мітки відсутні лише в хвості ряду, тож це довжина префікса,
+    придатного для семплів.
+    """
+    missing = np.flatnonzero(labels == MISSING_LABEL)
+    return int(missing[0]) if len(missing) else len(labels)
@@ -1,78 +1,234 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import LSTM, Dense, Dropout, Input
-from progress_bar import VisualProgressBar
+from training_profiler import TrainingProfiler
+from training_budget import TrainingBudget
+from batch_budget import MIN_BATCH_SIZE, MAX_BATCH_SIZE, is_out_of_memory, pick_batch_size
+import time
 import os
 import tensorflow as tf
 import json
 from pathlib import Path
-import multiprocessing
-from sequence_processor import load_sequences
+from sequence_processor import csv_row_offset, load_sequences, load_base_matrix
+from features import DEFAULT_FEATURES, feature_warmup, save_feature_names
+from labels import DEFAULT_HORIZON, build_labels, labeled_rows, target_column
+from dtype_policy import SOURCE_CSV_DTYPES, TARGET_DTYPE
+from corpus import symbol_from_path
 
-# Disable multi-threading
-os.environ['TF_NUM_INTEROP_THREADS'] = '2'
-os.environ['TF_NUM_INTRAOP_THREADS'] = '2'
+_tf_configured = False
 
-# Disable multi-core processing
-tf.config.threading.set_inter_op_parallelism_threads(2)
-tf.config.threading.set_intra_op_parallelism_threads(2)
+def configure_tensorflow():
+    """
+    Налаштування TF-рантайму для навчання (потоки, пам'ять GPU, XLA, eager).
+
+    Викликається точками входу перед першою операцією TF, а також train_model;
+    повторні виклики нічого не роблять. Під час імпорту модуля TF не налаштовується,
+    тож команди, яким навчання не потрібне, не платять за ініціалізацію рантайму.
+    Кількість потоків, уже задану викликачем (walk_forward ділить ядра між
+    процесами-воркерами), не змінює.
+    """
+    global _tf_configured
+    if _tf_configured:
+        return
+    _tf_configured = True
+
+    threading = tf.config.threading
+    if threading.get_intra_op_parallelism_threads() or threading.get_inter_op_parallelism_threads():
+        print("[>] Потоки TF уже налаштовано, пропускаємо")
+    else:
+        # Disable multi-threading
+        os.environ['TF_NUM_INTEROP_THREADS'] = '2'
+        os.environ['TF_NUM_INTRAOP_THREADS'] = '2'
 
-# Disable XLA compilation
-os.environ['TF_XLA_FLAGS'] = '--tf_xla_enable_xla_devices=false'
+        # Disable multi-core processing (після ініціалізації рантайму кількість потоків уже не змінити)
+        try:
+            threading.set_inter_op_parallelism_threads(2)
+            threading.set_intra_op_parallelism_threads(2)
+        except RuntimeError as e:
+            print(e)
 
-# Disable GPU memory growth
-gpus = tf.config.list_physical_devices('GPU')
-if gpus:
-    try:
-        for gpu in gpus:
-            tf.config.experimental.set_memory_growth(gpu, True)
-    except RuntimeError as e:
-        print(e)
+    # Disable XLA compilation
+    os.environ['TF_XLA_FLAGS'] = '--tf_xla_enable_xla_devices=false'
 
-# Налаштування для паралельного виконання
-tf.config.optimizer.set_jit(True)  # XLA оптимізація
+    # Disable GPU memory growth
+    gpus = tf.config.list_physical_devices('GPU')
+    if gpus:
+        try:
+            for gpu in gpus:
+                tf.config.experimental.set_memory_growth(gpu, True)
+        except RuntimeError as e:
+            print(e)
 
-# Увімкнення eager execution
-tf.config.run_functions_eagerly(True)
-# Увімкнення debug режиму для tf.data
-tf.data.experimental.enable_debug_mode()
+    # Налаштування для паралельного виконання
+    tf.config.optimizer.set_jit(True)  # XLA оптимізація
+
+    # Увімкнення eager execution
+    tf.config.run_functions_eagerly(True)
+    # debug-режим tf.data не вмикаємо: він виконує map послідовно і вимикає prefetch
+
+# Максимальний розмір валідаційних вікон, які кешуються в пам'яті між епохами
+VALIDATION_CACHE_LIMIT_MB = 512
 
 def get_processed_files_path():
     """Returns the path to the processed files JSON."""
     return os.path.join('./models', 'processed_files.json')
 
+def file_signature(file_path):
+    """Size and modification time of a file: changes when new candles are appended."""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
 def load_processed_files():
-    """Load the list of processed files from JSON."""
+    """
+    Load processed files from JSON as {path: signature}.
+
+    The old format (a plain list of paths) is migrated once: a file that has not been
+    modified since the list was written gets its current signature, any other file
+    (grown since) is dropped from the list so it is trained again.
+    """
     processed_files_path = get_processed_files_path()
     if os.path.exists(processed_files_path):
         with open(processed_files_path, 'r') as f:
-            return json.load(f)
-    return []
+            processed_files = json.load(f)
+        if isinstance(processed_files, list):
+            processed_files = migrate_processed_files(processed_files, os.path.getmtime(processed_files_path))
+        return processed_files
+    return {}
+
+def migrate_processed_files(paths, written_at):
+    """Convert the old list format to {path: signature} and save it."""
+    migrated = {
+        path: file_signature(path)
+        for path in paths
+        if os.path.exists(path) and os.path.getmtime(path) <= written_at
+    }
+    dropped = len(paths) - len(migrated)
+    with open(get_processed_files_path(), 'w') as f:
+        json.dump(migrated, f, indent=2)
+    print(f"[>] processed_files.json: migrated {len(migrated)} entries, {dropped} changed since processing")
+    return migrated
 
 def save_processed_file(file_path):
-    """Add a file to the processed files list and save it."""
+    """Record a file together with its current signature and save it."""
     processed_files = load_processed_files()
-    if file_path not in processed_files:
-        processed_files.append(file_path)
-        os.makedirs('./models', exist_ok=True)
-        with open(get_processed_files_path(), 'w') as f:
-            json.dump(processed_files, f, indent=2)
+    processed_files[file_path] = file_signature(file_path)
+    os.makedirs('./models', exist_ok=True)
+    with open(get_processed_files_path(), 'w') as f:
+        json.dump(processed_files, f, indent=2)
 
 def is_file_processed(file_path):
-    """Check if a file has been processed before."""
-    return file_path in load_processed_files()
+    """
+    Check if a file has been processed before and has not changed since.
+
+    A file that has grown (new candles) is not considered processed.
+    """
+    processed_files = load_processed_files()
+    if file_path not in processed_files:
+        return False
+    return not os.path.exists(file_path) or processed_files[file_path] == file_signature(file_path)
+
+# Стан інкрементного навчання: до якої свічки кожного символу модель уже навчена
+TRAINING_STATE_FILE = 'training_state.json'
+
+def load_training_state(model_path: str = './models') -> dict:
+    """
+    Стан навчання моделі з model_path/training_state.json.
+
+    Returns:
+        dict: {'version': int, 'symbols': {symbol: {'data_path', 'last_timestamp', 'horizon', 'scaler', 'offset'}}}
+    """
+    state_path = os.path.join(model_path, TRAINING_STATE_FILE)
+    if os.path.exists(state_path):
+        with open(state_path, 'r') as f:
+            return json.load(f)
+    return {'version': 0, 'symbols': {}}
+
+def save_training_state(state: dict, model_path: str = './models') -> None:
+    """Атомарно записує стан навчання (через тимчасовий файл і os.replace)."""
+    os.makedirs(model_path, exist_ok=True)
+    state_path = os.path.join(model_path, TRAINING_STATE_FILE)
+    with open(state_path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(state_path + '.tmp', state_path)
+
+def last_labeled_row(data_path: str, horizon: int = DEFAULT_HORIZON) -> tuple:
+    """
+    Остання свічка файлу, що вже має мітку горизонту (на ній закінчується навчання).
+
+    Args:
+        data_path (str): Шлях до CSV файлу з даними
+        horizon (int): Горизонт міток
+
+    Returns:
+        tuple: (n_rows, timestamp, in_order) - кількість позначених рядків, час останнього з них
+            (None, якщо жодна свічка ще не має мітки) і чи рядки файлу вже впорядковані за часом
+    """
+    label = target_column(horizon)
+    columns = pd.read_csv(data_path, nrows=0).columns
+    df = pd.read_csv(
+        data_path,
+        usecols=['timestamp', label] if label in columns else ['timestamp', 'close'],
+        dtype=dict(SOURCE_CSV_DTYPES, **{label: TARGET_DTYPE})
+    )
+    in_order = bool(df['timestamp'].is_monotonic_increasing)
+    df = df.sort_values('timestamp', kind='stable')
+    labels = df[label].to_numpy() if label in df.columns else build_labels(df['close'].to_numpy(), (horizon,))[:, 0]
+    n_rows = labeled_rows(labels)
+    return n_rows, (int(df['timestamp'].iloc[n_rows - 1]) if n_rows else None), in_order
+
+def scaler_state(scaler) -> dict:
+    """Параметри MinMaxScaler для training_state.json: X * scale + min."""
+    return {'min': [float(v) for v in scaler.min_], 'scale': [float(v) for v in scaler.scale_]}
+
+def record_trained_until(
+    data_paths,
+    model_path: str = './models',
+    horizon: int = DEFAULT_HORIZON,
+    feature_names=DEFAULT_FEATURES,
+    window_size: int = 0
+) -> None:
+    """
+    Запам'ятовує для символів файлів, що модель навчена до їх останньої позначеної свічки.
+
+    Разом з часом зберігаються скалер, з яким символ навчався (донавчання масштабує
+    нові свічки ним, а не перераховує масштаб по всій історії), і байтовий зсув
+    рядка, з якого починається контекст (window_size + прогрів ознак) для наступних
+    семплів, - донавчання читає файл лише з нього.
+
+    Args:
+        data_paths: Шляхи до CSV файлів
+        model_path (str): Директорія моделі
+        horizon (int): Горизонт міток
+        feature_names: Ознаки моделі
+        window_size (int): Розмір вікна моделі
+    """
+    state = load_training_state(model_path)
+    context = window_size + feature_warmup(feature_names)
+    for data_path in data_paths:
+        n_rows, last_timestamp, in_order = last_labeled_row(data_path, horizon)
+        if last_timestamp is None:
+            continue
+        # Скалер навчання - з кешу базової матриці (він уже актуальний після навчання)
+        _, _, scaler = load_base_matrix(data_path, feature_names, mmap=True, horizon=horizon)
+        state['symbols'][symbol_from_path(data_path)] = {
+            'data_path': data_path,
+            'last_timestamp': last_timestamp,
+            'horizon': horizon,
+            'scaler': scaler_state(scaler),
+            # Невпорядкований файл донавчання читає повністю
+            'offset': csv_row_offset(data_path, max(n_rows - context, 0)) if in_order else 0,
+        }
+    save_training_state(state, model_path)
 
-def save_trained_model(model, model_path: str = './models'):
+def save_trained_model(model, model_path: str = './models', feature_names=DEFAULT_FEATURES):
     """
     Зберігає модель та її ваги.
 
     Args:
         model: Навчена модель
         model_path (str): Шлях для збереження моделі
+        feature_names: Набір ознак, на якому навчено модель (зберігається в features.json)
     """
     # Створюємо директорію, якщо її немає
     if not os.path.exists(model_path):
@@ -81,6 +237,7 @@ def save_trained_model(model, model_path: str = './models'):
     # Зберігаємо модель у новому форматі .keras
     model_save_path = os.path.join(model_path, 'model.keras')
     model.save(model_save_path)
+    save_feature_names(model_path, feature_names)
     print(f"[✓] Модель збережено в {model_save_path}")
 
 def load_saved_model(model_path: str = './models/model.keras'):
@@ -100,18 +257,90 @@ def load_saved_model(model_path: str = './models/model.keras'):
     print(f"[✓] Модель завантажено з {model_path}")
     return model
 
-def generate_lstm_sequences(data_path: str, window_size: int) -> tuple:
+def generate_lstm_sequences(
+    data_path: str,
+    window_size: int,
+    feature_names=DEFAULT_FEATURES,
+    horizon: int = DEFAULT_HORIZON
+) -> tuple:
     """
     Генерує послідовності для LSTM моделі.
 
     Args:
         data_path (str): Шлях до CSV файлу з даними
         window_size (int): Розмір вікна для послідовностей
+        feature_names: Набір ознак
+        horizon (int): Горизонт міток (labels.py)
 
     Returns:
         tuple: (X, y, scaler) - послідовності, цільові значення та скалер
     """
-    return load_sequences(data_path, window_size)
+    return load_sequences(data_path, window_size, feature_names, horizon)
+
+def split_sample_ranges(n_rows: int, window_size: int, test_size: float) -> tuple:
+    """
+    Ділить семпли на train/test так само, як train_test_split(shuffle=False).
+
+    Семпл з індексом i - це вікно рядків [i - window_size, i) і ціль у рядку i.
+
+    Args:
+        n_rows (int): Кількість рядків базової матриці
+        window_size (int): Розмір вікна
+        test_size (float): Частка тестових даних
+
+    Returns:
+        tuple: ((train_start, train_stop), (test_start, test_stop)) - діапазони індексів i
+    """
+    n_samples = n_rows - window_size
+    if n_samples < 2:
+        raise ValueError(f"Недостатньо даних: {n_rows} рядків для вікна {window_size}")
+    n_test = int(np.ceil(test_size * n_samples))
+    n_train = n_samples - n_test
+    return (window_size, window_size + n_train), (window_size + n_train, n_rows)
+
+def build_window_dataset(
+    features: np.ndarray,
+    targets: np.ndarray,
+    window_size: int,
+    sample_range: tuple,
+    batch_size: int,
+    shuffle_buffer: int = 0,
+    cache: bool = False
+) -> tf.data.Dataset:
+    """
+    Будує tf.data конвеєр, що вирізає вікна з базової матриці на льоту.
+
+    Перемішуються лише індекси семплів (обмеженим буфером), після чого для
+    кожного батчу вікна збираються одним tf.gather у паралельному map.
+
+    Args:
+        features (np.ndarray): Базова матриця ознак (n, n_features)
+        targets (np.ndarray): Цільові значення (n,)
+        window_size (int): Розмір вікна
+        sample_range (tuple): Діапазон індексів семплів [start, stop)
+        batch_size (int): Розмір батчу
+        shuffle_buffer (int): Розмір буфера перемішування (0 - без перемішування)
+        cache (bool): Чи кешувати готові батчі в пам'яті після першої епохи
+
+    Returns:
+        tf.data.Dataset: Батчі (X, y), X має форму (batch, window_size, n_features)
+    """
+    features = tf.convert_to_tensor(features, dtype=tf.float32)
+    targets = tf.convert_to_tensor(targets)
+    offsets = tf.range(-window_size, 0, dtype=tf.int64)
+
+    def cut_windows(ends):
+        rows = ends[:, tf.newaxis] + offsets[tf.newaxis, :]
+        return tf.gather(features, rows), tf.gather(targets, ends)
+
+    dataset = tf.data.Dataset.range(*sample_range)
+    if shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(cut_windows, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle_buffer)
+    if cache:
+        dataset = dataset.cache()
+    return dataset.prefetch(tf.data.AUTOTUNE)
 
 def train_model(
     data_path: str,
@@ -125,7 +354,19 @@ def train_model(
     model_path: str = './models',
     continue_training: bool = False,
     lstm_units: int = 128,
-    pre_generated_data: tuple = None
+    pre_generated_data: tuple = None,
+    callbacks: list = None,
+    profiler: TrainingProfiler = None,
+    budget: TrainingBudget = None,
+    memory_budget_mb: float = None,
+    max_batch_size: int = MAX_BATCH_SIZE,
+    use_tf_data: bool = True,
+    shuffle_buffer: int = 10000,
+    feature_names: tuple = DEFAULT_FEATURES,
+    base_data: tuple = None,
+    sample_ranges: tuple = None,
+    corpus=None,
+    horizon: int = DEFAULT_HORIZON
 ) -> tuple:
     """
     Навчає LSTM модель для прогнозування руху ціни.
@@ -143,25 +384,81 @@ def train_model(
         continue_training (bool): Чи продовжити навчання існуючої моделі
         lstm_units (int): Кількість нейронів у LSTM шарі
         pre_generated_data (tuple): Попередньо згенеровані дані (X, y, scaler)
+        callbacks (list): Додаткові Keras callbacks для model.fit
+        profiler (TrainingProfiler): Профайлер кроків навчання (час обчислення/очікування даних, RSS)
+        budget (TrainingBudget): Бюджет навчання - рання зупинка за val_accuracy, найкращі ваги,
+            зменшення швидкості навчання на плато, обмеження часу; epochs стає верхньою межею
+        memory_budget_mb (float): Бюджет пам'яті на навчання в МБ; якщо задано, batch_size
+            вибирається автоматично (batch_budget.py) - найбільший, що вміщується
+        max_batch_size (int): Верхня межа автоматично вибраного батчу
+        use_tf_data (bool): Вирізати вікна з базової матриці через tf.data замість готових масивів X
+        shuffle_buffer (int): Розмір буфера перемішування навчальних семплів для tf.data
+        feature_names (tuple): Набір ознак з features.py (за замовчуванням OHLCV)
+        base_data (tuple): Вже завантажена базова матриця (features, targets, scaler), напр. memmap
+        sample_ranges (tuple): Власні діапазони семплів ((train_start, train_stop), (test_start, test_stop))
+            замість split_sample_ranges - для walk-forward фолдів
+        corpus (SymbolCorpus): Мультисимвольний корпус (corpus.py); замість data_path -
+            одна модель на всіх символах зі збалансованими батчами
+        horizon (int): Горизонт прогнозу у свічках - колонка target_<horizon> (labels.py)
 
     Returns:
         tuple: (model, history, test_accuracy)
     """
-    # Перевірка чи файл вже був оброблений
-    if is_file_processed(data_path):
+    configure_tensorflow()
+
+    # Перевірка чи файл вже був оброблений (лише для навчання зі збереженням моделі)
+    if corpus is None and save_model and is_file_processed(data_path):
         print(f"[!] Файл {data_path} вже був оброблений раніше. Пропускаємо.")
         return None, None, None
 
-    # === 1. Отримання даних ===
-    if pre_generated_data is not None:
-        X, y, scaler = pre_generated_data
+    # === 1-2. Отримання та розділення даних ===
+    # Датасети будуються функцією від batch_size: після OOM їх перебудовуємо з меншим батчем
+    if corpus is not None:
+        feature_names = corpus.feature_names
+        input_shape = (corpus.window_size, corpus.n_features)
+        n_train = corpus.default_samples_per_symbol() * len(corpus.symbols)
+
+        def make_datasets(batch_size):
+            return {'x': corpus.dataset('train', batch_size), 'shuffle': False}, corpus.dataset('test', batch_size)
+    elif pre_generated_data is not None or not use_tf_data:
+        if pre_generated_data is not None:
+            X, y, scaler = pre_generated_data
+        else:
+            X, y, scaler = generate_lstm_sequences(data_path, window_size, feature_names, horizon)
+
+        from sklearn.model_selection import train_test_split
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=test_size, shuffle=False
+        )
+        input_shape = (X_train.shape[1], X_train.shape[2])
+        n_train = len(X_train)
+
+        def make_datasets(batch_size):
+            return {'x': X_train, 'y': y_train, 'batch_size': batch_size}, (X_test, y_test)
     else:
-        X, y, scaler = generate_lstm_sequences(data_path, window_size)
+        if base_data is not None:
+            features, targets, scaler = base_data
+        else:
+            features, targets, scaler = load_base_matrix(data_path, feature_names, horizon=horizon)
+        if sample_ranges is not None:
+            train_range, test_range = sample_ranges
+        else:
+            train_range, test_range = split_sample_ranges(len(features), window_size, test_size)
+        n_train = train_range[1] - train_range[0]
+        n_test = test_range[1] - test_range[0]
+        cache_validation = n_test * window_size * features.shape[1] * 4 <= VALIDATION_CACHE_LIMIT_MB * 1024 * 1024
+        input_shape = (window_size, features.shape[1])
+        print(f"[>] tf.data: {n_train} навчальних, {n_test} тестових семплів")
 
-    # === 2. Розділення ===
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, shuffle=False
-    )
+        def make_datasets(batch_size):
+            train_dataset = build_window_dataset(
+                features, targets, window_size, train_range, batch_size, shuffle_buffer=shuffle_buffer
+            )
+            validation_data = build_window_dataset(
+                features, targets, window_size, test_range, batch_size, cache=cache_validation
+            )
+            # Перемішування вже зроблено в конвеєрі
+            return {'x': train_dataset, 'shuffle': False}, validation_data
 
     # === 3. Створення або завантаження моделі ===
     if continue_training and os.path.exists(os.path.join(model_path, 'model.keras')):
@@ -170,7 +467,7 @@ def train_model(
     else:
         print("[>] Створюємо нову модель...")
         model = Sequential([
-            Input(shape=(X_train.shape[1], X_train.shape[2])),
+            Input(shape=input_shape),
             LSTM(units=lstm_units, return_sequences=False),
             Dropout(0.2),
             Dense(1, activation='sigmoid')
@@ -185,26 +482,85 @@ def train_model(
         print("[>] Модель створена")
 
     # === 4. Навчання ===
-    history = model.fit(
-        X_train, y_train,
-        epochs=epochs,
-        batch_size=batch_size,
-        validation_data=(X_test, y_test),
-        verbose=1
-    )
+    if memory_budget_mb is not None:
+        lstm_layer = next((layer for layer in model.layers if isinstance(layer, LSTM)), None)
+        batch_size = pick_batch_size(
+            memory_budget_mb,
+            input_shape[0],
+            input_shape[1],
+            lstm_layer.units if lstm_layer is not None else lstm_units,
+            model.count_params(),
+            max_batch_size
+        )
+
+    fit_callbacks = list(callbacks or [])
+    profiler_batch_size = profiler is not None and profiler.batch_size is None
+    if profiler is not None:
+        fit_callbacks.append(profiler)
+    if budget is not None:
+        fit_callbacks.append(budget)
+
+    # Нестача пам'яті не обриває навчання: батч зменшується вдвічі, доки не досягне MIN_BATCH_SIZE.
+    # Повтор стартує з того самого стану ваг і оптимізатора, що й перша спроба
+    if not model.optimizer.built:
+        model.optimizer.build(model.trainable_variables)
+    initial_weights = model.get_weights()
+    initial_optimizer = [variable.numpy() for variable in model.optimizer.variables]
+    while True:
+        fit_data, validation_data = make_datasets(batch_size)
+        if profiler_batch_size:
+            profiler.batch_size = batch_size
+        fit_start = time.perf_counter()
+        try:
+            history = model.fit(
+                **fit_data,
+                epochs=epochs,
+                validation_data=validation_data,
+                callbacks=fit_callbacks,
+                verbose=1
+            )
+            break
+        except Exception as e:
+            if not is_out_of_memory(e) or batch_size <= MIN_BATCH_SIZE:
+                raise
+            batch_size = max(MIN_BATCH_SIZE, batch_size // 2)
+            print(f"[!] Нестача пам'яті під час навчання, повтор з batch_size={batch_size}")
+            model.set_weights(initial_weights)
+            for variable, value in zip(model.optimizer.variables, initial_optimizer):
+                variable.assign(value)
+
+    fit_seconds = time.perf_counter() - fit_start
+    epochs_run = len(history.history['loss'])
+    if fit_seconds > 0:
+        print(f"[✓] batch_size={batch_size}: {n_train * epochs_run / fit_seconds:.0f} семплів/с "
+              f"({epochs_run} епох за {fit_seconds:.1f} с, разом з валідацією)")
 
     # === 5. Оцінка ===
-    loss, accuracy = model.evaluate(X_test, y_test)
+    if isinstance(validation_data, tuple):
+        loss, accuracy = model.evaluate(*validation_data, batch_size=batch_size)
+    else:
+        loss, accuracy = model.evaluate(validation_data)
     print(f'\n\n[✓] Test Accuracy for N={n_days} → {accuracy:.4f}')
 
     # === 6. Збереження моделі ===
     if save_model:
-        save_trained_model(model, model_path)
-        # Зберігаємо інформацію про оброблений файл
-        save_processed_file(data_path)
+        save_trained_model(model, model_path, feature_names)
+        # Зберігаємо інформацію про оброблені файли
+        processed_paths = corpus.data_paths if corpus is not None else [data_path]
+        for processed_path in processed_paths:
+            save_processed_file(processed_path)
+        # Далі символи можна донавчати лише на нових свічках (incremental.py)
+        record_trained_until(
+            processed_paths,
+            model_path,
+            corpus.horizon if corpus is not None else horizon,
+            feature_names,
+            input_shape[0]
+        )
 
     # === 7. Графік ===
     if show_plot:
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(10, 6))
         plt.plot(history.history['accuracy'], label='Train Accuracy')
         plt.plot(history.history['val_accuracy'], label='Test Accuracy')
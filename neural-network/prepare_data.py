@@ -1,45 +1,70 @@
 import pandas as pd
 import os
+from features import add_feature_columns
+from dtype_policy import coerce_frame
+from labels import DEFAULT_HORIZONS, add_label_columns
 
 data_dir = './data'        # Папка з CSV-файлами
-N = 60                    # Кількість годин у майбутнє для прогнозу
+horizons = DEFAULT_HORIZONS  # Горизонти прогнозу у свічках: колонки target_<h> (labels.py)
 expected_columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'trades']
 file_prefix = ''        # Префікс файлів для обробки (наприклад, '_1' для файлів '_1.csv')
+indicators = []           # Індикатори, що зберігаються в CSV, наприклад ['return', 'log_volume', 'rsi_14', 'atr_14']
 
-# === Проходження по кожному файлу ===
-for filename in os.listdir(data_dir):
-    # Перевіряємо чи файл відповідає префіксу та має розширення .csv
-    if filename.endswith(file_prefix + '_1.csv'):
-        file_path = os.path.join(data_dir, filename)
-        print(f"[>] Обробка: {file_path}")
-
-        try:
-            # === 1. Пробуємо прочитати файл з заголовками ===
-            df = pd.read_csv(file_path)
-
-            # === 2. Якщо перший рядок виглядає як дані, а не заголовки — додаємо заголовки ===
-            if not set(expected_columns).issubset(df.columns):
-                print("   [i] Додаємо заголовки...")
-                df = pd.read_csv(file_path, header=None)
-                df.columns = expected_columns
-                df['date'] = pd.to_datetime(df['timestamp'], unit='s')
-            else:
-                if 'date' not in df.columns:
-                    df['date'] = pd.to_datetime(df['timestamp'], unit='s')
-
-            # === 3. Сортуємо по часу (важливо для послідовностей) ===
-            df = df.sort_values('date')
-
-            # === 4. Додаємо future_close і target ===
-            df['future_close'] = df['close'].shift(-N)
-            df['target'] = (df['future_close'] > df['close']).astype(int)
-
-            # === 5. Видаляємо порожні значення ===
-            df = df.dropna()
-
-            # === 6. Зберігаємо файл (перезаписуємо) ===
-            df.to_csv(file_path, index=False)
-            print(f"[✓] Оновлено успішно.")
-
-        except Exception as e:
-            print(f"   [!] Помилка при обробці {filename}: {e}")
+def prepare_data(
+    data_dir: str = data_dir,
+    file_prefix: str = file_prefix,
+    horizons: tuple = horizons,
+    indicators: list = indicators
+) -> None:
+    """
+    Приводить CSV-файли директорії до формату навчання: заголовки, сортування, мітки, індикатори.
+
+    Args:
+        data_dir (str): Папка з CSV-файлами
+        file_prefix (str): Префікс файлів для обробки
+        horizons (tuple): Горизонти міток у свічках
+        indicators (list): Індикатори, що зберігаються в CSV
+    """
+    # === Проходження по кожному файлу ===
+    for filename in os.listdir(data_dir):
+        # Перевіряємо чи файл відповідає префіксу та має розширення .csv
+        if filename.endswith(file_prefix + '_1.csv'):
+            file_path = os.path.join(data_dir, filename)
+            print(f"[>] Обробка: {file_path}")
+
+            try:
+                # === 1. Пробуємо прочитати файл з заголовками ===
+                df = pd.read_csv(file_path)
+
+                # === 2. Якщо перший рядок виглядає як дані, а не заголовки — додаємо заголовки ===
+                if not set(expected_columns).issubset(df.columns):
+                    print("   [i] Додаємо заголовки...")
+                    df = pd.read_csv(file_path, header=None)
+                    df.columns = expected_columns
+
+                # === 3. Сортуємо по часу (важливо для послідовностей) ===
+                # Час зберігається один раз (int64 timestamp): колонка date більше не пишеться
+                df = df.drop(columns=['date'], errors='ignore').sort_values('timestamp', kind='stable')
+
+                # === 4. Мітки всіх горизонтів за один прохід ===
+                # Рядки хвоста без майбутнього лишаються з міткою -1 (для коротших горизонтів вона є);
+                # колонки старого формату (один горизонт) прибираємо
+                df = df.drop(columns=['future_close', 'target'], errors='ignore')
+                df = add_label_columns(df, horizons)
+
+                # === 5. Індикатори (ті самі функції, що й при навчанні та інференсі) ===
+                df = add_feature_columns(df, indicators)
+
+                # === 6. Видаляємо рядки прогріву індикаторів, типи - за dtype_policy ===
+                # Вихідний файл зберігає ціни у float64: float32 - лише в кешах і для Keras
+                df = coerce_frame(df.dropna(), file_path, indicators, source=True)
+
+                # === 7. Зберігаємо файл (перезаписуємо) ===
+                df.to_csv(file_path, index=False)
+                print(f"[✓] Оновлено успішно.")
+
+            except Exception as e:
+                print(f"   [!] Помилка при обробці {filename}: {e}")
+
+if __name__ == '__main__':
+    prepare_data()
@@ -1,34 +1,73 @@
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
+import io
 import os
 import glob
 from pathlib import Path
+from numpy.lib.stride_tricks import sliding_window_view
+from dtype_policy import SOURCE_CSV_DTYPES, TARGET_DTYPE, as_features, as_targets, coerce_frame
+from labels import DEFAULT_HORIZON, add_label_columns, label_horizons, labeled_rows, target_column
+from features import DEFAULT_FEATURES, add_feature_columns, feature_set_tag
 
-def get_sequence_file_path(data_path: str, window_size: int) -> str:
+def get_sequence_file_path(
+    data_path: str,
+    window_size: int,
+    feature_names=DEFAULT_FEATURES,
+    horizon: int = DEFAULT_HORIZON
+) -> str:
     """
     Генерує шлях до файлу з послідовностями на основі шляху до даних та розміру вікна.
     
     Args:
         data_path (str): Шлях до оригінального файлу з даними
         window_size (int): Розмір вікна для послідовностей
+        feature_names: Набір ознак (небазовий набір додає суфікс до імені)
+        horizon (int): Горизонт міток (не типовий горизонт додає суфікс до імені)
         
     Returns:
         str: Шлях до файлу з послідовностями
     """
     data_path = Path(data_path)
-    return str(data_path.parent / f"{data_path.stem}_sequences_{window_size}.npz")
+    horizon_tag = '' if horizon == DEFAULT_HORIZON else f"_h{horizon}"
+    return str(data_path.parent / f"{data_path.stem}_sequences_{window_size}{feature_set_tag(feature_names)}{horizon_tag}.npz")
 
-def generate_and_save_sequences(data_path: str, window_size: int) -> tuple:
+def get_base_matrix_path(data_path: str, feature_names=DEFAULT_FEATURES) -> str:
     """
-    Генерує послідовності для LSTM моделі та зберігає їх у файл.
-    
+    Генерує шлях до файлу з масштабованою базовою матрицею ознак.
+
+    Args:
+        data_path (str): Шлях до оригінального файлу з даними
+        feature_names: Набір ознак (небазовий набір додає суфікс до імені)
+
+    Returns:
+        str: Шлях до файлу з базовою матрицею
+    """
+    data_path = Path(data_path)
+    return str(data_path.parent / f"{data_path.stem}_base{feature_set_tag(feature_names)}.npz")
+
+def read_scaled_features(
+    data_path: str,
+    feature_names=DEFAULT_FEATURES,
+    horizons=(DEFAULT_HORIZON,),
+    keep_timestamp: bool = False
+) -> tuple:
+    """
+    Читає CSV, сортує за часом, рахує ознаки (features.py) та масштабує їх MinMaxScaler.
+
+    Рядки прогріву індикаторів (з NaN) відкидаються. Ціни читаються одразу у
+    float32, тож масштабовані ознаки теж float32 (MinMaxScaler зберігає тип).
+    Мітки беруться з колонок target_<h> (prepare_data.py), а яких немає -
+    обчислюються з close (labels.py).
+
     Args:
         data_path (str): Шлях до CSV файлу з даними
-        window_size (int): Розмір вікна для послідовностей
-        
+        feature_names: Набір ознак
+        horizons: Горизонти міток
+        keep_timestamp (bool): Лишити колонку timestamp (для інкрементного навчання)
+
     Returns:
-        tuple: (X, y, scaler) - послідовності, цільові значення та скалер
+        tuple: (df, scaler) - DataFrame з масштабованими ознаками і колонками target_<h> та скалер
     """
     # Перевірка файлу
     if not os.path.exists(data_path):
@@ -39,7 +78,9 @@ def generate_and_save_sequences(data_path: str, window_size: int) -> tuple:
 
     # === 1. Завантаження CSV ===
     try:
-        df = pd.read_csv(data_path)
+        columns = pd.read_csv(data_path, nrows=0).columns
+        dtypes = dict(SOURCE_CSV_DTYPES, **{target_column(h): TARGET_DTYPE for h in label_horizons(columns)})
+        df = pd.read_csv(data_path, dtype=dtypes)
         if df.empty:
             raise ValueError(f"Файл не містить даних: {data_path}")
     except pd.errors.EmptyDataError:
@@ -47,60 +88,196 @@ def generate_and_save_sequences(data_path: str, window_size: int) -> tuple:
     except Exception as e:
         raise ValueError(f"Помилка при читанні файлу {data_path}: {str(e)}")
 
-    df['date'] = pd.to_datetime(df['timestamp'], unit='s')
-    df = df.sort_values('date')
+    # Час зберігається один раз - int64 timestamp, без окремої колонки дат
+    df = df.sort_values('timestamp', kind='stable')
+
+    # === 2. Мітки (до відкидання рядків: потрібен увесь ряд close) ===
+    label_cols = [target_column(h) for h in horizons]
+    missing = [h for h, col in zip(horizons, label_cols) if col not in df.columns]
+    if missing:
+        add_label_columns(df, missing)
 
-    # === 2. Масштабування ознак ===
-    feature_cols = ['open', 'high', 'low', 'close', 'volume']
+    # === 3. Ознаки та масштабування ===
+    feature_cols = list(feature_names)
+    df = add_feature_columns(df, feature_cols).dropna(subset=feature_cols)
+    coerce_frame(df, data_path, feature_cols)
     scaler = MinMaxScaler()
     df[feature_cols] = scaler.fit_transform(df[feature_cols])
-    df = df[feature_cols + ['target']]
+    df = df[(['timestamp'] if keep_timestamp else []) + feature_cols + label_cols]
 
-    # === 3. Послідовності для LSTM ===
-    X = []
-    y = []
-    total = len(df) - window_size
+    return df, scaler
 
-    for i in range(window_size, len(df)):
-        X.append(df[feature_cols].iloc[i - window_size:i].values)
-        y.append(df['target'].iloc[i])
+def csv_row_offset(data_path: str, row: int, start: int = None) -> int:
+    """
+    Байтовий зсув початку рядка даних CSV.
 
-        # Вивід прогресу на кожному кроці
-        current = i - window_size + 1
-        percentage = (current / total) * 100
-        print(f"\r🔄 Прогрес: {percentage:.3f}%", end="", flush=True)
+    Args:
+        data_path (str): Шлях до CSV файлу
+        row (int): Номер рядка даних, рахуючи від start (0 - сам рядок за зсувом start)
+        start (int): Зсув, з якого рахуються рядки (None - перший рядок після заголовка)
 
-    print("\n✅ Генерація завершена.")
+    Returns:
+        int: Зсув рядка row (або кінця файлу, якщо рядків менше)
+    """
+    with open(data_path, 'rb') as f:
+        header = len(f.readline())
+        offset = header if start is None else max(start, header)
+        f.seek(offset)
+        while row > 0:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            newlines = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == ord('\n'))
+            if len(newlines) >= row:
+                return offset + int(newlines[row - 1]) + 1
+            row -= len(newlines)
+            offset += len(chunk)
+        return offset
+
+def read_csv_tail(data_path: str, offset: int = 0) -> pd.DataFrame:
+    """
+    Читає заголовок CSV і рядки, починаючи з байтового зсуву offset (csv_row_offset).
+
+    Індекс DataFrame - номери рядків від offset, тож їх можна знову перевести в зсув.
+
+    Args:
+        data_path (str): Шлях до CSV файлу
+        offset (int): Зсув початку рядка (0 - увесь файл)
+
+    Returns:
+        pd.DataFrame: Рядки хвоста з типами SOURCE_CSV_DTYPES
+    """
+    with open(data_path, 'rb') as f:
+        header = f.readline()
+        f.seek(max(offset, len(header)))
+        tail = f.read()
+    columns = header.decode().strip().split(',')
+    dtypes = dict(SOURCE_CSV_DTYPES, **{target_column(h): TARGET_DTYPE for h in label_horizons(columns)})
+    return pd.read_csv(io.BytesIO(header + tail), dtype=dtypes)
+
+def load_base_matrix(
+    data_path: str,
+    feature_names=DEFAULT_FEATURES,
+    mmap: bool = False,
+    horizon: int = DEFAULT_HORIZON
+) -> tuple:
+    """
+    Завантажує масштабовану матрицю ознак (n, n_features) без нарізки на вікна.
+
+    Вікна вирізаються з неї вже під час навчання (tf.data), тому один кеш
+    підходить для будь-якого window_size. Кеш перегенеровується, якщо CSV новіший.
+    Матриця ознак лежить в окремому .npy, тож її можна відкрити через memmap.
+    Кеш містить мітки всіх горизонтів з CSV, тож зміна horizon не перечитує дані.
+
+    Args:
+        data_path (str): Шлях до CSV файлу з даними
+        feature_names: Набір ознак
+        mmap (bool): Відкрити матрицю ознак лише для читання через memmap замість читання в пам'ять
+        horizon (int): Горизонт міток
+
+    Returns:
+        tuple: (features, targets, scaler) - матриця ознак float32, цільові значення та скалер;
+            рядки хвоста без мітки горизонту відкинуто
+    """
+    base_file = get_base_matrix_path(data_path, feature_names)
+    features_file = os.path.splitext(base_file)[0] + '.npy'
+
+    if (os.path.exists(base_file) and os.path.exists(features_file)
+            and os.path.getmtime(base_file) >= os.path.getmtime(data_path)):
+        data = np.load(base_file)
+        # Кеш без потрібного горизонту (або старого формату з одним target) перегенеровується
+        if 'horizons' in data and horizon in data['horizons']:
+            scaler = MinMaxScaler()
+            scaler.min_ = data['scaler_min']
+            scaler.scale_ = data['scaler_scale']
+            features = np.load(features_file, mmap_mode='r' if mmap else None)
+            targets = data['labels'][:, list(data['horizons']).index(horizon)]
+            # Кеші, збережені до політики float32/int8, приводяться при читанні
+            return _labeled_prefix(as_features(features, features_file), as_targets(targets, base_file), scaler)
+
+    print(f"[>] Генеруємо базову матрицю ознак для {data_path}")
+    horizons = sorted(set(label_horizons(pd.read_csv(data_path, nrows=0).columns)) | {horizon})
+    df, scaler = read_scaled_features(data_path, feature_names, horizons)
+    features = as_features(df[list(feature_names)].to_numpy(), f"{data_path}: ознаки")
+    labels = as_targets(df[[target_column(h) for h in horizons]].to_numpy(), f"{data_path}: мітки")
+    np.save(features_file, features)
+    # npz пишемо останнім: його час модифікації позначає цілісний кеш
+    np.savez(base_file, labels=labels, horizons=np.array(horizons), scaler_min=scaler.min_, scaler_scale=scaler.scale_)
+    print(f"[✓] Базову матрицю збережено в {features_file}")
+    if mmap:
+        del features
+        features = np.load(features_file, mmap_mode='r')
+    return _labeled_prefix(features, labels[:, horizons.index(horizon)], scaler)
+
+def _labeled_prefix(features: np.ndarray, targets: np.ndarray, scaler) -> tuple:
+    """Відкидає хвіст без мітки (для memmap - без копіювання)."""
+    n_rows = labeled_rows(targets)
+    return features[:n_rows], np.ascontiguousarray(targets[:n_rows]), scaler
+
+def generate_and_save_sequences(
+    data_path: str,
+    window_size: int,
+    feature_names=DEFAULT_FEATURES,
+    horizon: int = DEFAULT_HORIZON
+) -> tuple:
+    """
+    Генерує послідовності для LSTM моделі та зберігає їх у файл.
     
-    # Конвертуємо в numpy масиви
-    X = np.array(X)
-    y = np.array(y)
+    Args:
+        data_path (str): Шлях до CSV файлу з даними
+        window_size (int): Розмір вікна для послідовностей
+        feature_names: Набір ознак
+        horizon (int): Горизонт міток
+        
+    Returns:
+        tuple: (X, y, scaler) - послідовності, цільові значення та скалер
+    """
+    df, scaler = read_scaled_features(data_path, feature_names, (horizon,))
+    feature_cols = list(feature_names)
+
+    # === 4. Послідовності для LSTM ===
+    # Вікно [i - window_size, i) і ціль у рядку i для кожного i >= window_size
+    features, targets, _ = _labeled_prefix(
+        as_features(df[feature_cols].to_numpy(), f"{data_path}: ознаки"),
+        as_targets(df[target_column(horizon)].to_numpy(), f"{data_path}: мітки"),
+        scaler
+    )
+    X = np.ascontiguousarray(sliding_window_view(features, window_size, axis=0)[:-1].transpose(0, 2, 1))
+    y = targets[window_size:]
+    print(f"✅ Генерація завершена: {len(X)} послідовностей.")
     
     # Зберігаємо результати
-    sequence_file = get_sequence_file_path(data_path, window_size)
+    sequence_file = get_sequence_file_path(data_path, window_size, feature_names, horizon)
     np.savez(sequence_file, X=X, y=y, scaler_min=scaler.min_, scaler_scale=scaler.scale_)
     print(f"[✓] Послідовності збережено в {sequence_file}")
     
     return X, y, scaler
 
-def load_sequences(data_path: str, window_size: int) -> tuple:
+def load_sequences(
+    data_path: str,
+    window_size: int,
+    feature_names=DEFAULT_FEATURES,
+    horizon: int = DEFAULT_HORIZON
+) -> tuple:
     """
     Завантажує збережені послідовності або генерує нові, якщо вони не існують.
     
     Args:
         data_path (str): Шлях до CSV файлу з даними
         window_size (int): Розмір вікна для послідовностей
+        feature_names: Набір ознак
+        horizon (int): Горизонт міток
         
     Returns:
         tuple: (X, y, scaler) - послідовності, цільові значення та скалер
     """
-    sequence_file = get_sequence_file_path(data_path, window_size)
+    sequence_file = get_sequence_file_path(data_path, window_size, feature_names, horizon)
     
     if os.path.exists(sequence_file):
         print(f"[>] Завантаження збережених послідовностей з {sequence_file}")
         data = np.load(sequence_file)
-        X = data['X']
-        y = data['y']
+        X = as_features(data['X'], sequence_file)
+        y = as_targets(data['y'], sequence_file)
         
         # Відновлюємо скалер
         scaler = MinMaxScaler()
@@ -111,7 +288,7 @@ def load_sequences(data_path: str, window_size: int) -> tuple:
         return X, y, scaler
     else:
         print(f"[>] Файл з послідовностями не знайдено. Генеруємо нові послідовності...")
-        return generate_and_save_sequences(data_path, window_size)
+        return generate_and_save_sequences(data_path, window_size, feature_names, horizon)
 
 def process_all_sequence_files(data_dir: str, window_sizes: list) -> None:
     """
@@ -0,0 +1,308 @@
+"""
+Stateful-режим LSTM для інференсу: один крок рекурентності на нову свічку.
+
+Навчена модель (LSTM -> Dropout -> Dense) щоразу прокручує все вікно через
+рекурентність. Тут її ваги перебудовуються в покроковий NumPy-інференс:
+стан (h, c) символу зберігається між свічками, тож нова свічка коштує один
+крок LSTM замість window_size.
+
+Стан, що накопичується необмежено довго, відходить від умов навчання (вікно
+з нульового стану), тому раз на reseed_every кроків стан перебудовується
+прокручуванням останнього вікна - O(1) у середньому на свічку.
+
+Експорт і перевірка еквівалентності з Keras:
+    python stateful.py models/model.keras --verify
+"""
+import argparse
+import os
+
+import numpy as np
+
+STATEFUL_FILE = 'stateful.npz'
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # Через tanh - без переповнення exp для великих |x|
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+class StatefulLSTM:
+    """
+    Покроковий NumPy-інференс моделі LSTM -> Dense.
+
+    Порядок гейтів у вагах Keras: input, forget, cell, output.
+    """
+
+    def __init__(self, kernel, recurrent_kernel, bias, dense_kernel, dense_bias, dense_activation: str = 'sigmoid'):
+        """
+        Args:
+            kernel (np.ndarray): Ваги входу LSTM (n_features, 4 * units)
+            recurrent_kernel (np.ndarray): Рекурентні ваги (units, 4 * units)
+            bias (np.ndarray): Зсув LSTM (4 * units,)
+            dense_kernel (np.ndarray): Ваги вихідного шару (units, 1)
+            dense_bias (np.ndarray): Зсув вихідного шару (1,)
+            dense_activation (str): 'sigmoid' або 'linear'
+        """
+        if dense_activation not in ('sigmoid', 'linear'):
+            raise ValueError(f"Непідтримувана активація вихідного шару: {dense_activation}")
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.recurrent_kernel = np.asarray(recurrent_kernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.dense_kernel = np.asarray(dense_kernel, dtype=np.float32)[:, 0]
+        self.dense_bias = float(np.asarray(dense_bias)[0])
+        self.dense_activation = dense_activation
+        self.n_features = self.kernel.shape[0]
+        self.units = self.recurrent_kernel.shape[0]
+
+    @classmethod
+    def from_keras(cls, model) -> 'StatefulLSTM':
+        """
+        Бере ваги з навченої Keras-моделі (Dropout на інференсі не діє і пропускається).
+
+        Raises:
+            ValueError: Архітектура не є LSTM -> Dense з активаціями за замовчуванням
+        """
+        layers = [layer for layer in model.layers if type(layer).__name__ != 'Dropout']
+        if [type(layer).__name__ for layer in layers] != ['LSTM', 'Dense']:
+            raise ValueError("Stateful-режим підтримує лише моделі LSTM -> Dense")
+        lstm, dense = layers
+        config = lstm.get_config()
+        if (config.get('activation') != 'tanh' or config.get('recurrent_activation') != 'sigmoid'
+                or not config.get('use_bias', True) or config.get('go_backwards') or config.get('return_sequences')):
+            raise ValueError("Stateful-режим підтримує лише LSTM з налаштуваннями за замовчуванням")
+        if dense.get_config().get('units') != 1:
+            raise ValueError("Очікується вихідний шар з одним нейроном")
+        kernel, recurrent_kernel, bias = (np.asarray(w) for w in lstm.get_weights())
+        dense_kernel, dense_bias = (np.asarray(w) for w in dense.get_weights())
+        return cls(kernel, recurrent_kernel, bias, dense_kernel, dense_bias, dense.get_config().get('activation'))
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            kernel=self.kernel,
+            recurrent_kernel=self.recurrent_kernel,
+            bias=self.bias,
+            dense_kernel=self.dense_kernel[:, np.newaxis],
+            dense_bias=np.array([self.dense_bias], dtype=np.float32),
+            dense_activation=np.array(self.dense_activation),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'StatefulLSTM':
+        with np.load(path) as data:
+            return cls(
+                data['kernel'], data['recurrent_kernel'], data['bias'],
+                data['dense_kernel'], data['dense_bias'], str(data['dense_activation'])
+            )
+
+    def zero_state(self, batch: int = 1) -> tuple:
+        """Початковий стан (h, c) форми (batch, units)."""
+        return (np.zeros((batch, self.units), dtype=np.float32),
+                np.zeros((batch, self.units), dtype=np.float32))
+
+    def step(self, x: np.ndarray, h: np.ndarray, c: np.ndarray) -> tuple:
+        """
+        Один крок LSTM для батчу символів.
+
+        Args:
+            x (np.ndarray): Масштабовані ознаки (batch, n_features)
+            h (np.ndarray): Прихований стан (batch, units)
+            c (np.ndarray): Стан комірки (batch, units)
+
+        Returns:
+            tuple: Новий (h, c)
+        """
+        return self._cell(x @ self.kernel + h @ self.recurrent_kernel + self.bias, c)
+
+    def _cell(self, z: np.ndarray, c: np.ndarray) -> tuple:
+        u = self.units
+        i = _sigmoid(z[:, :u])
+        f = _sigmoid(z[:, u:2 * u])
+        g = np.tanh(z[:, 2 * u:3 * u])
+        o = _sigmoid(z[:, 3 * u:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        return h.astype(np.float32, copy=False), c.astype(np.float32, copy=False)
+
+    def replay(self, sequences: np.ndarray, state: tuple = None) -> tuple:
+        """
+        Прокручує послідовності через LSTM (за замовчуванням з нульового стану).
+
+        Args:
+            sequences (np.ndarray): (batch, steps, n_features) або (steps, n_features)
+            state (tuple): Початковий (h, c)
+
+        Returns:
+            tuple: Стан (h, c) після останнього кроку
+        """
+        if sequences.ndim == 2:
+            sequences = sequences[np.newaxis]
+        h, c = state if state is not None else self.zero_state(len(sequences))
+        # Вхідна проєкція всіх кроків одним множенням матриць
+        projected = sequences @ self.kernel
+        for t in range(sequences.shape[1]):
+            h, c = self._cell(projected[:, t] + h @ self.recurrent_kernel + self.bias, c)
+        return h, c
+
+    def output(self, h: np.ndarray) -> np.ndarray:
+        """Вихід моделі (batch,) за прихованим станом."""
+        y = h @ self.dense_kernel + self.dense_bias
+        return _sigmoid(y) if self.dense_activation == 'sigmoid' else y
+
+    def predict_series(self, scaled: np.ndarray, window_size: int, reseed_every: int = None) -> np.ndarray:
+        """
+        Прогнози для кожної позиції ряду з перенесенням стану між свічками.
+
+        Перший прогноз (після window_size рядків) і кожен reseed_every-й
+        рахуються з нуля по останньому вікну і збігаються з віконною моделлю;
+        між ними стан оновлюється одним кроком на рядок.
+
+        Args:
+            scaled (np.ndarray): Масштабовані ознаки (n, n_features)
+            window_size (int): Розмір вікна моделі
+            reseed_every (int): Кроків до перебудови стану (за замовчуванням window_size)
+
+        Returns:
+            np.ndarray: Прогнози (n - window_size + 1,) для вікон, що закінчуються в рядках window_size-1..n-1
+        """
+        reseed_every = reseed_every or window_size
+        scaled = np.asarray(scaled, dtype=np.float32)
+        n_outputs = len(scaled) - window_size + 1
+        outputs = np.empty(max(n_outputs, 0), dtype=np.float32)
+        h = c = None
+        for k in range(n_outputs):
+            end = window_size + k
+            if k % (reseed_every + 1) == 0:
+                h, c = self.replay(scaled[end - window_size:end])
+            else:
+                h, c = self.step(scaled[end - 1:end], h, c)
+            outputs[k] = self.output(h)[0]
+        return outputs
+
+
+class StateStore:
+    """
+    Компактне сховище станів символів для стрімінгу.
+
+    На символ - один рядок суцільних масивів: поточний стан (h, c), стан до
+    останньої свічки (щоб оновлення незакритої свічки переобчислювало крок, а
+    не робило новий), параметри масштабування та лічильник кроків від перебудови.
+    """
+
+    H, C, BASE_H, BASE_C = range(4)
+
+    def __init__(self, units: int, n_features: int, capacity: int = 16):
+        self.index = {}
+        self.states = np.zeros((capacity, 4, units), dtype=np.float32)
+        self.scale = np.zeros((capacity, 2, n_features), dtype=np.float32)  # data_min, data_range
+        self.steps = np.zeros(capacity, dtype=np.int64)
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def slot(self, symbol: str) -> int:
+        """Рядок символу (створюється за потреби, масиви подвоюються при заповненні)."""
+        slot = self.index.get(symbol)
+        if slot is not None:
+            return slot
+        if not self._free:
+            capacity = len(self.steps)
+            self.states = np.concatenate([self.states, np.zeros_like(self.states)])
+            self.scale = np.concatenate([self.scale, np.zeros_like(self.scale)])
+            self.steps = np.concatenate([self.steps, np.zeros_like(self.steps)])
+            self._free = list(range(2 * capacity - 1, capacity - 1, -1))
+        slot = self.index[symbol] = self._free.pop()
+        return slot
+
+    def remove(self, symbol: str) -> None:
+        slot = self.index.pop(symbol, None)
+        if slot is not None:
+            self._free.append(slot)
+
+
+def keras_outputs(model, sequences: np.ndarray) -> np.ndarray:
+    """
+    Еталон: ті самі послідовності через шари Keras (будь-яка довжина).
+
+    Args:
+        model: Keras-модель LSTM -> Dense
+        sequences (np.ndarray): (batch, steps, n_features)
+
+    Returns:
+        np.ndarray: Виходи моделі (batch,)
+    """
+    x = sequences.astype(np.float32)
+    for layer in model.layers:
+        if type(layer).__name__ != 'Dropout':
+            x = layer(x)
+    return np.asarray(x)[:, 0]
+
+
+def verify(model, lstm: StatefulLSTM, window_size: int, n_sequences: int = 64, seed: int = 0) -> dict:
+    """
+    Перевіряє еквівалентність покрокового інференсу і Keras.
+
+    Порівнює: прокручування вікна з моделлю (model(X)), а також покрокові
+    оновлення стану на довших послідовностях з прокручуванням їх цілком.
+
+    Args:
+        model: Keras-модель
+        lstm (StatefulLSTM): Покроковий інференс
+        window_size (int): Розмір вікна моделі
+        n_sequences (int): Кількість випадкових послідовностей
+        seed (int): Зерно генератора
+
+    Returns:
+        dict: Максимальні абсолютні розбіжності window_error і stream_error
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.random((n_sequences, window_size, lstm.n_features), dtype=np.float32)
+    expected = np.asarray(model(X, training=False))[:, 0]
+    window_error = float(np.abs(lstm.output(lstm.replay(X)[0]) - expected).max())
+
+    long = rng.random((n_sequences, 2 * window_size, lstm.n_features), dtype=np.float32)
+    h, c = lstm.replay(long[:, :window_size])
+    for t in range(window_size, long.shape[1]):
+        h, c = lstm.step(long[:, t], h, c)
+    stream_error = float(np.abs(lstm.output(h) - keras_outputs(model, long)).max())
+    return {'window_error': window_error, 'stream_error': stream_error}
+
+
+def export_stateful(model_path: str, check: bool = False, atol: float = 1e-5) -> str:
+    """
+    Зберігає ваги покрокового інференсу в stateful.npz поруч із моделлю.
+
+    Args:
+        model_path (str): Шлях до model.keras
+        check (bool): Перевірити еквівалентність з Keras перед збереженням
+        atol (float): Допустима розбіжність прогнозів
+
+    Returns:
+        str: Шлях до stateful.npz
+    """
+    from tensorflow import keras
+
+    model = keras.models.load_model(model_path)
+    lstm = StatefulLSTM.from_keras(model)
+    if check:
+        errors = verify(model, lstm, window_size=model.input_shape[1])
+        print(f"[>] Розбіжність з Keras: вікно {errors['window_error']:.2e}, "
+              f"покроково {errors['stream_error']:.2e}")
+        if max(errors.values()) > atol:
+            raise ValueError(f"Покроковий інференс розходиться з Keras більше ніж на {atol}")
+    output_path = os.path.join(os.path.dirname(model_path), STATEFUL_FILE)
+    lstm.save(output_path)
+    print(f"[✓] Stateful-ваги збережено в {output_path} ({lstm.units} нейронів)")
+    return output_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Експорт LSTM у покроковий stateful-інференс')
+    parser.add_argument('model_path', nargs='?', default='models/model.keras')
+    parser.add_argument('--verify', action='store_true', help='Перевірити еквівалентність з Keras')
+    args = parser.parse_args()
+    export_stateful(args.model_path, check=args.verify)
@@ -0,0 +1,150 @@
+import time
+
+import numpy as np
+from tensorflow.keras.callbacks import Callback
+
+
+class TrainingBudget(Callback):
+    """
+    Контроль бюджету навчання: рання зупинка, відновлення найкращих ваг,
+    зменшення швидкості навчання на плато та обмеження за часом.
+
+    epochs у model.fit стає верхньою межею: навчання зупиняється, коли
+    monitor не покращується patience епох, або коли наступна епоха вже не
+    вміститься в time_limit. Наприкінці модель отримує ваги найкращої епохи,
+    а не останньої. Зведення (скільки епох зекономлено і чому) - summary().
+    """
+
+    def __init__(
+        self,
+        monitor: str = 'val_accuracy',
+        patience: int = 5,
+        min_delta: float = 1e-3,
+        restore_best_weights: bool = True,
+        lr_patience: int = 2,
+        lr_factor: float = 0.5,
+        min_lr: float = 1e-5,
+        time_limit: float = None,
+        verbose: bool = True
+    ):
+        """
+        Args:
+            monitor (str): Метрика з логів епохи ('val_accuracy', 'val_loss', ...)
+            patience (int): Епох без покращення до зупинки (None - без ранньої зупинки)
+            min_delta (float): Мінімальна зміна, що вважається покращенням
+            restore_best_weights (bool): Повернути ваги найкращої епохи наприкінці
+            lr_patience (int): Епох без покращення до зменшення швидкості навчання (None - вимкнено)
+            lr_factor (float): Множник швидкості навчання на плато
+            min_lr (float): Нижня межа швидкості навчання
+            time_limit (float): Обмеження часу навчання в секундах (None - без обмеження)
+            verbose (bool): Друкувати рішення і зведення
+        """
+        super().__init__()
+        self.monitor = monitor
+        self.patience = patience
+        self.min_delta = abs(min_delta)
+        self.restore_best_weights = restore_best_weights
+        self.lr_patience = lr_patience
+        self.lr_factor = lr_factor
+        self.min_lr = min_lr
+        self.time_limit = time_limit
+        self.verbose = verbose
+        # Для точності більше - краще, для втрат - менше
+        self._sign = 1.0 if 'acc' in monitor else -1.0
+
+    def on_train_begin(self, logs=None):
+        self.best = None
+        self.best_epoch = None
+        self.best_weights = None
+        self.epochs_run = 0
+        self.stop_reason = 'epochs'
+        self.lr_reductions = 0
+        self._wait = 0
+        self._lr_wait = 0
+        self.seconds = 0.0
+        self._start = time.perf_counter()
+        self._epoch_seconds = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        # Жорстка межа: епоха, що затягнулась, зупиняється посередині
+        if self.time_limit is not None and time.perf_counter() - self._start > self.time_limit:
+            self._stop('time_limit')
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epochs_run = epoch + 1
+        self._epoch_seconds.append(time.perf_counter() - self._epoch_start)
+        current = (logs or {}).get(self.monitor)
+        if current is None:
+            if self.verbose:
+                print(f"[!] TrainingBudget: метрики {self.monitor} немає в логах епохи")
+            return
+
+        if self.best is None or self._sign * (current - self.best) > self.min_delta:
+            self.best, self.best_epoch = float(current), epoch + 1
+            self._wait = self._lr_wait = 0
+            if self.restore_best_weights:
+                self.best_weights = self.model.get_weights()
+        else:
+            self._wait += 1
+            self._lr_wait += 1
+            if self.lr_patience is not None and self._lr_wait >= self.lr_patience:
+                self._reduce_lr()
+            if self.patience is not None and self._wait >= self.patience:
+                self._stop('early_stopping')
+
+        if self.time_limit is not None and not self.model.stop_training:
+            # Наступна епоха не вміститься: не починаємо її
+            elapsed = time.perf_counter() - self._start
+            if elapsed + np.mean(self._epoch_seconds) > self.time_limit:
+                self._stop('time_limit')
+
+    def on_train_end(self, logs=None):
+        self.seconds = time.perf_counter() - self._start
+        if self.best_weights is not None and self.best_epoch != self.epochs_run:
+            self.model.set_weights(self.best_weights)
+            if self.verbose:
+                print(f"[>] TrainingBudget: відновлено ваги епохи {self.best_epoch}")
+        self.best_weights = None
+        if self.verbose:
+            summary = self.summary()
+            best = f"{summary['best']:.4f}" if summary['best'] is not None else '-'
+            print(f"[✓] Бюджет навчання: {summary['epochs_run']}/{summary['planned_epochs']} епох "
+                  f"(зекономлено {summary['epochs_saved']}, причина: {summary['stop_reason']}), "
+                  f"найкраща епоха {summary['best_epoch']} ({self.monitor}={best}), "
+                  f"{summary['seconds']:.1f} с")
+
+    def _stop(self, reason: str) -> None:
+        if not self.model.stop_training:
+            self.model.stop_training = True
+            self.stop_reason = reason
+
+    def _reduce_lr(self) -> None:
+        learning_rate = self.model.optimizer.learning_rate
+        # Розклад (LearningRateSchedule) не змінюємо - лише змінну швидкості навчання
+        if not hasattr(learning_rate, 'assign'):
+            return
+        old_lr = float(np.asarray(learning_rate))
+        new_lr = max(old_lr * self.lr_factor, self.min_lr)
+        if new_lr < old_lr:
+            learning_rate.assign(new_lr)
+            self.lr_reductions += 1
+            if self.verbose:
+                print(f"[>] TrainingBudget: швидкість навчання {old_lr:.2e} -> {new_lr:.2e}")
+        self._lr_wait = 0
+
+    def summary(self) -> dict:
+        """Зведення останнього навчання: заплановані/виконані/зекономлені епохи, найкраща епоха, причина зупинки."""
+        planned = self.params.get('epochs') if self.params else None
+        return {
+            'planned_epochs': planned,
+            'epochs_run': self.epochs_run,
+            'epochs_saved': planned - self.epochs_run if planned else 0,
+            'best_epoch': self.best_epoch,
+            'best': self.best,
+            'stop_reason': self.stop_reason,
+            'lr_reductions': self.lr_reductions,
+            'seconds': self.seconds,
+        }
@@ -0,0 +1,140 @@
+import json
+import resource
+import sys
+import time
+from array import array
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.callbacks import Callback
+
+
+def peak_rss_mb() -> float:
+    """Пікова резидентна пам'ять процесу в МБ (ru_maxrss: КБ на Linux, байти на macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class TrainingProfiler(Callback):
+    """
+    Профілювання навчання по батчах.
+
+    Для кожного кроку записує час обчислення (від on_train_batch_begin до
+    on_train_batch_end) і час очікування даних (від кінця попереднього кроку
+    до початку поточного - там Keras дістає наступний батч). Наприкінці епохи
+    друкує зведення: перцентилі кроку, частку очікування, семпли/с та пікову RSS.
+
+    Якщо задано trace_dir і trace_steps=(start, stop), кроки з цього діапазону
+    (глобальна нумерація) записуються TensorBoard-профайлером.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = None,
+        trace_dir: str = None,
+        trace_steps: tuple = None,
+        input_bound_threshold: float = 0.3,
+        verbose: bool = True
+    ):
+        """
+        Args:
+            batch_size (int): Розмір батчу для підрахунку семплів/с (train_model задає сам)
+            trace_dir (str): Директорія для TensorBoard-трейсу
+            trace_steps (tuple): Діапазон глобальних кроків (start, stop) для трейсу
+            input_bound_threshold (float): Частка очікування, вище якої епоха вважається input-bound
+            verbose (bool): Чи друкувати зведення після кожної епохи
+        """
+        super().__init__()
+        self.batch_size = batch_size
+        self.trace_dir = trace_dir
+        self.trace_steps = trace_steps
+        self.input_bound_threshold = input_bound_threshold
+        self.verbose = verbose
+
+        self.compute_times = array('d')
+        self.wait_times = array('d')
+        self.epochs = []
+        self._global_step = 0
+        self._tracing = False
+
+    def on_train_begin(self, logs=None):
+        self._last_batch_end = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_first_step = len(self.compute_times)
+        self._epoch_start = time.perf_counter()
+        # Очікування першого батчу епохи рахуємо від її початку
+        self._last_batch_end = self._epoch_start
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.trace_dir and self.trace_steps and self._global_step == self.trace_steps[0]:
+            tf.profiler.experimental.start(self.trace_dir)
+            self._tracing = True
+
+        self._batch_start = time.perf_counter()
+        self.wait_times.append(self._batch_start - self._last_batch_end)
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._last_batch_end = time.perf_counter()
+        self.compute_times.append(self._last_batch_end - self._batch_start)
+        self._global_step += 1
+
+        if self._tracing and self._global_step >= self.trace_steps[1]:
+            self._stop_trace()
+
+    def on_epoch_end(self, epoch, logs=None):
+        first = self._epoch_first_step
+        compute = np.frombuffer(self.compute_times, dtype=np.float64)[first:]
+        wait = np.frombuffer(self.wait_times, dtype=np.float64)[first:]
+        if len(compute) == 0:
+            return
+
+        step_total = compute.sum() + wait.sum()
+        wait_fraction = float(wait.sum() / step_total) if step_total else 0.0
+        stats = {
+            'epoch': epoch + 1,
+            'steps': int(len(compute)),
+            'epoch_seconds': time.perf_counter() - self._epoch_start,
+            'step_ms_p50': float(np.percentile(compute + wait, 50) * 1000),
+            'step_ms_p95': float(np.percentile(compute + wait, 95) * 1000),
+            'compute_ms_mean': float(compute.mean() * 1000),
+            'wait_ms_mean': float(wait.mean() * 1000),
+            'wait_fraction': wait_fraction,
+            'samples_per_sec': float(len(compute) * self.batch_size / step_total) if self.batch_size else None,
+            'peak_rss_mb': peak_rss_mb(),
+            'input_bound': wait_fraction > self.input_bound_threshold,
+        }
+        self.epochs.append(stats)
+
+        if self.verbose:
+            throughput = f"{stats['samples_per_sec']:.0f} семплів/с | " if self.batch_size else ''
+            verdict = 'input pipeline' if stats['input_bound'] else 'обчислення'
+            print(
+                f"[⏱] Епоха {stats['epoch']}: крок p50={stats['step_ms_p50']:.1f} мс "
+                f"p95={stats['step_ms_p95']:.1f} мс | очікування даних {wait_fraction * 100:.1f}% | "
+                f"{throughput}пік RSS {stats['peak_rss_mb']:.0f} МБ | обмежує: {verdict}"
+            )
+
+    def on_train_end(self, logs=None):
+        if self._tracing:
+            self._stop_trace()
+
+    def _stop_trace(self):
+        tf.profiler.experimental.stop()
+        self._tracing = False
+        if self.verbose:
+            print(f"[✓] Трейс кроків {self.trace_steps[0]}-{self._global_step} збережено в {self.trace_dir}")
+
+    def summary(self) -> dict:
+        """Зведення по всіх епохах та сирі часи кроків (мс)."""
+        return {
+            'batch_size': self.batch_size,
+            'epochs': self.epochs,
+            'compute_ms': [t * 1000 for t in self.compute_times],
+            'wait_ms': [t * 1000 for t in self.wait_times],
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+        print(f"[✓] Профіль навчання збережено в {path}")
@@ -0,0 +1,205 @@
+"""
+Walk-forward крос-валідація для часових рядів.
+
+Фолди - це лише діапазони індексів семплів над однією базовою матрицею
+(load_base_matrix): процеси-воркери відкривають її кеш .npy через memmap,
+тож дані не копіюються на кожен фолд.
+
+Приклад:
+    from walk_forward import cross_validate
+    summary = cross_validate('data/BTCUSD_1.csv', n_folds=5, window_size=30, epochs=10)
+"""
+import multiprocessing
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from features import DEFAULT_FEATURES
+from labels import DEFAULT_HORIZON
+from model_trainer import train_model
+from training_budget import TrainingBudget
+from sequence_processor import load_base_matrix
+
+
+def walk_forward_folds(
+    n_rows: int,
+    window_size: int,
+    n_folds: int = 5,
+    mode: str = 'expanding',
+    gap: int = DEFAULT_HORIZON
+) -> list:
+    """
+    Будує K фолдів walk-forward над семплами базової матриці.
+
+    Семпли [window_size, n_rows) діляться на n_folds + 1 рівних блоків: перший
+    блок - початкова навчальна частина, кожен наступний по черзі стає тестовим.
+    Семпл з індексом i - вікно рядків [i - window_size, i) і ціль у рядку i,
+    як у split_sample_ranges.
+
+    Args:
+        n_rows (int): Кількість рядків базової матриці
+        window_size (int): Розмір вікна
+        n_folds (int): Кількість фолдів
+        mode (str): 'expanding' - навчання на всій історії до тесту,
+            'rolling' - на ковзному відрізку довжиною в один блок
+        gap (int): Кількість семплів між навчальною і тестовою частиною; ціль семпла
+            дивиться на horizon свічок уперед, тож gap не менший за горизонт міток
+            не дає цілям навчальних семплів заглядати в тестовий період
+
+    Returns:
+        list: [((train_start, train_stop), (test_start, test_stop)), ...]
+    """
+    if mode not in ('expanding', 'rolling'):
+        raise ValueError(f"Невідомий режим walk-forward: {mode}")
+
+    n_samples = n_rows - window_size
+    block = n_samples // (n_folds + 1)
+    if block < 1 or block <= gap:
+        raise ValueError(f"Недостатньо даних: {n_samples} семплів для {n_folds} фолдів (gap={gap})")
+
+    folds = []
+    for k in range(1, n_folds + 1):
+        test_start = window_size + k * block
+        # Останній фолд забирає залишок від ділення
+        test_stop = n_rows if k == n_folds else test_start + block
+        train_stop = test_start - gap
+        train_start = window_size if mode == 'expanding' else max(window_size, train_stop - block)
+        folds.append(((train_start, train_stop), (test_start, test_stop)))
+    return folds
+
+
+def _init_worker(threads: int) -> None:
+    """Ділить ядра між процесами-воркерами (до першої TF-операції в процесі)."""
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def mean_history(histories: list) -> dict:
+    """
+    Середня історія навчання по фолдах: для кожної епохи - середнє по фолдах,
+    що до неї дійшли (рання зупинка робить історії різної довжини).
+
+    Args:
+        histories (list): [{'accuracy': [...], 'val_accuracy': [...]}, ...]
+
+    Returns:
+        dict: {'accuracy': [...], 'val_accuracy': [...]}
+    """
+    result = {}
+    for metric in ('accuracy', 'val_accuracy'):
+        series = [history[metric] for history in histories]
+        longest = max((len(values) for values in series), default=0)
+        result[metric] = [
+            float(np.mean([values[epoch] for values in series if epoch < len(values)]))
+            for epoch in range(longest)
+        ]
+    return result
+
+
+def _run_fold(args) -> dict:
+    fold, data_path, train_range, test_range, train_params = args
+    # Бюджет передається як параметри: у кожному фолді (і процесі) - свій екземпляр колбека.
+    # Копія: з processes=1 той самий словник train_params спільний для всіх фолдів
+    train_params = dict(train_params)
+    budget_params = train_params.pop('budget_params', None)
+    budget = TrainingBudget(**budget_params) if budget_params is not None else None
+    # Той самий файл у всіх процесах; сторінки спільні через page cache
+    base_data = load_base_matrix(data_path, train_params['feature_names'], mmap=True, horizon=train_params['horizon'])
+
+    model, history, accuracy = train_model(
+        data_path=data_path,
+        base_data=base_data,
+        sample_ranges=(train_range, test_range),
+        show_plot=False,
+        save_model=False,
+        budget=budget,
+        **train_params
+    )
+    val_accuracy = history.history['val_accuracy']
+    result = {
+        'fold': fold,
+        'train_samples': train_range[1] - train_range[0],
+        'test_samples': test_range[1] - test_range[0],
+        'final_accuracy': float(accuracy),
+        'best_val_accuracy': float(max(val_accuracy)),
+        'best_epoch': int(np.argmax(val_accuracy)) + 1,
+        'epochs_run': len(val_accuracy),
+        'history': {
+            'accuracy': [float(v) for v in history.history['accuracy']],
+            'val_accuracy': [float(v) for v in val_accuracy],
+        },
+    }
+    print(f"[✓] Фолд {fold}: train={result['train_samples']}, test={result['test_samples']}, "
+          f"accuracy={result['final_accuracy']:.4f}")
+    return result
+
+
+def cross_validate(
+    data_path: str,
+    n_folds: int = 5,
+    mode: str = 'expanding',
+    gap: int = None,
+    processes: int = None,
+    feature_names: tuple = DEFAULT_FEATURES,
+    window_size: int = 30,
+    horizon: int = DEFAULT_HORIZON,
+    budget_params: dict = None,
+    **train_params
+) -> dict:
+    """
+    Навчає модель на кожному walk-forward фолді та агрегує метрики.
+
+    Args:
+        data_path (str): Шлях до CSV файлу з даними
+        n_folds (int): Кількість фолдів
+        mode (str): 'expanding' або 'rolling'
+        gap (int): Кількість семплів між навчальною і тестовою частиною (None - horizon)
+        processes (int): Кількість процесів (1 - фолди по черзі в поточному процесі)
+        feature_names (tuple): Набір ознак
+        window_size (int): Розмір вікна
+        horizon (int): Горизонт міток (labels.py)
+        budget_params (dict): Параметри TrainingBudget для кожного фолду (None - повні epochs)
+        **train_params: Параметри train_model (epochs, batch_size, lstm_units, ...)
+
+    Returns:
+        dict: Середні метрики по фолдах у форматі результатів find_optimal_params
+            (final_accuracy, best_val_accuracy, best_epoch, epochs_run, history - mean_history)
+            плюс accuracy_std, n_folds
+    """
+    # Генерує кеш базової матриці один раз, до запуску воркерів
+    features, _, _ = load_base_matrix(data_path, feature_names, mmap=True, horizon=horizon)
+    folds = walk_forward_folds(len(features), window_size, n_folds, mode, horizon if gap is None else gap)
+    del features
+    if processes is None:
+        processes = min(n_folds, max(1, (os.cpu_count() or 1) // 2))
+    print(f"[>] Walk-forward ({mode}): {n_folds} фолдів, процесів: {processes}")
+
+    train_params = dict(
+        train_params, window_size=window_size, feature_names=feature_names, horizon=horizon, budget_params=budget_params
+    )
+    args_list = [
+        (fold, data_path, train_range, test_range, train_params)
+        for fold, (train_range, test_range) in enumerate(folds, 1)
+    ]
+    if processes == 1:
+        fold_results = [_run_fold(args) for args in args_list]
+    else:
+        # spawn: TF-рантайм батьківського процесу не можна безпечно ділити через fork
+        threads = max(1, (os.cpu_count() or 1) // processes)
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(processes, initializer=_init_worker, initargs=(threads,)) as pool:
+            fold_results = pool.map(_run_fold, args_list)
+
+    accuracies = np.array([r['final_accuracy'] for r in fold_results])
+    summary = {
+        'final_accuracy': float(accuracies.mean()),
+        'best_val_accuracy': float(np.mean([r['best_val_accuracy'] for r in fold_results])),
+        'best_epoch': int(np.median([r['best_epoch'] for r in fold_results])),
+        'epochs_run': float(np.mean([r['epochs_run'] for r in fold_results])),
+        'accuracy_std': float(accuracies.std()),
+        'n_folds': len(fold_results),
+        'history': mean_history([r['history'] for r in fold_results]),
+    }
+    print(f"[✓] Walk-forward accuracy: {summary['final_accuracy']:.4f} ± {summary['accuracy_std']:.4f}")
+    return summary
@@ -1,15 +1,97 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import uvicorn
-import numpy as np
-import sys
-import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow import keras
+import asyncio
+import hmac
+import json
+import logging
 import os
-sys.path.append("../neural-network")
+import time
+from payload import (
+    CONTENT_TYPE_JSON,
+    CONTENT_TYPE_MSGPACK,
+    UnsupportedContentType,
+    decode_float32,
+    decode_msgpack,
+    negotiate_content_type,
+)
+from predictor import CryptoPredictor, configure_tf_threads
+from metrics import (
+    CONTENT_TYPE_LATEST as METRICS_CONTENT_TYPE,
+    INFLIGHT_REQUESTS,
+    PREDICT_REQUESTS,
+    PREDICT_STAGE_SECONDS,
+    PROFILE_RUNS,
+    STREAM_SUBSCRIBERS,
+    render as render_metrics,
+)
+from candles import source_from_env
+from inference import InferenceExecutor, InferenceOverloaded, InferenceTimeout
+from model_pool import ModelPool, is_valid_key
+from profiling import MAX_PROFILE_SECONDS, AllocationTracker, ProfilerBusy, StackSampler
+from streaming import PredictionHub, TooManySymbols, UnknownSymbol, WindowNotReady
+
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger("api")
 
-app = FastAPI()
+# Предиктор створюється в lifespan, тобто в кожному воркері вже після fork:
+# TF-рантайм не можна безпечно ділити між процесами через fork
+predictor = None
+pool = None
+inference = None
+hub = None
+candle_source = source_from_env()
+# Токен для /admin/*; без нього ендпоінти профілювання вимкнені (404)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global predictor, pool, inference, hub
+    configure_tf_threads(int(os.environ.get("API_WORKERS", "1")))
+    predictor = CryptoPredictor(os.environ.get("MODEL_PATH", "model/model.keras"))
+    # Моделі символів: MODELS_DIR/<SYMBOL>/model.keras, решта символів - глобальна модель
+    pool = ModelPool(
+        predictor,
+        models_dir=os.environ.get("MODELS_DIR", "models"),
+        memory_budget_mb=float(os.environ.get("MODEL_POOL_MEMORY_MB", "256")),
+        prefetch_top=int(os.environ.get("MODEL_POOL_PREFETCH_TOP", "3")),
+        prefetch_interval=float(os.environ.get("MODEL_POOL_PREFETCH_SECONDS", "60")),
+    )
+    pool.start()
+    # Прогноз виконується в окремому обмеженому пулі потоків, а не в event loop
+    inference = InferenceExecutor(
+        threads=int(os.environ.get("INFERENCE_THREADS", "1")),
+        queue_limit=int(os.environ.get("INFERENCE_QUEUE_LIMIT", "32")),
+        timeout=float(os.environ.get("PREDICT_TIMEOUT_SECONDS", "5")),
+    )
+    # STREAM_SYMBOLS=BTCUSDT,ETHUSDT: дозволені символи (разом із моделями MODELS_DIR);
+    # без нього приймається будь-який символ формату Binance, у межах STREAM_MAX_SYMBOLS
+    allowed_symbols = {symbol.strip().upper() for symbol in os.environ.get("STREAM_SYMBOLS", "").split(",") if symbol.strip()}
+    # STREAM_STATEFUL=1: один крок LSTM на свічку замість прокручування вікна
+    hub = PredictionHub(
+        predictor,
+        inference,
+        stateful=os.environ.get("STREAM_STATEFUL", "0") == "1",
+        reseed_every=int(os.environ.get("STREAM_RESEED_EVERY", "0")) or None,
+        verify=os.environ.get("STREAM_STATEFUL_VERIFY", "0") == "1",
+        watch_seconds=float(os.environ.get("PREDICT_WATCH_SECONDS", "600")),
+        allowed_symbols=(allowed_symbols | pool.symbols()) if allowed_symbols else None,
+        max_symbols=int(os.environ.get("STREAM_MAX_SYMBOLS", "64")),
+    )
+    if candle_source is not None:
+        logger.info("Стрімінг прогнозів: %s", type(candle_source).__name__)
+        hub.start(candle_source)
+    yield
+    await hub.stop()
+    await pool.stop()
+    inference.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # Дозволяємо CORS для локальної розробки
 app.add_middleware(
@@ -20,145 +102,302 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class CryptoPredictor:
-    def __init__(self, model_path: str = 'model/model.keras'):
-        """
-        Ініціалізація предиктора.
-        
-        Args:
-            model_path (str): Шлях до збереженої моделі
-        """
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Модель не знайдено за шляхом: {model_path}")
-            
-        self.model = keras.models.load_model(model_path)
-        self.scaler = MinMaxScaler()
-        self.window_size = 30  # Змінено на 30, щоб відповідати вхідним даним
-        print(f"Ініціалізовано CryptoPredictor з window_size={self.window_size}")
-        
-    def prepare_data(self, df: pd.DataFrame) -> np.ndarray:
-        """
-        Підготовка даних для прогнозування.
-        
-        Args:
-            df (pd.DataFrame): DataFrame з даними
-            
-        Returns:
-            np.ndarray: Підготовлені дані для моделі
-        """
-        print(f"prepare_data: отримано {len(df)} рядків даних")
-        print(f"prepare_data: window_size={self.window_size}")
-        
-        if len(df) < self.window_size:
-            raise ValueError(f"Недостатньо даних. Потрібно мінімум {self.window_size} точок, отримано {len(df)}")
-            
-        # Вибір потрібних колонок
-        feature_cols = ['open', 'high', 'low', 'close', 'volume']
-        print(f"prepare_data: використовуємо колонки {feature_cols}")
-        
-        # Нормалізація даних
-        scaled_data = self.scaler.fit_transform(df[feature_cols])
-        print(f"prepare_data: розмір scaled_data={scaled_data.shape}")
-        
-        # Створення послідовності для прогнозування
-        try:
-            X = scaled_data[-self.window_size:].reshape(1, self.window_size, len(feature_cols))
-            print(f"prepare_data: успішно створено X з розміром {X.shape}")
-            return X
-        except Exception as e:
-            print(f"Помилка при reshape: {str(e)}")
-            print(f"Розмір scaled_data: {scaled_data.shape}")
-            print(f"Спроба reshape в: (1, {self.window_size}, {len(feature_cols)})")
-            raise
-    
-    def predict(self, df: pd.DataFrame) -> float:
-        """
-        Прогнозування на основі даних.
-        
-        Args:
-            df (pd.DataFrame): DataFrame з даними
-            
-        Returns:
-            float: Прогнозована ціна
-        """
-        print("predict: початок прогнозування")
-        # Підготовка даних
-        X = self.prepare_data(df)
-        
-        # Прогнозування
-        prediction = self.model.predict(X)
-        print(f"predict: отримано прогноз {prediction}")
-        
-        return float(prediction[0][0])
-
-# Створюємо глобальний екземпляр предиктора
-predictor = CryptoPredictor()
+@app.get("/health")
+async def health():
+    return {"status": "ok", "pid": os.getpid()}
 
-@app.post("/predict")
-async def predict(request: Request):
-    print("=== Початок запиту ===")
+def prediction_response(predicted_price: float, symbol: str, timestamp: int = None) -> dict:
+    response = {
+        "prediction": {
+            "willRise": predicted_price,
+            "currencyPair": {
+                "name": symbol
+            }
+        }
+    }
+    if timestamp is not None:
+        response["timestamp"] = timestamp
+    return response
+
+def observe_stage(stage: str, start: float) -> float:
+    """Записує тривалість етапу /predict і повертає поточний момент часу."""
+    now = time.perf_counter()
+    PREDICT_STAGE_SECONDS.labels(stage).observe(now - start)
+    return now
+
+def serialize(content: dict, status_code: int = 200, headers: dict = None) -> JSONResponse:
+    start = time.perf_counter()
+    response = JSONResponse(status_code=status_code, content=content, headers=headers)
+    observe_stage("serialize", start)
+    return response
+
+def request_symbol(symbol) -> str:
+    """
+    Перевіряє символ з тіла або параметрів запиту до звернення до пулу моделей.
+
+    Raises:
+        UnknownSymbol: Символ не рядок або має неправильний формат (400)
+    """
+    if not is_valid_key(symbol):
+        raise UnknownSymbol(f"Некоректний символ: {str(symbol)[:32]!r}")
+    return symbol
+
+async def predict_compact(request: Request, content_type: str) -> dict:
+    """
+    Обробка компактних форматів: сирий float32 або msgpack.
+
+    Для float32 символ передається через query-параметр symbol або заголовок X-Symbol.
+
+    Returns:
+        dict: Тіло відповіді
+    """
+    start = time.perf_counter()
+    body = await request.body()
+    array_start = observe_stage("parse", start)
+    if content_type == CONTENT_TYPE_MSGPACK:
+        symbol, values = decode_msgpack(body)
+    else:
+        symbol = request.query_params.get("symbol") or request.headers.get("x-symbol", "unknown")
+        values = decode_float32(body)
+    symbol = request_symbol(symbol)
+    preprocess = observe_stage("array", array_start) - array_start
+    logger.debug("Символ: %s, кількість точок даних: %d (%s)", symbol, len(values), content_type)
+
+    model_start = time.perf_counter()
+    model = await pool.acquire(symbol)
+    observe_stage("model", model_start)
+
+    # Отримання моделі й очікування в черзі інференсу не входять у бюджет препроцесингу
+    def run_prediction():
+        return model.predict_array(values, time.perf_counter() - preprocess)
+
+    return prediction_response(await inference.run(run_prediction), symbol)
+
+async def predict_json(request: Request) -> dict:
+    """
+    Обробка JSON-формату {symbol, prices: [{open, high, low, close, volume}, ...]}.
+
+    Returns:
+        dict: Тіло відповіді
+    """
+    start = time.perf_counter()
     data = await request.json()
-    print(data)
-    # Отримуємо дані
-    symbol = data.get("symbol", "unknown")
+    observe_stage("parse", start)
+    symbol = request_symbol(data.get("symbol", "unknown"))
     prices_data = data.get("prices", [])
-    print(f"Символ: {symbol}")
-    print(f"Кількість точок даних: {len(prices_data)}")
-    
+    logger.debug("Символ: %s, кількість точок даних: %d", symbol, len(prices_data))
+
+    model_start = time.perf_counter()
+    model = await pool.acquire(symbol)
+    observe_stage("model", model_start)
+    return prediction_response(await inference.run(model.predict_rows, prices_data), symbol)
+
+async def predict_window(symbol: str, history: int = 0) -> dict:
+    """
+    Прогноз за буфером свічок символу на сервері (джерело CANDLE_SOURCE), без даних від клієнта.
+
+    Args:
+        symbol (str): Символ
+        history (int): Скільки останніх цін закриття з буфера додати у відповідь (поле history)
+
+    Returns:
+        dict: Тіло відповіді з часом останньої свічки вікна
+    """
+    # Перевірка до пулу моделей і буферів: символ приходить від клієнта
+    hub.check_symbols([symbol])
+    model_start = time.perf_counter()
+    model = await pool.acquire(symbol)
+    observe_stage("model", model_start)
+    predicted_price, timestamp = await hub.predict_symbol(symbol, model)
+    response = prediction_response(predicted_price, symbol, timestamp)
+    if history > 0:
+        response["history"] = hub.recent_closes(symbol, history)
+    return response
+
+def has_body(request: Request) -> bool:
+    return request.headers.get("content-length", "0") != "0" or "transfer-encoding" in request.headers
+
+@app.post("/predict")
+async def predict(request: Request):
+    # /predict?symbol=BTCUSDT без тіла - вікно з буфера свічок на сервері
+    symbol = request.query_params.get("symbol")
+    if symbol and not has_body(request):
+        return await predict_symbol(symbol)
+
     try:
-        # Створюємо DataFrame з даними
-        df = pd.DataFrame(prices_data)
-        print(f"Створено DataFrame з розміром {df.shape}")
-        
-        # Перевіряємо наявність всіх необхідних колонок
-        required_cols = ['open', 'high', 'low', 'close', 'volume']
-        for col in required_cols:
-            if col not in df.columns:
-                raise ValueError(f"Відсутня колонка {col} в даних")
-        
-        # Перевіряємо кількість даних
-        if len(df) < predictor.window_size:
-            raise ValueError(f"Недостатньо даних. Потрібно мінімум {predictor.window_size} точок, отримано {len(df)}")
-        
-        # Отримання прогнозу
-        predicted_price = predictor.predict(df)
-
-        return {
-            "prediction": {
-                "willRise": predicted_price,
-                "currencyPair": {
-                    "name": symbol
-                }
-            }
-        }
-        
-        # Отримання останньої ціни
-        # last_price = df["close"].iloc[-1]
-        
-        # # Визначення напрямку руху ціни
-        # will_rise = predicted_price > last_price
-        
-        # # Розрахунок відсоткової зміни
-        # price_change_percent = ((predicted_price - last_price) / last_price) * 100
-        
-        # # Розрахунок впевненості на основі відсоткової зміни
-        # confidence = min(abs(price_change_percent) / 2, 0.95)  # Максимум 95% впевненості
-        
-        # result = {
-        #     "prediction": {
-        #         "willRise": will_rise,
-        #         "confidence": confidence,
-        #         "predictedPrice": round(float(predicted_price), 2),
-        #         "priceChangePercent": round(price_change_percent, 2),
-        #         "lastPrice": round(float(last_price), 2)
-        #     }
-        # }
-        # print("Результат:", result)
-        # return result
-        
-    except Exception as e:
-        print("Помилка при обробці даних:", str(e))
-        return {"prediction": {"error": f"Error processing data: {str(e)}"}}
+        content_type = negotiate_content_type(request.headers.get("content-type"))
+    except UnsupportedContentType as e:
+        PREDICT_REQUESTS.labels("unknown", "unsupported").inc()
+        return serialize({"prediction": {"error": str(e)}}, status_code=415)
+
+    if content_type == CONTENT_TYPE_JSON:
+        return await respond(content_type, predict_json(request))
+    return await respond(content_type, predict_compact(request, content_type))
+
+@app.get("/predict")
+async def predict_symbol(symbol: str, history: int = 0):
+    """
+    Прогноз за останніми свічками символу з буфера сервера: GET /predict?symbol=BTCUSDT.
+
+    Символ ставиться на оновлення джерелом свічок; поки вікно не заповнене - 503 з Retry-After.
+    З history=N відповідь містить і N останніх цін закриття з буфера (для графіка клієнта).
+    """
+    if candle_source is None:
+        PREDICT_REQUESTS.labels("window", "unsupported").inc()
+        return serialize({"prediction": {"error": "Джерело свічок не налаштовано (CANDLE_SOURCE)"}}, status_code=503)
+    return await respond("window", predict_window(symbol.strip().upper(), history))
+
+async def respond(content_type: str, prediction) -> JSONResponse:
+    """
+    Виконує прогноз і перетворює результат або помилку на відповідь /predict.
+
+    Args:
+        content_type (str): Формат запиту (мітка метрик)
+        prediction: Корутина, що повертає тіло відповіді
+    """
+    with INFLIGHT_REQUESTS.track_inprogress():
+        try:
+            content = await prediction
+        except WindowNotReady as e:
+            PREDICT_REQUESTS.labels(content_type, "not_ready").inc()
+            return serialize({"prediction": {"error": str(e)}}, status_code=503, headers={"Retry-After": "5"})
+        except UnknownSymbol as e:
+            PREDICT_REQUESTS.labels(content_type, "invalid").inc()
+            return serialize({"prediction": {"error": str(e)}}, status_code=400)
+        except TooManySymbols as e:
+            PREDICT_REQUESTS.labels(content_type, "rejected").inc()
+            return serialize({"prediction": {"error": str(e)}}, status_code=503, headers={"Retry-After": "60"})
+        except UnsupportedContentType as e:
+            PREDICT_REQUESTS.labels(content_type, "unsupported").inc()
+            return serialize({"prediction": {"error": str(e)}}, status_code=415)
+        except InferenceOverloaded as e:
+            PREDICT_REQUESTS.labels(content_type, "rejected").inc()
+            return serialize({"prediction": {"error": str(e)}}, status_code=503, headers={"Retry-After": "1"})
+        except InferenceTimeout as e:
+            logger.warning("Таймаут прогнозу: %s", str(e))
+            PREDICT_REQUESTS.labels(content_type, "timeout").inc()
+            return serialize({"prediction": {"error": str(e)}}, status_code=504)
+        except Exception as e:
+            logger.warning("Помилка при обробці даних: %s", str(e))
+            PREDICT_REQUESTS.labels(content_type, "error").inc()
+            return serialize({"prediction": {"error": f"Error processing data: {str(e)}"}})
+
+        PREDICT_REQUESTS.labels(content_type, "ok").inc()
+        return serialize(content)
+
+@app.get("/metrics")
+async def metrics():
+    """Метрики у форматі Prometheus (окремо для кожного воркера)."""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+def admin_denied(request: Request):
+    """Відповідь з помилкою, якщо запит не має доступу до /admin, інакше None."""
+    if not ADMIN_TOKEN:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    token = request.headers.get("x-admin-token", "")
+    authorization = request.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return JSONResponse(status_code=403, content={"error": "Невірний токен адміністратора"})
+    return None
+
+@app.get("/admin/profile")
+async def admin_profile(
+    request: Request,
+    seconds: float = 10.0,
+    interval: float = 0.005,
+    format: str = "collapsed",
+    idle: bool = False,
+    top: int = 25
+):
+    """
+    Семплювання стеків усіх потоків воркера протягом seconds (не більше MAX_PROFILE_SECONDS).
+
+    format=collapsed - текст для flamegraph.pl/speedscope, format=json - зведення по функціях.
+    Профілюється лише воркер, що отримав запит (pid у заголовку X-Worker-Pid).
+    Приклад: curl -H "X-Admin-Token: $ADMIN_TOKEN" "localhost:8000/admin/profile?seconds=30" > stacks.txt
+    """
+    denied = admin_denied(request)
+    if denied is not None:
+        return denied
+    if format not in ("collapsed", "json"):
+        return JSONResponse(status_code=400, content={"error": "format: collapsed або json"})
+    seconds = min(max(seconds, 0.0), MAX_PROFILE_SECONDS)
+
+    sampler = StackSampler(interval=max(interval, 0.001), include_idle=idle)
+    try:
+        sampler.start()
+    except ProfilerBusy as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+    PROFILE_RUNS.labels("stacks").inc()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+
+    headers = {"X-Worker-Pid": str(os.getpid())}
+    if format == "json":
+        return JSONResponse(content=sampler.summary(top), headers=headers)
+    return Response(content=sampler.collapsed(), media_type="text/plain", headers=headers)
+
+@app.get("/admin/memory")
+async def admin_memory(request: Request, seconds: float = 10.0, top: int = 25, frames: int = 1):
+    """
+    Приріст пам'яті за вікно seconds за місцями виділення (tracemalloc вмикається лише на вікно).
+
+    frames - глибина traceback виділень; більше 1 - групування за повним traceback.
+    """
+    denied = admin_denied(request)
+    if denied is not None:
+        return denied
+    seconds = min(max(seconds, 0.0), MAX_PROFILE_SECONDS)
+
+    tracker = AllocationTracker(frames=min(max(frames, 1), 64))
+    try:
+        tracker.start()
+    except ProfilerBusy as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+    PROFILE_RUNS.labels("memory").inc()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        report = tracker.stop(top)
+    return JSONResponse(content={"pid": os.getpid(), "seconds": seconds, **report})
+
+@app.get("/stream")
+async def stream(symbols: str):
+    """
+    Server-sent events: прогноз для кожної нової свічки підписаних символів.
+
+    Приклад: GET /stream?symbols=BTCUSDT,ETHUSDT
+    """
+    if candle_source is None:
+        return JSONResponse(status_code=503, content={"error": "Джерело свічок не налаштовано (CANDLE_SOURCE)"})
+
+    symbol_list = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols.split(",") if symbol.strip()))
+    try:
+        queue = hub.subscribe(symbol_list)
+    except UnknownSymbol as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except TooManySymbols as e:
+        return JSONResponse(status_code=503, content={"error": str(e)}, headers={"Retry-After": "60"})
+    STREAM_SUBSCRIBERS.inc()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(message)}\n\n"
+        finally:
+            hub.unsubscribe(queue)
+            STREAM_SUBSCRIBERS.dec()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,138 @@
+"""
+Бенчмарк масштабування /predict за кількістю воркерів на одній машині.
+
+Для кожного значення --workers запускає gunicorn з gunicorn.conf.py,
+навантажує /predict конкурентними запитами у форматі float32 і виводить
+пропускну здатність та перцентилі затримки.
+
+Приклад:
+    python benchmark_workers.py --workers 1 2 4 --concurrency 16 --duration 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+
+def wait_ready(url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.5)
+    raise TimeoutError(f"API не запустився за {timeout} секунд")
+
+
+def load_test(url: str, body: bytes, concurrency: int, duration: float) -> dict:
+    """
+    Надсилає запити з concurrency потоків протягом duration секунд.
+
+    Returns:
+        dict: requests, errors, rps, p50_ms, p95_ms, p99_ms
+    """
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    deadline = time.perf_counter() + duration
+    request_url = f"{url}/predict?symbol=BENCH"
+
+    def worker(k: int) -> None:
+        while time.perf_counter() < deadline:
+            request = urllib.request.Request(
+                request_url, data=body, headers={"Content-Type": "application/x-ohlcv-f32"}
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    payload = json.load(response)
+                if "error" in payload.get("prediction", {}):
+                    errors[k] += 1
+                    continue
+            except OSError:
+                errors[k] += 1
+                continue
+            latencies[k].append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = np.array([lat for per_thread in latencies for lat in per_thread]) * 1000
+    if len(all_latencies) == 0:
+        all_latencies = np.array([np.nan])
+    return {
+        "requests": int(np.isfinite(all_latencies).sum()),
+        "errors": int(sum(errors)),
+        "rps": float(np.isfinite(all_latencies).sum() / elapsed),
+        "p50_ms": float(np.percentile(all_latencies, 50)),
+        "p95_ms": float(np.percentile(all_latencies, 95)),
+        "p99_ms": float(np.percentile(all_latencies, 99)),
+    }
+
+
+def run_with_workers(workers: int, port: int, args) -> dict:
+    env = dict(os.environ, API_WORKERS=str(workers), API_BIND=f"127.0.0.1:{port}", LOG_LEVEL="WARNING")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "api:app"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(url, args.startup_timeout)
+        body = (np.random.rand(args.rows, 5).astype('<f4') * 100).tobytes()
+        # Прогрів: перший виклик моделі в кожному воркері значно повільніший
+        load_test(url, body, args.concurrency, min(3.0, args.duration))
+        result = load_test(url, body, args.concurrency, args.duration)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    result["workers"] = workers
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--rows", type=int, default=30, help="Кількість свічок у запиті")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Зберегти результати у JSON")
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        print(f"[>] Воркерів: {workers}")
+        result = run_with_workers(workers, args.port, args)
+        results.append(result)
+        print(f"    {result['rps']:.1f} req/s, p50={result['p50_ms']:.1f} мс, "
+              f"p99={result['p99_ms']:.1f} мс, помилок: {result['errors']}")
+
+    base_rps = results[0]["rps"] or float("nan")
+    print("\nworkers | req/s    | speedup | p50 ms | p99 ms")
+    for result in results:
+        print(f"{result['workers']:7d} | {result['rps']:8.1f} | {result['rps'] / base_rps:7.2f} | "
+              f"{result['p50_ms']:6.1f} | {result['p99_ms']:6.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[✓] Результати збережено в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
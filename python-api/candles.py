@@ -0,0 +1,195 @@
+import asyncio
+import csv
+import json
+import logging
+import os
+import urllib.request
+from typing import Callable, Iterable, NamedTuple
+
+import numpy as np
+
+from payload import FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+class Candle(NamedTuple):
+    symbol: str
+    timestamp: int
+    values: tuple  # open, high, low, close, volume
+
+
+class CandleBuffer:
+    """
+    Кільцевий буфер останніх свічок одного символу.
+
+    Кожен рядок пишеться двічі (у позиції i та i + capacity), тому останні
+    capacity свічок завжди лежать у пам'яті суцільно і view() не копіює дані.
+    """
+
+    def __init__(self, capacity: int, n_features: int = len(FEATURE_COLUMNS)):
+        self.capacity = capacity
+        self._values = np.zeros((2 * capacity, n_features), dtype=np.float32)
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._next = 0
+        self.size = 0
+
+    @property
+    def last_timestamp(self) -> int:
+        if self.size == 0:
+            return -1
+        return int(self._timestamps[self._next - 1 + self.capacity])
+
+    def append(self, timestamp: int, values: Iterable[float]) -> None:
+        """
+        Додає свічку; свічка з тим самим timestamp, що й остання, замінює її.
+
+        Args:
+            timestamp (int): Час відкриття свічки
+            values (Iterable[float]): open, high, low, close, volume
+        """
+        if self.size and timestamp == self.last_timestamp:
+            slot = (self._next - 1) % self.capacity
+        else:
+            slot = self._next
+            self._next = (self._next + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+        self._values[slot] = values
+        self._values[slot + self.capacity] = self._values[slot]
+        self._timestamps[slot] = self._timestamps[slot + self.capacity] = timestamp
+
+    def view(self) -> np.ndarray:
+        """Останні size свічок у хронологічному порядку (без копіювання)."""
+        end = self._next + self.capacity
+        return self._values[end - self.size:end]
+
+    def timestamps(self) -> np.ndarray:
+        end = self._next + self.capacity
+        return self._timestamps[end - self.size:end]
+
+
+class ReplayCandleSource:
+    """
+    Локальне джерело свічок: програє CSV-файли з колонками timestamp, open, high, low, close, volume.
+
+    Символ береться з імені файлу до першого '_' (BTCUSDT_1m_20250531.csv -> BTCUSDT).
+    """
+
+    def __init__(self, paths: list, interval: float = 1.0, loop: bool = False):
+        self.paths = paths
+        self.interval = interval
+        self.loop = loop
+
+    @staticmethod
+    def symbol_from_path(path: str) -> str:
+        return os.path.basename(path).split('_', 1)[0].split('.', 1)[0]
+
+    @staticmethod
+    def read_csv(path: str) -> list:
+        with open(path, newline='') as f:
+            return [
+                (int(float(row['timestamp'])), tuple(float(row[col]) for col in FEATURE_COLUMNS))
+                for row in csv.DictReader(f)
+            ]
+
+    async def stream(self, symbols: Callable[[], set] = None):
+        """
+        Повертає свічки всіх файлів поперемінно, по одній на символ за інтервал.
+
+        Args:
+            symbols (Callable, optional): Не використовується; усі файли програються завжди
+        """
+        series = {self.symbol_from_path(path): self.read_csv(path) for path in self.paths}
+        logger.info("Replay: %s", {symbol: len(rows) for symbol, rows in series.items()})
+
+        while True:
+            longest = max((len(rows) for rows in series.values()), default=0)
+            for i in range(longest):
+                for symbol, rows in series.items():
+                    if i < len(rows):
+                        timestamp, values = rows[i]
+                        yield Candle(symbol, timestamp, values)
+                if self.interval > 0:
+                    await asyncio.sleep(self.interval)
+                else:
+                    await asyncio.sleep(0)
+            if not self.loop:
+                return
+
+
+class BinanceCandleSource:
+    """
+    Живе джерело: опитує публічний REST Binance і повертає лише закриті свічки.
+
+    Опитуються тільки символи, на які зараз є підписники або запити /predict
+    (PredictionHub перевіряє їх до того, як вони потрапляють у цей список).
+    Під час першого опитування символу завантажується history закритих свічок,
+    щоб буфер одразу заповнився (PredictionHub.start піднімає history до
+    розміру свого буфера). Символ, що випав зі списку, забувається: якщо він
+    повернеться, історія завантажиться знову.
+    """
+
+    KLINES_URL = 'https://api.binance.com/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}'
+    MAX_LIMIT = 1000
+
+    def __init__(self, interval: str = '1m', poll_seconds: float = 5.0, history: int = 0):
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self.history = history
+        self._last_open = {}
+
+    def _fetch_closed(self, symbol: str) -> list:
+        # Нові символи - з історією, далі - лише остання закрита свічка
+        limit = 2 if symbol in self._last_open else min(self.history + 1, self.MAX_LIMIT)
+        url = self.KLINES_URL.format(symbol=symbol, interval=self.interval, limit=max(limit, 2))
+        with urllib.request.urlopen(url, timeout=10) as response:
+            klines = json.load(response)
+        # Останній рядок - свічка, що ще формується
+        return [
+            Candle(symbol, int(k[0]) // 1000, tuple(float(v) for v in k[1:6]))
+            for k in klines[:-1]
+        ]
+
+    async def stream(self, symbols: Callable[[], set]):
+        while True:
+            active = symbols()
+            for symbol in set(self._last_open) - active:
+                del self._last_open[symbol]
+            for symbol in sorted(active):
+                try:
+                    candles = await asyncio.to_thread(self._fetch_closed, symbol)
+                except Exception as e:
+                    logger.warning("Не вдалося отримати свічки %s: %s", symbol, str(e))
+                    continue
+                for candle in candles:
+                    if candle.timestamp > self._last_open.get(symbol, -1):
+                        self._last_open[symbol] = candle.timestamp
+                        yield candle
+            await asyncio.sleep(self.poll_seconds)
+
+
+def source_from_env():
+    """
+    Створює джерело свічок зі змінної оточення CANDLE_SOURCE.
+
+    Формати: "replay:file1.csv,file2.csv" або "binance[:interval]". Порожнє значення - без стрімінгу.
+    """
+    spec = os.environ.get("CANDLE_SOURCE", "").strip()
+    if not spec:
+        return None
+
+    kind, _, arg = spec.partition(':')
+    if kind == 'replay':
+        paths = [path for path in arg.split(',') if path]
+        return ReplayCandleSource(
+            paths,
+            interval=float(os.environ.get("REPLAY_INTERVAL", "1.0")),
+            loop=os.environ.get("REPLAY_LOOP", "0") == "1",
+        )
+    if kind == 'binance':
+        return BinanceCandleSource(
+            interval=arg or '1m',
+            poll_seconds=float(os.environ.get("BINANCE_POLL_SECONDS", "5")),
+            history=int(os.environ.get("BINANCE_HISTORY", "0")),
+        )
+    raise ValueError(f"Невідоме джерело свічок: {spec}")
@@ -0,0 +1,26 @@
+# Багатопроцесний режим API: gunicorn -c gunicorn.conf.py api:app
+#
+# preload_app імпортує api (а з ним tensorflow, numpy, fastapi) один раз у
+# майстер-процесі, тож код і дані модулів діляться між воркерами через
+# copy-on-write. Модель завантажується вже у воркері (lifespan в api.py), а
+# кількість потоків TF на воркер = доступні ядра / API_WORKERS.
+import os
+
+workers = int(os.environ.get("API_WORKERS", "1"))
+# api.py читає API_WORKERS для розрахунку потоків TF - тримаємо значення узгодженим
+os.environ["API_WORKERS"] = str(workers)
+
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = os.environ.get("API_BIND", "0.0.0.0:8000")
+preload_app = True
+timeout = int(os.environ.get("API_WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+
+def on_starting(server):
+    server.log.info("API_WORKERS=%d, ядер: %d", workers, cpus)
+    if workers > cpus:
+        server.log.warning("API_WORKERS=%d перевищує кількість ядер (%d), потоки TF будуть обмежені до 1", workers, cpus)
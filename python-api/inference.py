@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import (
+    INFERENCE_PENDING,
+    INFERENCE_REJECTED,
+    INFERENCE_TIMEOUTS,
+    PREDICT_STAGE_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceOverloaded(Exception):
+    """Черга інференсу заповнена - запит відхиляється одразу (503)."""
+
+
+class InferenceTimeout(Exception):
+    """Прогноз не вклався в таймаут запиту (504)."""
+
+
+class InferenceExecutor:
+    """
+    Обмежений пул потоків для CPU-роботи прогнозу.
+
+    Event loop лише ставить задачу в пул і чекає результат, тож /health і
+    інші запити не стоять за інференсом. Кількість задач у роботі та в черзі
+    обмежена: понад ліміт run() одразу кидає InferenceOverloaded, а не
+    накопичує чергу, через яку росла б затримка всіх запитів.
+    """
+
+    def __init__(self, threads: int = 1, queue_limit: int = 32, timeout: float = 5.0):
+        """
+        Args:
+            threads (int): Кількість потоків інференсу
+            queue_limit (int): Максимум задач, що чекають на вільний потік
+            timeout (float): Таймаут очікування результату на запит, с (0 - без таймауту)
+        """
+        self.threads = threads
+        self.max_pending = threads + queue_limit
+        self.timeout = timeout or None
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='inference')
+        # Змінюється лише з потоку event loop, тому без блокувань
+        self._pending = 0
+        INFERENCE_PENDING.set_function(lambda: self._pending)
+
+    @property
+    def pending(self) -> int:
+        """Задачі в роботі та в черзі."""
+        return self._pending
+
+    def _release(self, _future) -> None:
+        self._pending -= 1
+
+    async def run(self, function, *args):
+        """
+        Виконує function(*args) у пулі інференсу.
+
+        Args:
+            function: CPU-функція (наприклад, predictor.predict_array)
+            *args: Її аргументи
+
+        Returns:
+            Результат function
+
+        Raises:
+            InferenceOverloaded: Черга заповнена
+            InferenceTimeout: Результат не отримано за timeout секунд
+        """
+        if self._pending >= self.max_pending:
+            INFERENCE_REJECTED.inc()
+            raise InferenceOverloaded(f"Сервер перевантажено: {self._pending} запитів у черзі інференсу")
+
+        submitted = time.perf_counter()
+
+        def task():
+            PREDICT_STAGE_SECONDS.labels('queue').observe(time.perf_counter() - submitted)
+            return function(*args)
+
+        loop = asyncio.get_running_loop()
+        future = self._executor.submit(task)
+        self._pending += 1
+        # Слот звільняється, коли задача справді завершилась (або знята з черги),
+        # а не коли клієнт перестав чекати - інакше таймаути переповнили б пул
+        future.add_done_callback(lambda f: self._release_threadsafe(loop, f))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            INFERENCE_TIMEOUTS.inc()
+            raise InferenceTimeout(f"Прогноз не вклався в {self.timeout:g} с")
+
+    def _release_threadsafe(self, loop, future) -> None:
+        # Викликається з потоку пулу; після shutdown(wait=False) event loop може бути вже закритий
+        if loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._release, future)
+        except RuntimeError:
+            # Loop закрився між перевіркою і викликом
+            pass
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
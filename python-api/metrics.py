@@ -0,0 +1,306 @@
+import bisect
+import os
+from abc import ABC, abstractmethod
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+# Межі гістограм для етапів /predict: від 10 мкс до 5 с
+STAGE_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+
+
+def _escape_label_value(value: str) -> str:
+    """Екранування значення мітки за текстовим форматом Prometheus: зворотна коса риска, лапки, перенос рядка."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """Базовий клас метрики з підтримкою міток (labels), як у prometheus_client."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self.labels()
+        _registry.append(self)
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        """Дочірня метрика без міток."""
+        return self.labels()
+
+    @abstractmethod
+    def _new_child(self):
+        """Нова дочірня метрика для одного набору значень міток."""
+
+    def collect(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.samples(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._value = 0.0
+        self._function = None
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def set_function(self, function) -> None:
+        """Значення обчислюється під час збору метрик."""
+        self._function = function
+
+    def get(self) -> float:
+        return self._function() if self._function is not None else self._value
+
+    def samples(self, name, labelnames, values):
+        return [f'{name}{_format_labels(labelnames, values)} {_format_value(self.get())}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def set_function(self, function) -> None:
+        self._default().set_function(function)
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def set_function(self, function) -> None:
+        self._default().set_function(function)
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple):
+        self._upper_bounds = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._upper_bounds + (float('inf'),), self._counts):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f'{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}')
+        lines.append(f'{name}_count{_format_labels(labelnames, values)} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labelnames, values)} {_format_value(self._sum)}')
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = STAGE_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+def render() -> str:
+    """Усі зареєстровані метрики у текстовому форматі Prometheus."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return '\n'.join(lines) + '\n'
+
+
+def _rss_bytes() -> float:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Не Linux: ru_maxrss - пікове значення (на macOS у байтах)
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+# === Метрики API ===
+
+PREDICT_STAGE_SECONDS = Histogram(
+    'predict_stage_seconds',
+    'Тривалість етапів /predict: parse, array, model, queue, scale, forward, serialize',
+    labelnames=('stage',),
+)
+PREDICT_REQUESTS = Counter(
+    'predict_requests_total',
+    'Кількість запитів /predict за форматом і результатом',
+    labelnames=('content_type', 'status'),
+)
+PREPROCESS_BUDGET_EXCEEDED = Counter(
+    'predict_preprocess_budget_exceeded_total',
+    'Запити, де фаза до моделі перевищила PREPROCESS_BUDGET_US',
+)
+INFLIGHT_REQUESTS = Gauge(
+    'predict_inflight_requests',
+    'Запити /predict, що обробляються зараз',
+)
+STREAM_SUBSCRIBERS = Gauge(
+    'stream_subscribers',
+    'Активні SSE-підписники',
+)
+STREAM_PREDICTIONS = Counter(
+    'stream_predictions_total',
+    'Прогнози, пораховані стрімінгом (по одному на символ і свічку)',
+)
+STREAM_STATEFUL_ERROR = Histogram(
+    'stream_stateful_error',
+    'Розбіжність stateful-прогнозу з віконною моделлю на тому самому вікні (STREAM_STATEFUL_VERIFY)',
+    buckets=(1e-7, 1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 0.1),
+)
+PREDICT_WINDOW_CACHE = Counter(
+    'predict_window_cache_total',
+    '/predict за символом без свічок: hit (прогноз останньої свічки вже є), computed (з буфера), miss (вікно не заповнене)',
+    labelnames=('result',),
+)
+STREAM_DELIVERIES = Counter(
+    'stream_deliveries_total',
+    'Повідомлення, розіслані підписникам стрімінгу',
+)
+PROCESS_RESIDENT_MEMORY = Gauge(
+    'process_resident_memory_bytes',
+    'Резидентна пам\'ять процесу',
+)
+PROCESS_RESIDENT_MEMORY.set_function(_rss_bytes)
+PROCESS_CPU_SECONDS = Counter(
+    'process_cpu_seconds_total',
+    'Процесорний час процесу (user + system)',
+)
+PROCESS_CPU_SECONDS.set_function(_cpu_seconds)
+MODEL_LOAD_SECONDS = Histogram(
+    'model_pool_load_seconds',
+    'Час завантаження моделі символу в пул',
+)
+MODEL_POOL_REQUESTS = Counter(
+    'model_pool_requests_total',
+    'Звернення до пулу моделей: hit, miss (завантаження), fallback (глобальна модель)',
+    labelnames=('result',),
+)
+MODEL_POOL_EVICTIONS = Counter(
+    'model_pool_evictions_total',
+    'Моделі, витіснені з пулу через ліміт пам\'яті (LRU)',
+)
+MODEL_POOL_MODELS = Gauge(
+    'model_pool_models',
+    'Кількість завантажених моделей символів',
+)
+MODEL_POOL_BYTES = Gauge(
+    'model_pool_bytes',
+    'Оцінка пам\'яті ваг завантажених моделей символів',
+)
+INFERENCE_PENDING = Gauge(
+    'inference_pending',
+    'Задачі інференсу в роботі та в черзі пулу потоків',
+)
+INFERENCE_REJECTED = Counter(
+    'inference_rejected_total',
+    'Запити, відхилені через заповнену чергу інференсу (503)',
+)
+INFERENCE_TIMEOUTS = Counter(
+    'inference_timeouts_total',
+    'Запити, що не вклалися в PREDICT_TIMEOUT_SECONDS (504)',
+)
+PROFILE_RUNS = Counter(
+    'admin_profile_runs_total',
+    'Запуски профілювання через /admin: stacks (семплювання стеків), memory (tracemalloc)',
+    labelnames=('kind',),
+)
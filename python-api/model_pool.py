@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+
+from metrics import (
+    MODEL_LOAD_SECONDS,
+    MODEL_POOL_BYTES,
+    MODEL_POOL_EVICTIONS,
+    MODEL_POOL_MODELS,
+    MODEL_POOL_REQUESTS,
+)
+from predictor import CryptoPredictor
+
+logger = logging.getLogger(__name__)
+
+# Ключ пулу стає частиною шляху - дозволяємо лише безпечні символи
+_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_\-]{1,64}$')
+
+
+def is_valid_key(symbol) -> bool:
+    """Чи може значення з запиту бути ключем пулу (рядок із латиниці, цифр, '_' і '-')."""
+    return isinstance(symbol, str) and bool(_KEY_PATTERN.match(symbol))
+
+
+def model_weight_bytes(predictor) -> int:
+    """Оцінка пам'яті моделі: сумарний розмір її ваг."""
+    return sum(int(weight.numpy().nbytes) for weight in predictor.model.weights)
+
+
+class ModelPool:
+    """
+    Пул моделей, окремих для символів (або символу й інтервалу).
+
+    Моделі лежать у models_dir/<KEY>/model.keras, де KEY - символ із запиту
+    (BTCUSDT або, для моделей під інтервал, BTCUSDT_1m). Модель завантажується
+    при першому зверненні; пул тримає моделі в порядку LRU і витісняє
+    найдавніше використані, коли сумарний розмір ваг перевищує memory_budget_mb.
+    Для символів без власної моделі повертається глобальна модель.
+
+    Фонове завдання періодично підвантажує найпопулярніші символи, щоб
+    перший запит після витіснення не чекав на завантаження.
+    """
+
+    def __init__(
+        self,
+        default,
+        models_dir: str = 'models',
+        memory_budget_mb: float = 256,
+        prefetch_top: int = 3,
+        prefetch_interval: float = 60.0,
+        loader=CryptoPredictor
+    ):
+        """
+        Args:
+            default (CryptoPredictor): Глобальна модель (fallback)
+            models_dir (str): Директорія з моделями символів
+            memory_budget_mb (float): Ліміт сумарного розміру ваг моделей у пулі, МБ
+            prefetch_top (int): Скільки найпопулярніших символів тримати завантаженими
+            prefetch_interval (float): Період фонового підвантаження, с
+            loader: Фабрика предиктора за шляхом до model.keras
+        """
+        self.default = default
+        self.models_dir = models_dir
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.prefetch_top = prefetch_top
+        self.prefetch_interval = prefetch_interval
+        self.loader = loader
+
+        self._models = OrderedDict()  # key -> (predictor, bytes)
+        self._loading = {}            # key -> asyncio.Future завантаження
+        self._popularity = Counter()
+        self._bytes = 0
+        self._task = None
+        MODEL_POOL_MODELS.set_function(lambda: len(self._models))
+        MODEL_POOL_BYTES.set_function(lambda: self._bytes)
+
+    def model_path(self, key: str) -> str:
+        """Шлях до моделі ключа або None, якщо ключ некоректний чи моделі немає."""
+        if not is_valid_key(key):
+            return None
+        path = os.path.join(self.models_dir, key, 'model.keras')
+        return path if os.path.exists(path) else None
+
+    def symbols(self) -> set:
+        """Символи, для яких у models_dir є власні моделі (BTCUSDT_1m -> BTCUSDT)."""
+        try:
+            names = os.listdir(self.models_dir)
+        except OSError:
+            return set()
+        return {
+            name.split('_', 1)[0].upper() for name in names
+            if _KEY_PATTERN.match(name) and os.path.exists(os.path.join(self.models_dir, name, 'model.keras'))
+        }
+
+    async def acquire(self, symbol: str):
+        """
+        Повертає предиктор для символу, за потреби завантажуючи його.
+
+        Args:
+            symbol (str): Символ із запиту
+
+        Returns:
+            CryptoPredictor: Модель символу або глобальна модель
+        """
+        # Верхній регістр лише для символу: інтервал у ключі (BTCUSDT_1m) чутливий до регістру
+        name, sep, suffix = symbol.partition('_')
+        key = name.upper() + sep + suffix
+        entry = self._models.get(key)
+        if entry is not None:
+            self._popularity[key] += 1
+            self._models.move_to_end(key)
+            MODEL_POOL_REQUESTS.labels('hit').inc()
+            return entry[0]
+
+        path = self.model_path(key)
+        if path is None:
+            MODEL_POOL_REQUESTS.labels('fallback').inc()
+            return self.default
+
+        self._popularity[key] += 1
+        MODEL_POOL_REQUESTS.labels('miss').inc()
+        try:
+            return await self._load(key, path)
+        except Exception as e:
+            logger.warning("Не вдалося завантажити модель %s: %s", key, str(e))
+            MODEL_POOL_REQUESTS.labels('fallback').inc()
+            return self.default
+
+    async def _load(self, key: str, path: str):
+        # Паралельні запити того самого символу чекають одне завантаження
+        future = self._loading.get(key)
+        if future is not None:
+            return await future
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            start = time.perf_counter()
+            predictor = await asyncio.to_thread(self.loader, path)
+            size = await asyncio.to_thread(model_weight_bytes, predictor)
+            elapsed = time.perf_counter() - start
+            MODEL_LOAD_SECONDS.observe(elapsed)
+            logger.info("Модель %s завантажено за %.0f мс (%.1f МБ)", key, elapsed * 1000, size / 1024 / 1024)
+
+            self._models[key] = (predictor, size)
+            self._bytes += size
+            self._evict(keep=key)
+            future.set_result(predictor)
+            return predictor
+        except Exception as e:
+            future.set_exception(e)
+            # Виняток уже передано тим, хто чекає; без цього asyncio попереджає про неприйнятий виняток
+            future.exception()
+            raise
+        finally:
+            del self._loading[key]
+
+    def _evict(self, keep: str) -> None:
+        """Витісняє найдавніше використані моделі, доки пул не вкладеться в ліміт."""
+        while self._bytes > self.memory_budget and len(self._models) > 1:
+            key = next(iter(self._models))
+            if key == keep:
+                self._models.move_to_end(key)
+                continue
+            _, size = self._models.pop(key)
+            self._bytes -= size
+            MODEL_POOL_EVICTIONS.inc()
+            logger.info("Модель %s витіснено з пулу", key)
+
+    async def prefetch(self) -> None:
+        """Завантажує найпопулярніші символи, яких немає в пулі."""
+        for key, _ in self._popularity.most_common(self.prefetch_top):
+            if key in self._models or key in self._loading:
+                continue
+            path = self.model_path(key)
+            if path is None:
+                continue
+            try:
+                await self._load(key, path)
+            except Exception as e:
+                logger.warning("Не вдалося підвантажити модель %s: %s", key, str(e))
+        # Згасання лічильників: популярність відображає останні інтервали
+        for key in list(self._popularity):
+            self._popularity[key] //= 2
+            if not self._popularity[key]:
+                del self._popularity[key]
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.prefetch_interval)
+            await self.prefetch()
+
+    def start(self) -> None:
+        if self.prefetch_top > 0:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,107 @@
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # msgpack не обов'язковий, якщо клієнти шлють JSON або float32
+    msgpack = None
+
+# Фіксований порядок колонок для компактних форматів
+FEATURE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+CONTENT_TYPE_JSON = 'application/json'
+CONTENT_TYPE_FLOAT32 = 'application/x-ohlcv-f32'
+CONTENT_TYPE_MSGPACK = 'application/msgpack'
+
+# Синоніми, які надсилають різні клієнти
+_CONTENT_TYPE_ALIASES = {
+    'application/json': CONTENT_TYPE_JSON,
+    'application/x-ohlcv-f32': CONTENT_TYPE_FLOAT32,
+    'application/octet-stream': CONTENT_TYPE_FLOAT32,
+    'application/msgpack': CONTENT_TYPE_MSGPACK,
+    'application/x-msgpack': CONTENT_TYPE_MSGPACK,
+    'application/vnd.msgpack': CONTENT_TYPE_MSGPACK,
+}
+
+
+class PayloadError(ValueError):
+    """Некоректне тіло запиту /predict."""
+
+
+class UnsupportedContentType(PayloadError):
+    """Content-Type, який сервер не вміє декодувати."""
+
+
+def negotiate_content_type(content_type: str) -> str:
+    """
+    Визначає формат тіла запиту за заголовком Content-Type.
+
+    Args:
+        content_type (str): Значення заголовка Content-Type (може містити параметри)
+
+    Returns:
+        str: Один з CONTENT_TYPE_JSON, CONTENT_TYPE_FLOAT32, CONTENT_TYPE_MSGPACK
+    """
+    media_type = (content_type or CONTENT_TYPE_JSON).split(';', 1)[0].strip().lower()
+    try:
+        return _CONTENT_TYPE_ALIASES[media_type]
+    except KeyError:
+        raise UnsupportedContentType(f"Непідтримуваний Content-Type: {media_type}")
+
+
+def _as_matrix(values: np.ndarray) -> np.ndarray:
+    """Перевіряє розмірність і приводить дані до матриці (n, 5) float32."""
+    if values.size % len(FEATURE_COLUMNS) != 0:
+        raise PayloadError(
+            f"Кількість значень ({values.size}) не кратна кількості колонок ({len(FEATURE_COLUMNS)})"
+        )
+    return values.reshape(-1, len(FEATURE_COLUMNS))
+
+
+def decode_float32(body: bytes) -> np.ndarray:
+    """
+    Декодує сирий масив float32 (little-endian, по рядках: open, high, low, close, volume).
+
+    Args:
+        body (bytes): Тіло запиту
+
+    Returns:
+        np.ndarray: Матриця (n, 5) float32 без копіювання буфера
+    """
+    if len(body) % np.dtype('<f4').itemsize != 0:
+        raise PayloadError(f"Розмір тіла ({len(body)} байт) не кратний розміру float32")
+    return _as_matrix(np.frombuffer(body, dtype='<f4'))
+
+
+def decode_msgpack(body: bytes) -> tuple:
+    """
+    Декодує msgpack-пакет виду {"symbol": str, "prices": bin | [[o, h, l, c, v], ...]}.
+
+    Поле prices може бути бінарним блоком float32 (той самий формат, що й
+    application/x-ohlcv-f32) або списком рядків з фіксованим порядком колонок.
+
+    Args:
+        body (bytes): Тіло запиту
+
+    Returns:
+        tuple: (symbol, values) - символ та матриця (n, 5) float32
+    """
+    if msgpack is None:
+        raise UnsupportedContentType("msgpack не встановлено на сервері")
+
+    try:
+        data = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise PayloadError(f"Некоректний msgpack: {str(e)}")
+
+    if not isinstance(data, dict):
+        raise PayloadError("msgpack-пакет має бути словником")
+
+    symbol = data.get('symbol', 'unknown')
+    prices = data.get('prices', b'')
+    if isinstance(prices, (bytes, bytearray)):
+        return symbol, decode_float32(bytes(prices))
+
+    values = np.asarray(prices, dtype=np.float32)
+    if values.ndim != 2 or values.shape[1] != len(FEATURE_COLUMNS):
+        raise PayloadError(f"prices має бути матрицею (n, {len(FEATURE_COLUMNS)}), отримано {values.shape}")
+    return symbol, values
@@ -0,0 +1,254 @@
+import logging
+import os
+import sys
+import threading
+import time
+from operator import itemgetter
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+from metrics import PREDICT_STAGE_SECONDS, PREPROCESS_BUDGET_EXCEEDED
+from payload import FEATURE_COLUMNS
+
+# Спільний з навчанням модуль ознак (у Docker-образі лежить у /neural-network)
+NEURAL_NETWORK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'neural-network')
+if NEURAL_NETWORK_DIR not in sys.path:
+    sys.path.append(NEURAL_NETWORK_DIR)
+from features import compute_features, feature_warmup, load_feature_names  # noqa: E402
+from stateful import StatefulLSTM  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Цільовий час фази до моделі (розбір рядків + масштабування + вікно), мкс
+PREPROCESS_BUDGET_US = float(os.environ.get("PREPROCESS_BUDGET_US", "250"))
+
+
+def available_cpus() -> int:
+    """Кількість ядер, доступних процесу (з урахуванням affinity/cgroup cpuset)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def configure_tf_threads(workers: int = 1) -> int:
+    """
+    Ділить ядра між воркерами, щоб TF-пули потоків не конкурували між процесами.
+
+    Має викликатися до першої TF-операції в процесі (до завантаження моделі).
+    TF_INTRA_THREADS / TF_INTER_THREADS перевизначають розрахунок.
+
+    Args:
+        workers (int): Кількість процесів-воркерів на машині
+
+    Returns:
+        int: Кількість intra-op потоків на воркер
+    """
+    intra = int(os.environ.get("TF_INTRA_THREADS", max(1, available_cpus() // max(1, workers))))
+    inter = int(os.environ.get("TF_INTER_THREADS", "1"))
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra)
+        tf.config.threading.set_inter_op_parallelism_threads(inter)
+    except RuntimeError as e:
+        # TF вже ініціалізовано в цьому процесі - залишаємо як є
+        logger.warning("Не вдалося налаштувати потоки TF: %s", str(e))
+    logger.info("TF потоки: intra=%d, inter=%d (воркерів: %d)", intra, inter, workers)
+    return intra
+
+
+class CryptoPredictor:
+    def __init__(self, model_path: str = 'model/model.keras'):
+        """
+        Ініціалізація предиктора.
+
+        Args:
+            model_path (str): Шлях до збереженої моделі
+        """
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Модель не знайдено за шляхом: {model_path}")
+
+        self.model = keras.models.load_model(model_path)
+        self.window_size = 30  # Змінено на 30, щоб відповідати вхідним даним
+        # Ознаки моделі з features.json поруч із model.keras (за замовчуванням - сирі OHLCV)
+        self.feature_names = load_feature_names(os.path.dirname(model_path))
+        self.raw_features = self.feature_names == tuple(FEATURE_COLUMNS)
+        self.warmup = feature_warmup(self.feature_names)
+        self.n_inputs = len(FEATURE_COLUMNS)
+        self.n_features = len(self.feature_names)
+        self._row_getter = itemgetter(*FEATURE_COLUMNS)
+        # Покроковий інференс для стрімінгу (None, якщо архітектура не LSTM -> Dense)
+        try:
+            self.stateful = StatefulLSTM.from_keras(self.model)
+        except ValueError as e:
+            logger.info("Stateful-режим недоступний: %s", str(e))
+            self.stateful = None
+        # Буфери перевикористовуються між запитами; окремі для кожного потоку
+        self._buffers = threading.local()
+        logger.info("Ініціалізовано CryptoPredictor з window_size=%d, ознаки: %s",
+                    self.window_size, ", ".join(self.feature_names))
+
+    @property
+    def min_rows(self) -> int:
+        """Мінімальна кількість свічок у запиті: вікно плюс прогрів індикаторів."""
+        return self.window_size + self.warmup
+
+    def _get_buffers(self, n_rows: int):
+        """
+        Повертає попередньо виділені буфери поточного потоку, розширюючи їх за потреби.
+
+        Args:
+            n_rows (int): Кількість рядків, які потрібно розмістити
+
+        Returns:
+            threading.local: Буфери rows, X, data_min, data_range
+        """
+        buffers = self._buffers
+        rows = getattr(buffers, 'rows', None)
+        if rows is None:
+            buffers.X = np.empty((1, self.window_size, self.n_features), dtype=np.float32)
+            buffers.data_min = np.empty(self.n_features, dtype=np.float32)
+            buffers.data_range = np.empty(self.n_features, dtype=np.float32)
+        if rows is None or len(rows) < n_rows:
+            buffers.rows = np.empty((max(n_rows, self.min_rows), self.n_inputs), dtype=np.float32)
+        return buffers
+
+    def rows_to_array(self, prices: list) -> np.ndarray:
+        """
+        Перетворює JSON-рядки {open, high, low, close, volume, ...} у матрицю без pandas.
+
+        Args:
+            prices (list): Список словників зі свічками
+
+        Returns:
+            np.ndarray: Матриця (n, 5) float32 - вид на буфер поточного потоку
+        """
+        n_rows = len(prices)
+        if n_rows < self.min_rows:
+            raise ValueError(f"Недостатньо даних. Потрібно мінімум {self.min_rows} точок, отримано {n_rows}")
+
+        values = self._get_buffers(n_rows).rows[:n_rows]
+        getter = self._row_getter
+        try:
+            for i, row in enumerate(prices):
+                values[i] = getter(row)
+        except KeyError as e:
+            raise ValueError(f"Відсутня колонка {e.args[0]} в даних")
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Некоректний рядок даних №{i}: {str(e)}")
+        return values
+
+    def prepare_array(self, values: np.ndarray) -> np.ndarray:
+        """
+        Підготовка даних для прогнозування з матриці свічок без pandas.
+
+        Якщо модель навчено на індикаторах, вони рахуються тими самими функціями
+        features.py, що й при навчанні; рядки прогріву відкидаються.
+
+        Args:
+            values (np.ndarray): Матриця (n, 5) з колонками open, high, low, close, volume
+
+        Returns:
+            np.ndarray: Тензор (1, window_size, n_features) float32 - буфер поточного потоку
+        """
+        if len(values) < self.min_rows:
+            raise ValueError(f"Недостатньо даних. Потрібно мінімум {self.min_rows} точок, отримано {len(values)}")
+        if values.ndim != 2 or values.shape[1] != self.n_inputs:
+            raise ValueError(f"Очікується матриця (n, {self.n_inputs}), отримано {values.shape}")
+
+        if not self.raw_features:
+            values = compute_features(values, self.feature_names)[self.warmup:]
+        return self.prepare_features(values)
+
+    def prepare_features(self, features: np.ndarray) -> np.ndarray:
+        """
+        Масштабування готової матриці ознак і вибір останнього вікна.
+
+        Масштабування еквівалентне MinMaxScaler.fit_transform по всіх переданих
+        рядках (нульовий діапазон замінюється на 1).
+
+        Args:
+            features (np.ndarray): Матриця (n, n_features) без NaN, n >= window_size
+
+        Returns:
+            np.ndarray: Тензор (1, window_size, n_features) float32 - буфер поточного потоку
+        """
+        if len(features) < self.window_size:
+            raise ValueError(f"Недостатньо даних. Потрібно мінімум {self.window_size} рядків ознак, отримано {len(features)}")
+        if features.ndim != 2 or features.shape[1] != self.n_features:
+            raise ValueError(f"Очікується матриця (n, {self.n_features}), отримано {features.shape}")
+
+        buffers = self._get_buffers(0)
+        data_min, data_range, X = buffers.data_min, buffers.data_range, buffers.X
+
+        np.min(features, axis=0, out=data_min)
+        np.max(features, axis=0, out=data_range)
+        np.subtract(data_range, data_min, out=data_range)
+        data_range[data_range == 0.0] = 1.0
+
+        window = X[0]
+        np.subtract(features[-self.window_size:], data_min, out=window)
+        np.divide(window, data_range, out=window)
+        return X
+
+    def predict_array(self, values: np.ndarray, start: float = None) -> float:
+        """
+        Прогнозування на основі матриці свічок.
+
+        Args:
+            values (np.ndarray): Матриця (n, 5) з колонками open, high, low, close, volume
+            start (float, optional): Момент початку фази до моделі (time.perf_counter)
+
+        Returns:
+            float: Прогнозована ціна
+        """
+        return self._predict(self.prepare_array, values, start)
+
+    def predict_features(self, features: np.ndarray, start: float = None) -> float:
+        """
+        Прогнозування на основі вже порахованих ознак (стрімінг, features.StreamingFeatures).
+
+        Args:
+            features (np.ndarray): Матриця (n, n_features)
+            start (float, optional): Момент початку фази до моделі (time.perf_counter)
+
+        Returns:
+            float: Прогнозована ціна
+        """
+        return self._predict(self.prepare_features, features, start)
+
+    def _predict(self, prepare, values: np.ndarray, start: float = None) -> float:
+        scale_start = time.perf_counter()
+        if start is None:
+            start = scale_start
+        X = prepare(values)
+        forward_start = time.perf_counter()
+        PREDICT_STAGE_SECONDS.labels('scale').observe(forward_start - scale_start)
+
+        elapsed_us = (forward_start - start) * 1e6
+        if elapsed_us > PREPROCESS_BUDGET_US:
+            PREPROCESS_BUDGET_EXCEEDED.inc()
+        logger.debug("Підготовка даних: %.0f мкс (ціль %.0f мкс), X=%s", elapsed_us, PREPROCESS_BUDGET_US, X.shape)
+
+        # Прямий виклик замість model.predict: без створення data adapter на кожен
+        # запит і безпечно з кількох потоків пулу інференсу
+        prediction = self.model(X, training=False)
+        PREDICT_STAGE_SECONDS.labels('forward').observe(time.perf_counter() - forward_start)
+        logger.debug("Отримано прогноз %s", prediction)
+        return float(prediction[0][0])
+
+    def predict_rows(self, prices: list) -> float:
+        """
+        Прогнозування на основі JSON-рядків.
+
+        Args:
+            prices (list): Список словників зі свічками
+
+        Returns:
+            float: Прогнозована ціна
+        """
+        start = time.perf_counter()
+        values = self.rows_to_array(prices)
+        PREDICT_STAGE_SECONDS.labels('array').observe(time.perf_counter() - start)
+        return self.predict_array(values, start)
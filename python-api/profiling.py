@@ -0,0 +1,190 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# Верхня межа тривалості профілювання за один запит, с
+MAX_PROFILE_SECONDS = 60.0
+
+# Кадри, у яких потік чекає, а не працює (пул без задач, event loop без подій)
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('selectors.py', 'select'),
+    ('thread.py', '_worker'),
+}
+
+
+class ProfilerBusy(Exception):
+    """Профілювання цього типу вже виконується в процесі (409)."""
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Семплювальний профайлер: окремий потік раз на interval знімає стеки всіх
+    потоків процесу (sys._current_frames) і рахує однакові стеки.
+
+    На відміну від cProfile бачить і event loop, і потоки пулу інференсу, а
+    накладні витрати обмежені частотою семплів. Поза профілюванням потоку
+    немає, тож у простої ціна нульова. Результат - collapsed stacks
+    ("потік;кадр;...;кадр кількість"), які приймають flamegraph.pl і speedscope.
+    Потік, що виконує C-код (операції TF, numpy), потрапляє в семпл з
+    останнім Python-кадром, який його викликав.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128, include_idle: bool = False):
+        """
+        Args:
+            interval (float): Інтервал між семплами, с
+            max_depth (int): Максимальна глибина стека (глибші кадри відкидаються з боку кореня)
+            include_idle (bool): Чи враховувати потоки, що чекають (IDLE_FRAMES)
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.include_idle = include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("Семплювання стеків уже виконується")
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        self._lock.release()
+
+    def _is_idle(self, frame) -> bool:
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (not self.include_idle and self._is_idle(frame)):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Стеки у форматі collapsed, від найчастішого."""
+        return ''.join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+    def summary(self, top: int = 25) -> dict:
+        """
+        Зведення для JSON: кількість семплів і функції з найбільшим власним часом.
+
+        Args:
+            top (int): Кількість функцій у списку
+
+        Returns:
+            dict: samples, duration, interval, threads (семпли по потоках), top (власні семпли функцій)
+        """
+        threads = Counter()
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            threads[stack[0]] += count
+            leaves[stack[-1]] += count
+        return {
+            'samples': self.samples,
+            'duration': round(self.duration, 3),
+            'interval': self.interval,
+            'threads': dict(threads.most_common()),
+            'top': [{'function': name, 'samples': count} for name, count in leaves.most_common(top)],
+        }
+
+
+class AllocationTracker:
+    """
+    Різниця знімків tracemalloc за вікно: які рядки коду виділили пам'ять,
+    що лишилась живою до кінця вікна, і пік за вікно.
+
+    tracemalloc вмикається лише на час вікна (трасування кожного виділення
+    уповільнює Python-код), тож поза вікном накладних витрат немає. Видно
+    виділення через Python-аллокатор і numpy; внутрішні буфери TensorFlow
+    (C++-аллокатор) tracemalloc не бачить.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, frames: int = 1):
+        """
+        Args:
+            frames (int): Глибина traceback для кожного виділення (1 - лише рядок виділення)
+        """
+        self.frames = frames
+        self._before = None
+
+    def start(self) -> None:
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("Знімки пам'яті вже виконуються")
+        if tracemalloc.is_tracing():
+            self._lock.release()
+            raise ProfilerBusy("tracemalloc уже увімкнено поза профайлером")
+        tracemalloc.start(self.frames)
+        self._before = tracemalloc.take_snapshot()
+
+    def stop(self, top: int = 25) -> dict:
+        """
+        Знімає другий знімок, вимикає tracemalloc і порівнює знімки.
+
+        Args:
+            top (int): Кількість записів з найбільшим приростом
+
+        Returns:
+            dict: traced_bytes, peak_bytes і top - приріст пам'яті й кількості блоків по місцях виділення
+        """
+        try:
+            after = tracemalloc.take_snapshot()
+            traced, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            self._lock.release()
+
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, __file__),
+        ]
+        key = 'traceback' if self.frames > 1 else 'lineno'
+        diff = after.filter_traces(filters).compare_to(self._before.filter_traces(filters), key)
+        return {
+            'traced_bytes': traced,
+            'peak_bytes': peak,
+            'top': [
+                {
+                    'traceback': [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                    'size_diff': stat.size_diff,
+                    'size': stat.size,
+                    'count_diff': stat.count_diff,
+                }
+                for stat in diff[:top]
+            ],
+        }
@@ -0,0 +1,405 @@
+import asyncio
+import logging
+import re
+import time
+from collections import defaultdict
+
+from candles import Candle, CandleBuffer
+import numpy as np
+
+from features import StreamingFeatures
+from inference import InferenceOverloaded, InferenceTimeout
+from metrics import PREDICT_WINDOW_CACHE, STREAM_DELIVERIES, STREAM_PREDICTIONS, STREAM_STATEFUL_ERROR
+from stateful import StateStore
+
+logger = logging.getLogger(__name__)
+
+# Розбіжність stateful-прогнозу з віконною моделлю, після якої verify пише попередження
+STATEFUL_DRIFT_WARNING = 0.01
+
+# Формат символу Binance: лише латиниця у верхньому регістрі та цифри
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9]{2,20}$')
+
+
+class WindowNotReady(Exception):
+    """У буфері символу ще недостатньо свічок для вікна моделі."""
+
+
+class UnknownSymbol(ValueError):
+    """Символ має неправильний формат або не входить до дозволених (400)."""
+
+
+class TooManySymbols(Exception):
+    """Досягнуто ліміт символів, які сервер відстежує одночасно (503)."""
+
+
+class PredictionHub:
+    """
+    Розсилка прогнозів підписникам.
+
+    Кожна нова свічка додається в буфер символу, прогноз рахується один раз
+    на символ і свічку, а результат розсилається в черги всіх підписників.
+
+    Якщо модель навчено на індикаторах, вони оновлюються інкрементно
+    (StreamingFeatures) і буфер зберігає вже готові рядки ознак.
+
+    У stateful-режимі прогноз рахується одним кроком LSTM на свічку зі
+    збереженого стану символу (stateful.py); раз на reseed_every свічок стан
+    і масштабування перебудовуються по поточному вікну. Режим verify порівнює
+    кожен такий прогноз із віконною моделлю (prepare_features і повний прохід
+    по поточному вікну буфера) у пулі інференсу.
+
+    Ті самі буфери обслуговують /predict?symbol=... без тіла запиту
+    (predict_symbol): вікно береться з пам'яті, а символ стає "спостережуваним"
+    на watch_seconds, тож джерело свічок продовжує його оновлювати.
+
+    Символи від клієнтів перевіряються (check_symbols): формат SYMBOL_PATTERN,
+    allowed_symbols, якщо задано, і не більше max_symbols відстежуваних
+    одночасно. Буфери символу без підписників, чий час спостереження минув,
+    звільняються.
+    """
+
+    def __init__(
+        self,
+        predictor,
+        inference,
+        buffer_size: int = None,
+        queue_size: int = 16,
+        stateful: bool = False,
+        reseed_every: int = None,
+        verify: bool = False,
+        watch_seconds: float = 600.0,
+        allowed_symbols: set = None,
+        max_symbols: int = 64
+    ):
+        self.predictor = predictor
+        self.inference = inference
+        self.stateful = stateful and predictor.stateful is not None
+        self.reseed_every = reseed_every or predictor.window_size
+        self.verify = verify
+        if self.stateful:
+            self.states = StateStore(predictor.stateful.units, predictor.n_features)
+        self.buffer_size = buffer_size or predictor.window_size
+        self.queue_size = queue_size
+        self.buffers = {}
+        self.feature_streams = {}
+        self.latest = {}
+        self.watch_seconds = watch_seconds
+        self.allowed_symbols = allowed_symbols
+        self.max_symbols = max_symbols
+        self._watched = {}
+        self._subscribers = defaultdict(set)
+        self._task = None
+
+    def symbols(self) -> set:
+        """Символи, на які зараз є хоча б один підписник або нещодавній запит /predict."""
+        deadline = time.monotonic() - self.watch_seconds
+        for symbol in [symbol for symbol, seen in self._watched.items() if seen < deadline]:
+            del self._watched[symbol]
+            if symbol not in self._subscribers:
+                self._forget(symbol)
+        return set(self._subscribers) | set(self._watched)
+
+    def tracked(self) -> set:
+        """Символи, для яких сервер тримає буфери або які зараз опитуються."""
+        return self.symbols() | set(self.buffers) | set(self.feature_streams)
+
+    def check_symbols(self, symbols: list) -> None:
+        """
+        Перевіряє символи від клієнта до того, як під них буде виділено буфери.
+
+        Args:
+            symbols (list): Символи у верхньому регістрі
+
+        Raises:
+            UnknownSymbol: Неправильний формат або символ не дозволено
+            TooManySymbols: Нові символи перевищили б max_symbols
+        """
+        for symbol in symbols:
+            if not SYMBOL_PATTERN.match(symbol):
+                raise UnknownSymbol(f"Некоректний символ: {symbol[:32]!r}")
+            if self.allowed_symbols is not None and symbol not in self.allowed_symbols:
+                raise UnknownSymbol(f"Символ {symbol} не обслуговується")
+        tracked = self.tracked()
+        if len(tracked | set(symbols)) > self.max_symbols:
+            # Спершу звільняємо буфери символів, на які вже ніхто не дивиться
+            active = self.symbols()
+            for symbol in tracked - active:
+                self._forget(symbol)
+            if len(self.tracked() | set(symbols)) > self.max_symbols:
+                raise TooManySymbols(f"Сервер уже відстежує {self.max_symbols} символів")
+
+    def _forget(self, symbol: str) -> None:
+        """Звільняє буфер, стан індикаторів і останній прогноз символу."""
+        self.buffers.pop(symbol, None)
+        self.feature_streams.pop(symbol, None)
+        self.latest.pop(symbol, None)
+        if self.stateful:
+            self.states.remove(symbol)
+
+    async def predict_symbol(self, symbol: str, predictor=None) -> tuple:
+        """
+        Прогноз за останнім вікном буфера символу, без даних від клієнта.
+
+        Якщо для останньої свічки прогноз уже пораховано (стрімінг або
+        попередній запит), він повертається без інференсу.
+
+        Args:
+            symbol (str): Символ
+            predictor: Модель символу з пулу (None - глобальна); її ознаки мають
+                збігатися з ознаками буфера
+
+        Returns:
+            tuple: (prediction, timestamp) - прогноз і час останньої свічки вікна
+
+        Raises:
+            WindowNotReady: Свічок у буфері ще недостатньо (символ уже поставлено на оновлення)
+            UnknownSymbol, TooManySymbols: Символ не пройшов check_symbols
+        """
+        if symbol not in self._watched:
+            self.check_symbols([symbol])
+        self._watched[symbol] = time.monotonic()
+        predictor = predictor or self.predictor
+        if predictor.feature_names != self.predictor.feature_names:
+            raise ValueError(f"Модель {symbol} використовує інші ознаки, ніж буфер свічок; передайте свічки в запиті")
+
+        buffer = self.buffers.get(symbol)
+        if buffer is None or buffer.size < predictor.window_size:
+            PREDICT_WINDOW_CACHE.labels('miss').inc()
+            size = buffer.size if buffer is not None else 0
+            raise WindowNotReady(f"Для {symbol} у буфері {size} з {predictor.window_size} свічок")
+
+        timestamp = buffer.last_timestamp
+        shared = predictor is self.predictor
+        latest = self.latest.get(symbol)
+        if shared and latest is not None and latest["timestamp"] == timestamp:
+            PREDICT_WINDOW_CACHE.labels('hit').inc()
+            return latest["prediction"]["willRise"], timestamp
+
+        values = buffer.view()[-predictor.window_size:].copy()
+        predict = predictor.predict_array if predictor.raw_features else predictor.predict_features
+        predicted = await self.inference.run(predict, values)
+        PREDICT_WINDOW_CACHE.labels('computed').inc()
+        # Свічка могла змінитися під час інференсу - тоді результат не кешуємо
+        if shared and buffer.last_timestamp == timestamp:
+            self.latest[symbol] = self._prediction_message(symbol, timestamp, predicted)
+        return predicted, timestamp
+
+    def recent_closes(self, symbol: str, count: int) -> list:
+        """
+        Останні ціни закриття з буфера символу (для графіка без окремого запиту до біржі).
+
+        Args:
+            symbol (str): Символ
+            count (int): Максимальна кількість свічок
+
+        Returns:
+            list: [{"timestamp": ..., "close": ...}, ...] у хронологічному порядку; порожній,
+                якщо буфера немає або ознаки моделі не містять close
+        """
+        buffer = self.buffers.get(symbol)
+        if buffer is None or count <= 0 or 'close' not in self.predictor.feature_names:
+            return []
+        column = self.predictor.feature_names.index('close')
+        closes = buffer.view()[-count:, column]
+        timestamps = buffer.timestamps()[-count:]
+        return [{"timestamp": int(t), "close": float(c)} for t, c in zip(timestamps, closes)]
+
+    def subscribe(self, symbols: list) -> asyncio.Queue:
+        """
+        Реєструє підписника на список символів.
+
+        Args:
+            symbols (list): Символи, наприклад ['BTCUSDT', 'ETHUSDT']
+
+        Returns:
+            asyncio.Queue: Черга, в яку надходитимуть прогнози
+
+        Raises:
+            UnknownSymbol, TooManySymbols: Символи не пройшли check_symbols
+        """
+        self.check_symbols(symbols)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for symbol in symbols:
+            self._subscribers[symbol].add(queue)
+            # Новий підписник одразу отримує останній відомий прогноз
+            if symbol in self.latest:
+                queue.put_nowait(self.latest[symbol])
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        for symbol in list(self._subscribers):
+            queues = self._subscribers[symbol]
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[symbol]
+                if symbol not in self._watched:
+                    self._forget(symbol)
+
+    def _publish(self, symbol: str, message: dict) -> None:
+        self.latest[symbol] = message
+        STREAM_PREDICTIONS.inc()
+        queues = self._subscribers.get(symbol, ())
+        for queue in queues:
+            if queue.full():
+                # Повільний клієнт: відкидаємо найстаріше повідомлення
+                queue.get_nowait()
+            queue.put_nowait(message)
+        STREAM_DELIVERIES.inc(len(queues))
+
+    async def on_candle(self, candle: Candle) -> None:
+        """
+        Оновлює буфер символу і, якщо вікно заповнене, рахує та розсилає прогноз.
+
+        Args:
+            candle (Candle): Нова свічка
+        """
+        buffer = self.buffers.get(candle.symbol)
+        if buffer is None:
+            buffer = self.buffers[candle.symbol] = CandleBuffer(self.buffer_size, self.predictor.n_features)
+
+        # Оновлення незакритої свічки (той самий timestamp) не робить новий крок LSTM
+        replaced = buffer.size > 0 and candle.timestamp == buffer.last_timestamp
+        if self.predictor.raw_features:
+            buffer.append(candle.timestamp, candle.values)
+            predict = self.predictor.predict_array
+        else:
+            # Стан індикаторів не відкочується, тому повтор свічки пропускаємо
+            if candle.timestamp <= buffer.last_timestamp:
+                return
+            stream = self.feature_streams.get(candle.symbol)
+            if stream is None:
+                stream = self.feature_streams[candle.symbol] = StreamingFeatures(self.predictor.feature_names)
+            row = stream.update(candle.values)
+            if stream.rows_seen <= stream.warmup:
+                return
+            buffer.append(candle.timestamp, row)
+            predict = self.predictor.predict_features
+
+        if buffer.size < self.predictor.window_size or not self._subscribers.get(candle.symbol):
+            if self.stateful:
+                # Без підписників стан не оновлюється - перебудується з вікна при підписці
+                self.states.remove(candle.symbol)
+            return
+
+        if self.stateful:
+            predicted = self._predict_stateful(candle.symbol, buffer, replaced)
+            self._publish_prediction(candle, predicted)
+            if self.verify:
+                values = buffer.view()[-self.predictor.window_size:].copy()
+                await self._verify_stateful(candle.symbol, predicted, predict, values)
+            return
+
+        # Копія вікна, щоб наступні свічки не змінили дані під час обчислення
+        values = buffer.view()[-self.predictor.window_size:].copy()
+        try:
+            # Той самий пул, що й /predict: спільний бюджет потоків інференсу
+            predicted = await self.inference.run(predict, values)
+        except (InferenceOverloaded, InferenceTimeout) as e:
+            logger.warning("Прогноз для %s пропущено: %s", candle.symbol, str(e))
+            return
+        except Exception as e:
+            logger.warning("Помилка прогнозу для %s: %s", candle.symbol, str(e))
+            return
+        self._publish_prediction(candle, predicted)
+
+    def _predict_stateful(self, symbol: str, buffer, replaced: bool) -> float:
+        """
+        Прогноз одним кроком LSTM (або перебудовою стану по вікну).
+
+        Перебудова масштабує вікно так само, як prepare_features, тож її прогноз
+        збігається з віконною моделлю; далі масштаб символу зафіксовано.
+
+        Args:
+            symbol (str): Символ
+            buffer (CandleBuffer): Буфер рядків ознак символу
+            replaced (bool): Остання свічка замінила попередню (той самий timestamp)
+
+        Returns:
+            float: Прогноз
+        """
+        lstm, states = self.predictor.stateful, self.states
+        window_size = self.predictor.window_size
+        rows = buffer.view()
+        seeded = symbol in states
+        slot = states.slot(symbol)
+        state, scale = states.states[slot], states.scale[slot]
+
+        if not seeded or (not replaced and states.steps[slot] >= self.reseed_every):
+            window = rows[-window_size:]
+            np.min(window, axis=0, out=scale[0])
+            np.subtract(window.max(axis=0), scale[0], out=scale[1])
+            scale[1][scale[1] == 0.0] = 1.0
+            scaled = (window - scale[0]) / scale[1]
+            h, c = lstm.replay(scaled[:-1])
+            state[StateStore.BASE_H], state[StateStore.BASE_C] = h[0], c[0]
+            states.steps[slot] = 0
+        elif not replaced:
+            state[StateStore.BASE_H], state[StateStore.BASE_C] = state[StateStore.H], state[StateStore.C]
+            states.steps[slot] += 1
+
+        x = (rows[-1:] - scale[0]) / scale[1]
+        h, c = lstm.step(x, state[StateStore.BASE_H][np.newaxis], state[StateStore.BASE_C][np.newaxis])
+        state[StateStore.H], state[StateStore.C] = h[0], c[0]
+        return float(lstm.output(h)[0])
+
+    async def _verify_stateful(self, symbol: str, predicted: float, predict, values: np.ndarray) -> None:
+        """
+        Порівнює stateful-прогноз із віконною моделлю на тому самому вікні.
+
+        Віконний прогноз (масштабування prepare_features по вікну і повний
+        прохід моделі) рахується в пулі інференсу, а не в event loop. Різниця
+        включає і зафіксоване між перебудовами масштабування, тож показує
+        реальний дрейф stateful-режиму, а не лише похибку округлення.
+
+        Args:
+            symbol (str): Символ
+            predicted (float): Stateful-прогноз
+            predict: predictor.predict_array або predictor.predict_features
+            values (np.ndarray): Копія поточного вікна буфера
+        """
+        try:
+            expected = await self.inference.run(predict, values)
+        except Exception as e:
+            logger.warning("Перевірку stateful-прогнозу %s пропущено: %s", symbol, str(e))
+            return
+        error = abs(predicted - expected)
+        STREAM_STATEFUL_ERROR.observe(error)
+        if error > STATEFUL_DRIFT_WARNING:
+            logger.warning("Stateful-прогноз %s розходиться з віконною моделлю: %.2e", symbol, error)
+
+    @staticmethod
+    def _prediction_message(symbol: str, timestamp: int, predicted: float) -> dict:
+        return {
+            "prediction": {
+                "willRise": predicted,
+                "currencyPair": {
+                    "name": symbol
+                }
+            },
+            "timestamp": timestamp,
+        }
+
+    def _publish_prediction(self, candle: Candle, predicted: float) -> None:
+        self._publish(candle.symbol, self._prediction_message(candle.symbol, candle.timestamp, predicted))
+
+    async def run(self, source) -> None:
+        """Споживає свічки з джерела до його завершення."""
+        async for candle in source.stream(self.symbols):
+            await self.on_candle(candle)
+        logger.info("Джерело свічок завершилось")
+
+    def start(self, source) -> None:
+        # Джерела з історією (BinanceCandleSource) мають одразу заповнити буфер і прогрів індикаторів
+        if hasattr(source, 'history'):
+            source.history = max(source.history, self.buffer_size + self.predictor.warmup)
+        self._task = asyncio.create_task(self.run(source))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None